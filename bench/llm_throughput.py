@@ -0,0 +1,158 @@
+"""
+LLMManager.call_all 처리량 벤치마크 (mock provider, 과금 없음)
+
+    python -m bench.llm_throughput --n 200 --workers 1 4 8 16 --median 0.4 --error-rate 0.02 --burst 50 5
+
+- 동시성 단계별로 새 LLMManager 를 만들어 같은 프롬프트 묶음을 처리
+- 처리량(calls/s), 호출 지연 p50/p95/p99, 실패/생략 건수, 재시도 사용량,
+  mock 기준 최대 동시 처리 수와 worker 활용률을 표로 출력
+- 네트워크 없이 실행: 환율은 고정값(--exchange-rate), 토큰 수는 오프라인 근사 인코더
+  (--tiktoken 지정 시 실제 tiktoken 인코더 → 최초 실행 시 vocab 다운로드 필요)
+- results/ · logs/ 는 임시 디렉터리로 돌려서 기록 → 실제 실행 기록(--resume 대상)에 섞이지 않고 종료 시 삭제
+"""
+import argparse
+import contextlib
+import json
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from config.log_writer import release
+from config.setting import cfg
+from llm import mock
+from llm.llm_manager import LLMManager, release_stage_state
+from pipeline.artifacts import release_store
+from llm.result import is_failure, SKIPPED
+from llm.token_counter import use_offline_encoder
+
+
+class TimedManager(LLMManager):
+    # ✅ 호출 1건 단위 지연 측정 (재시도 대기 포함)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+        self._lat_lock = threading.Lock()
+
+    def call(self, prompt, tag="llm_call", llm_config=None):
+        t0 = time.perf_counter()
+        try:
+            return super().call(prompt, tag, llm_config)
+        finally:
+            with self._lat_lock:
+                self.latencies.append(time.perf_counter() - t0)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def make_prompts(n: int, size: int) -> tuple[list[str], list[str]]:
+    body = "\n".join(f"+    value_{i} = compute({i})" for i in range(size))
+    prompts = [f"diff --git a/mod_{i}.py b/mod_{i}.py\n@@ -1,1 +1,{size} @@\n{body}\n# {i}" for i in range(n)]
+    return prompts, [f"bench_{i}" for i in range(n)]
+
+
+def run_level(stage: str, workers: int, prompts: list[str], tags: list[str], mock_conf: dict, seed: int,
+              exchange_rate: float = cfg.EXCHANGE_RATE_FALLBACK) -> dict:
+    backend = mock.configure(mock_conf, seed=seed)
+    llm_config = {
+        **cfg.get_llm_config(stage),
+        "provider": ["mock"], "model": ["mock"],
+        "stream": False, "mode": "sync",
+        "max_workers": workers, "interval": 0.0,
+    }
+    timestamp = f"bench_{int(time.time())}_w{workers}"
+    cfg.set_timestamp(timestamp)
+    repo_df = pd.DataFrame({"Diff list": [tags]})
+    try:
+        with TimedManager(stage, repo_df, llm_config=llm_config, exchange_rate=exchange_rate) as manager:
+            t0 = time.perf_counter()
+            results = manager.call_all(prompts, tags)
+            wall = time.perf_counter() - t0
+    finally:
+        release_store(timestamp)
+        release_stage_state(timestamp)
+        release(cfg.init_log_file(timestamp))
+    lat = manager.latencies
+    stats = backend.stats()
+    failures = [r for r in results if is_failure(r)]
+    return {
+        "workers": workers,
+        "calls": len(prompts),
+        "wall_s": round(wall, 3),
+        "throughput": round(len(prompts) / wall, 2) if wall else 0.0,
+        "p50_s": round(_percentile(lat, 0.50), 3),
+        "p95_s": round(_percentile(lat, 0.95), 3),
+        "p99_s": round(_percentile(lat, 0.99), 3),
+        "mean_s": round(statistics.fmean(lat), 3) if lat else 0.0,
+        "failed": sum(1 for r in failures if r.kind != SKIPPED),
+        "skipped": sum(1 for r in failures if r.kind == SKIPPED),
+        "retries": manager.retry_budget.used,
+        "provider_calls": stats["calls"],
+        "max_in_flight": stats["max_in_flight"],
+        "utilization": round(sum(lat) / (wall * workers), 2) if wall else 0.0,
+        "errors": stats["errors"],
+    }
+
+
+# ✅ 벤치 실행 동안만 results/ · logs/ 를 임시 디렉터리로 교체
+@contextlib.contextmanager
+def scratch_dirs():
+    saved = cfg.RESULTS_DIR, cfg.LOGS_DIR, cfg.get_timestamp()
+    with tempfile.TemporaryDirectory(prefix="llm_bench_") as tmp:
+        cfg.RESULTS_DIR, cfg.LOGS_DIR = Path(tmp) / "results", Path(tmp) / "logs"
+        try:
+            yield Path(tmp)
+        finally:
+            cfg.RESULTS_DIR, cfg.LOGS_DIR = saved[0], saved[1]
+            cfg.set_timestamp(saved[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLMManager 처리량 벤치마크 (mock provider)")
+    parser.add_argument("--stage", default="mk_msg")
+    parser.add_argument("--n", type=int, default=100, help="프롬프트 수")
+    parser.add_argument("--size", type=int, default=40, help="프롬프트당 diff 줄 수")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--dist", default="lognormal", choices=["lognormal", "uniform", "fixed"])
+    parser.add_argument("--median", type=float, default=0.3)
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst", type=int, nargs=2, metavar=("EVERY", "LENGTH"), default=[0, 0])
+    parser.add_argument("--replay", default=None, help="기록된 세그먼트 파일 (llm.in_and_out)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--exchange-rate", type=float, default=cfg.EXCHANGE_RATE_FALLBACK, help="고정 환율 (KRW/USD)")
+    parser.add_argument("--tiktoken", action="store_true", help="오프라인 근사 대신 실제 tiktoken 인코더 사용")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 으로 출력")
+    args = parser.parse_args()
+
+    mock_conf = {
+        "latency": {"dist": args.dist, "median": args.median, "sigma": args.sigma},
+        "error_rate": args.error_rate,
+        "burst_429": {"every": args.burst[0], "length": args.burst[1]},
+        "replay": args.replay,
+    }
+    if not args.tiktoken:
+        use_offline_encoder()
+    prompts, tags = make_prompts(args.n, args.size)
+    with scratch_dirs():
+        rows = [run_level(args.stage, w, prompts, tags, mock_conf, args.seed, args.exchange_rate)
+                for w in args.workers]
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    cols = ["workers", "wall_s", "throughput", "p50_s", "p95_s", "p99_s", "failed", "skipped",
+            "retries", "max_in_flight", "utilization", "errors"]
+    print(pd.DataFrame(rows)[cols].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
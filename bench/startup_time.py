@@ -0,0 +1,116 @@
+"""
+runall.py 단계별 시작 시간 측정 (python -X importtime)
+
+    python -m bench.startup_time                   # 전체 단계, 기본 예산
+    python -m bench.startup_time --steps upload --budget upload=600 --repeat 5
+
+- 단계마다 새 프로세스에서 `import runall; runall.load_stage(step)` 만 실행 (단계 함수는 호출하지 않음)
+- -X importtime 출력의 self 시간 합 = 해당 단계 진입까지의 import 비용
+  (빈 인터프리터 `python -c pass` 가 import 하는 모듈(site / encodings 등)은 환경 비용이므로 제외)
+- 반복 측정 중 최솟값 사용 (디스크 캐시 / 스케줄링 잡음 제거)
+- 예산 초과 또는 import 실패 시 종료 코드 1 → CI 단계에서 그대로 사용
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# ✅ 단계별 import 예산 (ms)
+# - runall: 단계 없이 runall 만 import (cfg / tracing / dag) → 무거운 의존성 없어야 함
+DEFAULT_BUDGET_MS = {
+    "runall": 150,
+    "extract": 1200,
+    "strategy": 1500,
+    "classify": 1500,
+    "explain": 1500,
+    "commit_msg": 1500,
+    "upload": 900,
+}
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _import_times(code: str) -> tuple[list[tuple[str, int, int, int]], str | None]:
+    # (모듈, self us, cumulative us, 들여쓰기) 목록 + 실패 시 마지막 오류 줄
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3))))
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["?"])[-1]
+    return rows, error
+
+
+def measure_baseline() -> tuple[set[str], float]:
+    # 빈 인터프리터 시작 시 import 되는 모듈 집합 + 그 self 시간 합(ms)
+    rows, _ = _import_times("pass")
+    return {name for name, *_ in rows}, round(sum(us for _, us, _, _ in rows) / 1000, 1)
+
+
+def measure(step: str, startup: set[str] = frozenset()) -> dict:
+    code = "import runall" if step == "runall" else f"import runall; runall.load_stage({step!r})"
+    rows, error = _import_times(code)
+    self_us, top = 0, []
+    for name, us, cumulative, indent in rows:
+        if name in startup:
+            continue
+        self_us += us
+        if indent == 1:  # 최상위 import (들여쓰기 없음)
+            top.append((name, cumulative))
+    top.sort(key=lambda t: t[1], reverse=True)
+    return {"step": step, "ms": round(self_us / 1000, 1), "error": error,
+            "top": [(name, round(us / 1000, 1)) for name, us in top[:5]]}
+
+
+def run(steps: list[str], budgets: dict[str, float], repeat: int) -> tuple[list[dict], float]:
+    startup, baseline_ms = set(), None
+    for _ in range(max(1, repeat)):
+        names, ms = measure_baseline()
+        startup |= names
+        baseline_ms = ms if baseline_ms is None else min(baseline_ms, ms)
+    rows = []
+    for step in steps:
+        samples = [measure(step, startup) for _ in range(max(1, repeat))]
+        best = min(samples, key=lambda r: r["ms"])
+        budget = budgets.get(step)
+        best["budget_ms"] = budget
+        best["baseline_ms"] = baseline_ms
+        best["ok"] = best["error"] is None and (budget is None or best["ms"] <= budget)
+        rows.append(best)
+    return rows, baseline_ms
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="runall.py 단계별 import 시간 예산 검사")
+    parser.add_argument("--steps", nargs="+", default=list(DEFAULT_BUDGET_MS))
+    parser.add_argument("--budget", nargs="*", default=[], metavar="STEP=MS", help="단계별 예산 덮어쓰기")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON 으로 출력")
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGET_MS)
+    for item in args.budget:
+        step, ms = item.split("=", 1)
+        budgets[step] = float(ms)
+    rows, baseline_ms = run(args.steps, budgets, args.repeat)
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print(f"ℹ️ 빈 인터프리터 import {baseline_ms}ms 제외")
+        for r in rows:
+            mark = "✅" if r["ok"] else "❌"
+            top = ", ".join(f"{name} {ms}ms" for name, ms in r["top"])
+            print(f"{mark} {r['step']:<11} {r['ms']:>8}ms / 예산 {r['budget_ms']}ms  ({r['error'] or top})")
+    return 0 if all(r["ok"] for r in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
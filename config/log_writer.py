@@ -0,0 +1,118 @@
+import atexit
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+_STOP = object()
+
+
+class LogWriter:
+    """
+    로그 파일 1개당 writer 1개 (열린 handle 하나를 실행 내내 유지)
+    - emit: 레코드를 queue 에 넣기만 함 (호출 스레드는 파일 I/O 없음)
+    - 백그라운드 스레드가 모아서 write, flush 는 N건 / T초 단위
+    - queue 는 FIFO → 여러 워커 스레드가 동시에 기록해도 emit 순서 유지
+    - 레코드는 JSON lines: {"ts", "msg", stage, tag, duration, token_in, token_out ...}
+    """
+
+    def __init__(self, path: Path, flush_every: int = 256, flush_interval: float = 0.2):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = path.open("a", encoding="utf-8", buffering=1 << 16)
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{path.name}", daemon=True)
+        self._thread.start()
+
+    def emit(self, message: str, **fields):
+        self._queue.put({"ts": datetime.now().isoformat(timespec="milliseconds"), "msg": message, **fields})
+
+    def _run(self):
+        pending = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            batch = [] if item is None else [item]
+            while item is not None and len(batch) < self.flush_every:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            stop = False
+            waiters = []
+            lines = []
+            for rec in batch:
+                if rec is _STOP:
+                    stop = True
+                elif isinstance(rec, threading.Event):
+                    waiters.append(rec)
+                else:
+                    lines.append(json.dumps(rec, ensure_ascii=False, default=str))
+            if lines:
+                self._fh.write("\n".join(lines) + "\n")
+                pending += len(lines)
+
+            now = time.monotonic()
+            if pending and (waiters or stop or pending >= self.flush_every or now - last_flush >= self.flush_interval):
+                self._fh.flush()
+                pending = 0
+                last_flush = now
+            for event in waiters:
+                event.set()
+            if stop:
+                self._fh.close()
+                return
+
+    def flush(self, timeout: float = 5.0):
+        # 지금까지 emit 된 레코드가 파일에 기록될 때까지 대기
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+_writers: dict[Path, LogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path: Path) -> LogWriter:
+    writer = _writers.get(path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(path)
+            if writer is None:
+                writer = _writers[path] = LogWriter(path)
+    return writer
+
+
+def release(path: Path):
+    # 더 이상 기록하지 않는 로그 파일 writer 종료 (daemon 모드: 실행별 로그 파일)
+    with _writers_lock:
+        writer = _writers.pop(path, None)
+    if writer is not None:
+        writer.close()
+
+
+@atexit.register
+def close_all():
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
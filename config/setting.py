@@ -1,9 +1,9 @@
 from pathlib import Path
 from datetime import datetime, timedelta
-import pytz
-import yaml
-import requests
-from bs4 import BeautifulSoup
+
+from config.log_writer import get_writer
+
+# ✅ yaml / pytz / requests / bs4 는 실제로 쓰는 함수 안에서 import (cfg 정의만으로 로딩하지 않음)
 
 class cfg:
     # 📁 기본 경로
@@ -21,6 +21,7 @@ class cfg:
     @staticmethod
     def get_user_config() -> dict:
         if cfg._user_config_cache is None:
+            import yaml
             with cfg.USER_CONFIG_PATH.open(encoding="utf-8") as f:
                 cfg._user_config_cache = yaml.safe_load(f)
         return cfg._user_config_cache
@@ -50,65 +51,180 @@ class cfg:
         }
         user_conf = cfg.get_user_config()
         user_llm = user_conf["llm"][stage]
+        provider = user_llm["provider"][0]
         return {
             **LLM_PARAM[stage],
             "provider": user_llm["provider"],
-            "model": user_llm["model"]
+            "model": user_llm["model"],
+            "stream": user_llm.get("stream", False),
+            "mode": user_llm.get("mode", "sync"),
+            # 동시 호출 수 / 순차 호출 간격(초)
+            "max_workers": user_llm.get("max_workers", 5 if provider == "fireworks" else 1),
+            "interval": user_llm.get("interval", 0.0 if provider == "mock" else 2.0)
         }
 
+    # 💵 모델별 1K 토큰 단가(USD) / 모델 → provider
+    LLM_RATE_MAP = {
+        "gpt-4o": {"input": 0.0025, "output": 0.01},
+        "llama4-maverick-instruct-basic": {"input": 0.00022, "output": 0.00088},
+        "llama4-scout-instruct-basic": {"input": 0.00015, "output": 0.0006},
+        "mock": {"input": 0.0, "output": 0.0},
+    }
+    LLM_PROVIDER_MAP = {
+        "gpt-4o": "openai",
+        "llama4-maverick-instruct-basic": "fireworks",
+        "llama4-scout-instruct-basic": "fireworks",
+        "mock": "mock",
+    }
+
+    # prefix cache 적중 입력 토큰 요금 비율 (OpenAI / Fireworks 50%)
+    CACHED_INPUT_RATIO = 0.5
+
     @staticmethod
     def calc_cost(llm_name: str, tokens: int, direction: str) -> float:
-        rate_map = {
-            "gpt-4o": {"input": 0.0025, "output": 0.01},
-            "llama4-maverick-instruct-basic": {"input": 0.00022, "output": 0.00088},
-            "llama4-scout-instruct-basic": {"input": 0.00015, "output": 0.0006},
-        }
-        if llm_name not in rate_map:
+        if llm_name not in cfg.LLM_RATE_MAP:
             return 0.0
-        rate = rate_map[llm_name][direction]
+        rate = cfg.LLM_RATE_MAP[llm_name][direction]
         return round(tokens * rate / 1000, 6)
 
+    # ✅ 프롬프트 압축 설정 (스테이지별 target_tokens)
+    @staticmethod
+    def get_compress_config(stage: str) -> dict:
+        conf = cfg.get_user_config().get("compress", {}) or {}
+        target = conf.get("target_tokens", {})
+        return {
+            "enabled": conf.get("enabled", False),
+            "context_lines": conf.get("context_lines", 2),
+            "target_tokens": target.get(stage) if isinstance(target, dict) else target,
+        }
+
+    # ✅ 여러 파일 묶음 요청 설정
+    @staticmethod
+    def get_pack_config() -> dict:
+        conf = cfg.get_user_config().get("pack", {}) or {}
+        return {
+            "enabled": conf.get("enabled", False),
+            "stages": conf.get("stages") or [],
+            "max_tokens": conf.get("max_tokens", 6000),
+            "small_tokens": conf.get("small_tokens", 800),
+            "retries": conf.get("retries", 1),
+        }
+
+    # ✅ LLM 호출 재시도 설정 (stage_budget: 스테이지 전체 재시도 허용 횟수)
+    @staticmethod
+    def get_retry_config(stage: str) -> dict:
+        conf = cfg.get_user_config().get("retry", {}) or {}
+        budget = conf.get("stage_budget")
+        return {
+            "max_attempts": conf.get("max_attempts", 4),
+            "base_delay": conf.get("base_delay", 1.0),
+            "max_delay": conf.get("max_delay", 30.0),
+            "stage_budget": budget.get(stage) if isinstance(budget, dict) else budget,
+        }
+
+    # ✅ 프롬프트/응답 기록 방식 (segment: 실행별 압축 세그먼트 / txt: 호출마다 파일)
+    @staticmethod
+    def get_io_record_config() -> dict:
+        conf = cfg.get_user_config().get("io_record", {}) or {}
+        return {"mode": conf.get("mode", "txt")}
+
+    # ✅ 파일 단위 DAG 실행 설정 (단계별 worker 수 / 단계 사이 queue 크기)
+    @staticmethod
+    def get_pipeline_config() -> dict:
+        conf = cfg.get_user_config().get("pipeline", {}) or {}
+        return {
+            "workers": conf.get("workers", {}) or {},
+            "queue_size": conf.get("queue_size", 8),
+        }
+
+    # ✅ 알림 발송 설정 (플랫폼별 timeout, 종료 전 대기 시간)
+    @staticmethod
+    def get_notify_config() -> dict:
+        conf = cfg.get_user_config().get("notify", {}) or {}
+        return {
+            "platform": conf.get("platform", []),
+            "async": conf.get("async", True),
+            "timeout": conf.get("timeout", {}) or {},
+            "default_timeout": conf.get("default_timeout", 5.0),
+            "drain_timeout": conf.get("drain_timeout", 30.0),
+        }
+
+    # ✅ 업로드 커밋 설정 (로컬 일괄 커밋 + push 1회)
+    @staticmethod
+    def get_commit_config() -> dict:
+        conf = cfg.get_user_config().get("commit", {}) or {}
+        return {
+            "group_by": conf.get("group_by"),
+            "push": conf.get("push", True),
+            "push_retries": conf.get("push_retries", 3),
+            "push_backoff": conf.get("push_backoff", 2.0),
+        }
+
+    # ✅ 배치 API 설정 (llm.<stage>.mode: "batch" 인 스테이지에 적용)
+    BATCH_DISCOUNT = 0.5
+
+    @staticmethod
+    def get_batch_config() -> dict:
+        conf = cfg.get_user_config().get("batch", {}) or {}
+        return {
+            "transport": conf.get("transport", "openai"),
+            "local_dir": conf.get("local_dir"),
+            "completion_window": conf.get("completion_window", "24h"),
+            "poll_interval": conf.get("poll_interval", 60),
+            "timeout": conf.get("timeout", 24 * 3600),
+        }
+
+    # ✅ 토큰/비용 예산 설정 (없으면 빈 dict → 무제한)
+    @staticmethod
+    def get_budget_config() -> dict:
+        return cfg.get_user_config().get("budget", {}) or {}
+
     # ✅ 타임존 기반 현재 시간
     @staticmethod
     def get_now(source: str = "commit") -> datetime:
         user_conf = cfg.get_user_config()
         tz_str = user_conf.get("timezone", {}).get(source, "UTC")
+        import pytz
         tz = pytz.timezone(tz_str)
         return datetime.now(tz)
 
     # ✅ 결과 경로 구조
     @staticmethod
-    def get_results_path(timestamp: str, base_dir: Path = RESULTS_DIR) -> dict:
-        base = base_dir / timestamp
+    def get_results_path(timestamp: str, base_dir: Path | None = None) -> dict:
+        base = (base_dir or cfg.RESULTS_DIR) / timestamp
         return {
             "repo": base / "df/repo_df.pkl",
             "info": base / "df/info_df.pkl",
             "strategy": base / "df/strategy_df.pkl",
             "prompt": base / "df/prompt_df.pkl",
-            "in": base / "df/in_df.pkl",
-            "out": base / "df/out_df.pkl",
+            "in": base / "df/in_df.parquet",
+            "out": base / "df/out_df.parquet",
             "strategy_in": base / "strategy",
             "strategy_out": base / "strategy",
             "explain_in": base / "explain/in",
             "explain_out": base / "explain/out",
             "mk_msg_in": base / "mk_msg/in",
             "mk_msg_out": base / "mk_msg/out",
+            "plan": base / "plan",
+            "journal": base / "journal",
+            "batch": base / "batch",
+            "records": base / "records",
+            "trace": base / "trace.json",
             "diff": base / "diff"
         }
 
     # ✅ 로그 기록 + stdout 출력 옵션 추가
+    # - 파일 쓰기는 실행별 LogWriter 백그라운드 스레드가 담당 (JSON lines)
+    # - fields: stage / tag / duration / token_in / token_out 등 구조화 필드
     @staticmethod
-    def log(message: str, log_file: Path, echo: bool = False):
-        time_str = datetime.now().strftime("%H:%M:%S")
-        formatted = f"[{time_str}] {message}"
+    def log(message: str, log_file: Path, echo: bool = False, **fields):
         if echo:
-            print(formatted)
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(formatted + "\n")
+            print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+        get_writer(log_file).emit(message, **fields)
 
     @staticmethod
-    def init_log_file(timestamp: str, base_log_dir: Path = LOGS_DIR) -> Path:
-        log_dir = base_log_dir / timestamp
+    def init_log_file(timestamp: str, base_log_dir: Path | None = None) -> Path:
+        log_dir = (base_log_dir or cfg.LOGS_DIR) / timestamp
         log_dir.mkdir(parents=True, exist_ok=True)
         return log_dir / "for_debug.log"
 
@@ -126,6 +242,8 @@ class cfg:
                         log_func(f"💱 환율 캐시 사용: {rate}원")
                         return rate
             log_func("🌐 환율 정보 새로 요청 중...")
+            import requests
+            from bs4 import BeautifulSoup
             html = requests.get("https://finance.naver.com/marketindex/", timeout=5).text
             soup = BeautifulSoup(html, "html.parser")
             value_el = soup.select_one("div.head_info > span.value")
@@ -146,6 +264,30 @@ class cfg:
     TIMESTAMP = _timestamp_fixed.strftime(TIMESTAMP_FORMAT)
     get_timestamp = staticmethod(lambda: cfg.TIMESTAMP)
 
+    # 🔁 이전 실행 이어받기: 타임스탬프 고정값 교체
+    @staticmethod
+    def set_timestamp(timestamp: str):
+        cfg.TIMESTAMP = timestamp
+
+    # 실행 디렉터리 이름 형식 (daemon 실행은 초 단위까지 포함) → bench_* 등 다른 디렉터리는 이어받기 대상 제외
+    RUN_TIMESTAMP_FORMATS = (TIMESTAMP_FORMAT, TIMESTAMP_FORMAT + "%S")
+
+    @staticmethod
+    def parse_run_timestamp(name: str) -> datetime | None:
+        for fmt in cfg.RUN_TIMESTAMP_FORMATS:
+            try:
+                return datetime.strptime(name, fmt)
+            except ValueError:
+                continue
+        return None
+
+    @staticmethod
+    def latest_timestamp(base_dir: Path | None = None) -> str | None:
+        base_dir = base_dir or cfg.RESULTS_DIR
+        runs = [(cfg.parse_run_timestamp(p.name), p.name) for p in base_dir.glob("*") if p.is_dir()]
+        runs = sorted(r for r in runs if r[0] is not None)
+        return runs[-1][1] if runs else None
+
     # 📁 파일 구조 정리
     @staticmethod
     def build_llm_file_structure(base_path: Path, valid_ext={".py", ".sh", ".js", ".ts", ".html", ".css"}) -> tuple[list[str], list[str]]:
@@ -0,0 +1,114 @@
+"""
+실행 단위 span 추적 (Chrome trace-event JSON 내보내기)
+- with span("llm.call", cat="llm", tag=...):  /  @traced("scoping.git_tool_filter")
+- 중첩 span 은 같은 스레드 안에서 시간 구간으로 자동 중첩 표시
+- counter("tokens", input=..., output=...) → 누적값을 카운터 트랙으로 기록
+- export(path) → chrome://tracing 또는 https://ui.perfetto.dev 에서 열기
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = os.getenv("TRACE", "1") != "0"
+        self.pid = os.getpid()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._events: list[dict] = []
+        self._threads: dict[int, str] = {}
+        self.counters: dict[str, dict[str, float]] = {}
+
+    def reset(self):
+        # 새 실행 시작 (daemon 모드: 실행마다 trace 분리)
+        with self._lock:
+            self._t0 = time.perf_counter()
+            self._events.clear()
+            self.counters.clear()
+
+    def _now_us(self) -> float:
+        return round((time.perf_counter() - self._t0) * 1e6, 1)
+
+    def _add(self, event: dict):
+        tid = threading.get_ident()
+        event.update(pid=self.pid, tid=tid)
+        with self._lock:
+            if tid not in self._threads:
+                self._threads[tid] = threading.current_thread().name
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "run", **args):
+        if not self.enabled:
+            yield args
+            return
+        start = self._now_us()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._add({"name": name, "cat": cat, "ph": "X", "ts": start,
+                       "dur": round(self._now_us() - start, 1), "args": args})
+
+    def counter(self, name: str, **values: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            totals = self.counters.setdefault(name, {})
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0) + value
+            snapshot = dict(totals)
+        self._add({"name": name, "ph": "C", "ts": self._now_us(), "args": snapshot})
+
+    def export(self, path: Path) -> Path | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        meta = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                for tid, name in threads.items()]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps({"traceEvents": meta + events, "displayTimeUnit": "ms",
+                                   "otherData": {"counters": self.counters}}, ensure_ascii=False, default=str),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def summary(self, top: int = 10) -> list[tuple[str, int, float]]:
+        # 이름별 (호출 수, 총 소요 초) 상위 목록
+        totals: dict[str, list] = {}
+        with self._lock:
+            for e in self._events:
+                if e["ph"] == "X":
+                    entry = totals.setdefault(e["name"], [0, 0.0])
+                    entry[0] += 1
+                    entry[1] += e["dur"] / 1e6
+        rows = [(name, n, round(sec, 3)) for name, (n, sec) in totals.items()]
+        return sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+
+
+tracer = Tracer()
+span = tracer.span
+counter = tracer.counter
+
+
+def traced(name: str | None = None, cat: str = "run"):
+    # ✅ 함수 전체를 span 으로 감싸는 데코레이터
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,348 @@
+"""
+감시(watch) 모드 데몬 — 실행 사이 캐시를 메모리에 유지
+
+    python daemon.py serve              # 데몬 시작 (작업 트리 감시 + 로컬 소켓 대기)
+    python daemon.py run [--all] [--wait] [파일 ...]
+    python daemon.py status
+    python daemon.py stop
+
+- 무거운 import(pandas, libcst, tiktoken, openai ...)는 데몬 시작 시 한 번만
+- 작업 트리를 주기적으로 검사 → 마지막 변경 후 debounce 초 동안 잠잠하면 실행
+- 실행 대상: 그 사이 바뀐 파일 + import 그래프상 직접 의존 파일 (run_dag only=...)
+- 시그니처 캐시 / import 그래프 / git 이력 인덱스 / tokenizer 는 실행 사이 유지
+- client 는 cfg 등 무거운 모듈을 import 하지 않음 → 바로 소켓 연결
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+USER_CONFIG_PATH = Path("config/user_config.yml")
+DEFAULTS = {
+    "socket": ".4cowork.sock",
+    "poll_interval": 1.0,
+    "debounce": 5.0,
+    "mode": "dag",
+    "run_on_start": False,
+}
+IGNORED_DIRS = {
+    ".git", "__pycache__", "venv", ".mypy_cache", ".pytest_cache",
+    "build", "dist", ".ipynb_checkpoints", "results", "logs",
+}
+
+
+def load_conf() -> dict:
+    # client 도 사용 → cfg 대신 yml 직접 로딩
+    try:
+        with USER_CONFIG_PATH.open(encoding="utf-8") as f:
+            user_cfg = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        user_cfg = {}
+    return {**DEFAULTS, **(user_cfg.get("daemon") or {})}
+
+
+# ─────────────────────────────────────
+# 🔹 작업 트리 감시 (polling: 추가 의존성 없이 플랫폼 공통)
+# ─────────────────────────────────────
+class TreeWatcher:
+    def __init__(self, root: Path, exts: list[str]):
+        self.root = root
+        self.exts = tuple(exts)
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        stamps = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not d.startswith(".")]
+            for name in filenames:
+                if not name.endswith(self.exts) or name.startswith("."):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                stamps[Path(os.path.relpath(path, self.root)).as_posix()] = (st.st_mtime_ns, st.st_size)
+        return stamps
+
+    def poll(self) -> set[str]:
+        # 직전 검사 이후 추가/수정/삭제된 파일
+        current = self.scan()
+        changed = {p for p, stamp in current.items() if self.snapshot.get(p) != stamp}
+        changed |= self.snapshot.keys() - current.keys()
+        self.snapshot = current
+        return changed
+
+
+# ─────────────────────────────────────
+# 🔹 실행 사이 유지되는 캐시
+# ─────────────────────────────────────
+class WarmState:
+    """
+    - 시그니처: scoping.group_by_structure._SIGNATURE_CACHE (mtime/size 기준 재사용)
+    - git 이력: scoping.first_scope._HISTORY_CACHE (파일별, 이후 커밋이 건드리지 않으면 재사용)
+    - import 그래프: 시그니처의 imports → 레포 내부 파일 간 의존 관계
+    - tokenizer: 설정된 모든 모델의 인코더 미리 생성
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.graph: dict[str, set[str]] = {}       # 파일 → import 하는 레포 파일
+        self.dependents: dict[str, set[str]] = {}  # 파일 → 해당 파일을 import 하는 파일
+
+    def warm(self, cfg):
+        from llm.token_counter import get_encoder
+
+        for stage in cfg.get_user_config().get("llm", {}):
+            for model in cfg.get_llm_config(stage)["model"]:
+                get_encoder(model)
+        self.refresh_graph()
+
+    def refresh_graph(self):
+        from scoping.first_scope import get_all_py_files_in_repo
+        from scoping.group_by_structure import StructuralGrouperV2
+
+        files = [Path(f) for f in get_all_py_files_in_repo()]  # cfg.BASE_DIR(= 실행 위치) 기준 상대 경로
+        modules = {f.with_suffix("").as_posix().replace("/", "."): f.as_posix() for f in files}
+        grouper = StructuralGrouperV2(files)
+        graph: dict[str, set[str]] = {}
+        for f in files:
+            sig = grouper.extract_signature(f)
+            names = [*sig.get("modules", ()), *sig.get("submodules", ())]
+            graph[f.as_posix()] = {modules[name] for name in names if name in modules} - {f.as_posix()}
+        dependents: dict[str, set[str]] = {}
+        for src, deps in graph.items():
+            for dep in deps:
+                dependents.setdefault(dep, set()).add(src)
+        self.graph, self.dependents = graph, dependents
+
+    def affected(self, changed: set[str]) -> set[str]:
+        # 변경 파일 + 직접 의존 파일
+        out = set(changed)
+        for f in changed:
+            out |= self.dependents.get(f, set())
+        return out
+
+    def stats(self) -> dict:
+        from scoping.first_scope import _HISTORY_CACHE
+        from scoping.group_by_structure import _SIGNATURE_CACHE
+
+        return {"signatures": len(_SIGNATURE_CACHE), "history": len(_HISTORY_CACHE),
+                "graph_files": len(self.graph), "graph_edges": sum(len(v) for v in self.graph.values())}
+
+
+# ─────────────────────────────────────
+# 🔹 데몬 본체
+# ─────────────────────────────────────
+class Daemon:
+    def __init__(self, conf: dict):
+        from config.setting import cfg
+
+        self.cfg = cfg
+        self.conf = conf
+        self.root = cfg.BASE_DIR
+        self.socket_path = self.root / conf["socket"]
+        self.log_file = cfg.init_log_file("daemon")
+        self.state = WarmState(self.root)
+        self.watcher = TreeWatcher(self.root, cfg.get_allowed_extensions(self._log) or [".py"])
+        self._requests: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._config_mtime = self._stat_config()
+        self.running: dict | None = None
+        self.last_run: dict | None = None
+        self.runs = 0
+        self.pending: set[str] = set()
+
+    def _log(self, message: str, **fields):
+        self.cfg.log(message, self.log_file, echo=True, **fields)
+
+    def _stat_config(self) -> float:
+        path = self.cfg.USER_CONFIG_PATH
+        return path.stat().st_mtime if path.exists() else 0.0
+
+    def serve(self):
+        t0 = time.perf_counter()
+        import runall
+        # 단계 모듈(pandas / openai / libcst 등)은 runall 에서 지연 로딩 → 데몬은 시작 시 한 번에 로딩
+        for name in runall.STAGES:
+            try:
+                runall.load_stage(name)
+            except ImportError as e:
+                self._log(f"⚠️ 단계 모듈 로딩 실패: {name} ({e})")
+        self.state.warm(self.cfg)
+        self._log(f"🔥 캐시 준비 완료 ({round(time.perf_counter() - t0, 2)}s): {self.state.stats()}")
+
+        server = self._start_server()
+        if self.conf["run_on_start"]:
+            self._requests.put(({"cmd": "run"}, None))
+        last_change = None
+        try:
+            while not self._stop.is_set():
+                try:
+                    request, future = self._requests.get(timeout=self.conf["poll_interval"])
+                except queue.Empty:
+                    request, future = None, None
+                changed = self.watcher.poll()
+                if changed:
+                    self.pending |= changed
+                    last_change = time.monotonic()
+                if request is not None:
+                    # 지정 파일 + 아직 실행 안 된 변경 파일 (pending 을 버리지 않음)
+                    files = set(request.get("files") or ()) | self.pending
+                    self.pending = set()
+                    self._execute(files, request.get("mode") or self.conf["mode"], future)
+                elif self.pending and time.monotonic() - last_change >= self.conf["debounce"]:
+                    files, self.pending = set(self.pending), set()
+                    self._execute(files, self.conf["mode"], None)
+        finally:
+            server.shutdown()
+            server.server_close()
+            self.socket_path.unlink(missing_ok=True)
+            self._log("👋 데몬 종료")
+
+    def _execute(self, files: set[str], mode: str, future: Future | None):
+        try:
+            summary = self.run_once(files, mode)
+        except Exception as e:
+            summary = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self._log(f"❌ 실행 실패: {e}")
+        if future is not None:
+            future.set_result(summary)
+
+    def run_once(self, files: set[str], mode: str) -> dict:
+        from config.tracing import tracer
+        from config.log_writer import release
+        from pipeline.artifacts import release_store
+        from llm.llm_manager import release_stage_state
+        from runall import RunAllPipeline
+
+        # 설정 파일이 바뀌었으면 다시 로딩
+        mtime = self._stat_config()
+        if mtime != self._config_mtime:
+            self.cfg._user_config_cache = None
+            self._config_mtime = mtime
+        if any(f.endswith(".py") for f in files):
+            self.state.refresh_graph()
+
+        timestamp = datetime.now().strftime("%y%m%d_%H%M%S")
+        self.cfg.set_timestamp(timestamp)
+        tracer.reset()
+        targets = self.state.affected(files) if files else None
+        self.running = {"timestamp": timestamp, "mode": mode, "files": sorted(targets or [])}
+        self._log(f"▶️ 실행 시작 {timestamp} ({mode}, 변경 {len(files)}개 → 대상 {len(targets or [])}개)")
+        t0 = time.perf_counter()
+        runner = RunAllPipeline()
+        try:
+            if mode == "all":
+                runner.run_all()
+            else:
+                runner.run_dag(only=targets)
+        finally:
+            runner.export_trace()
+            release_store(timestamp)
+            release_stage_state(timestamp)
+            release(runner.log_file)
+            self.running = None
+        self.runs += 1
+        self.last_run = {"ok": True, "timestamp": timestamp, "mode": mode, "changed": sorted(files),
+                         "targets": sorted(targets or []), "duration": round(time.perf_counter() - t0, 2)}
+        self._log(f"✅ 실행 완료 {timestamp} ({self.last_run['duration']}s)")
+        return self.last_run
+
+    # ─────────────────────────────────────
+    # 🔹 로컬 소켓: 요청 1줄(JSON) → 응답 1줄(JSON)
+    # ─────────────────────────────────────
+    def handle(self, request: dict) -> dict:
+        cmd = request.get("cmd")
+        if cmd == "status":
+            return {"ok": True, "running": self.running, "last_run": self.last_run, "runs": self.runs,
+                    "pending": sorted(self.pending), "queued": self._requests.qsize(), "cache": self.state.stats()}
+        if cmd == "stop":
+            self._stop.set()
+            return {"ok": True}
+        if cmd == "run":
+            future = Future()
+            self._requests.put((request, future))
+            if request.get("wait"):
+                return future.result()
+            return {"ok": True, "queued": self._requests.qsize()}
+        return {"ok": False, "error": f"알 수 없는 명령: {cmd}"}
+
+    def _start_server(self) -> socketserver.BaseServer:
+        if self.socket_path.exists():
+            if _connect(self.socket_path) is not None:
+                raise RuntimeError(f"이미 실행 중인 데몬 있음: {self.socket_path}")
+            self.socket_path.unlink()  # 비정상 종료로 남은 소켓 파일
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                try:
+                    response = daemon.handle(json.loads(line or b"{}"))
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+
+        server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="daemon-socket", daemon=True).start()
+        self._log(f"👂 대기 중: {self.socket_path} (debounce {self.conf['debounce']}s)")
+        return server
+
+
+# ─────────────────────────────────────
+# 🔹 client
+# ─────────────────────────────────────
+def _connect(path: Path) -> socket.socket | None:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        return sock
+    except OSError:
+        sock.close()
+        return None
+
+
+def send(request: dict, conf: dict | None = None) -> dict:
+    conf = conf or load_conf()
+    sock = _connect(Path(conf["socket"]))
+    if sock is None:
+        return {"ok": False, "error": f"데몬 연결 실패: {conf['socket']} (python daemon.py serve 먼저 실행)"}
+    with sock, sock.makefile("rwb") as f:
+        f.write((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        f.flush()
+        return json.loads(f.readline() or b"{}")
+
+
+def main(args: list[str]) -> int:
+    conf = load_conf()
+    cmd = args[0] if args else "status"
+    if cmd == "serve":
+        Daemon(conf).serve()
+        return 0
+    if cmd == "run":
+        rest = [a for a in args[1:] if not a.startswith("--")]
+        request = {"cmd": "run", "files": [Path(f).as_posix() for f in rest],
+                   "mode": "all" if "--all" in args else None, "wait": "--wait" in args}
+    elif cmd in ("status", "stop"):
+        request = {"cmd": cmd}
+    else:
+        print(f"❌ 지원되지 않는 명령: {cmd} (serve | run | status | stop)")
+        return 2
+    response = send(request, conf)
+    print(json.dumps(response, ensure_ascii=False, indent=2))
+    return 0 if response.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,201 @@
+import json
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from prompt.layout import split_prefix
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+# ─────────────────────────────────────
+# 🔹 transport: 배치 파일 제출 / 상태 조회 / 결과 수신
+# ─────────────────────────────────────
+class BatchTransport(ABC):
+    @abstractmethod
+    def submit(self, input_path: Path) -> str:
+        ...
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        ...
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Iterator[dict]:
+        ...
+
+
+class OpenAIBatchTransport(BatchTransport):
+    # OpenAI Batch API (files + batches), completion_window 24h
+    def __init__(self, api_key: str | None = None, completion_window: str = "24h"):
+        import os
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"), max_retries=3)
+        self.completion_window = completion_window
+
+    def submit(self, input_path: Path) -> str:
+        with input_path.open("rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT, completion_window=self.completion_window
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+class LocalFileTransport(BatchTransport):
+    """
+    로컬 디렉토리 기반 배치 대역 (테스트/오프라인용)
+    - submit: <root>/<batch_id>/input.jsonl 로 복사
+    - responder 가 있으면 즉시 output.jsonl 생성, 없으면 외부에서 output.jsonl 을 채울 때까지 대기
+    """
+
+    def __init__(self, root: Path, responder: Optional[Callable[[dict], str]] = None):
+        self.root = Path(root)
+        self.responder = responder
+
+    def submit(self, input_path: Path) -> str:
+        batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        batch_dir = self.root / batch_id
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        lines = input_path.read_text(encoding="utf-8").splitlines()
+        (batch_dir / "input.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        if self.responder is not None:
+            out = []
+            for line in lines:
+                req = json.loads(line)
+                out.append(json.dumps(make_output_line(req["custom_id"], self.responder(req)), ensure_ascii=False))
+            (batch_dir / "output.jsonl").write_text("\n".join(out) + "\n", encoding="utf-8")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        batch_dir = self.root / batch_id
+        if (batch_dir / "output.jsonl").exists():
+            return "completed"
+        return "in_progress" if batch_dir.exists() else "failed"
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        path = self.root / batch_id / "output.jsonl"
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                yield json.loads(line)
+
+
+# ─────────────────────────────────────
+# 🔹 배치 파일 작성 / 결과 파싱 (OpenAI batch 형식)
+# ─────────────────────────────────────
+def provider_model_id(provider: str, model: str) -> str:
+    if provider == "fireworks" and not model.startswith("accounts/"):
+        return f"accounts/fireworks/models/{model}"
+    return model
+
+
+def build_batch_line(tag: str, prompt: str, llm_cfg: dict) -> dict:
+    system_msg, body = split_prefix(prompt)
+    messages = [{"role": "system", "content": system_msg}] if system_msg else []
+    messages.append({"role": "user", "content": body})
+    return {
+        "custom_id": tag,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": provider_model_id(llm_cfg["provider"][0], llm_cfg["model"][0]),
+            "messages": messages,
+            "temperature": llm_cfg.get("temperature", 0.7),
+            "top_p": llm_cfg.get("top_p", 0.9),
+            "max_tokens": llm_cfg.get("max_tokens", 1024),
+        },
+    }
+
+
+def write_batch_file(path: Path, lines: list[dict]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+def make_output_line(custom_id: str, text: str, usage: dict | None = None) -> dict:
+    return {
+        "id": f"resp_{custom_id}",
+        "custom_id": custom_id,
+        "response": {
+            "status_code": 200,
+            "body": {
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}}],
+                "usage": usage or {},
+            },
+        },
+        "error": None,
+    }
+
+
+def parse_output_line(line: dict) -> tuple[str, str | None, str | None, dict]:
+    """
+    배치 결과 한 줄 → (custom_id, 응답 텍스트, 오류 메시지, usage)
+    """
+    custom_id = line.get("custom_id", "")
+    if line.get("error"):
+        err = line["error"]
+        return custom_id, None, err.get("message", str(err)) if isinstance(err, dict) else str(err), {}
+    response = line.get("response") or {}
+    if response.get("status_code", 200) >= 400:
+        return custom_id, None, f"HTTP {response.get('status_code')}", {}
+    body = response.get("body") or {}
+    try:
+        text = body["choices"][0]["message"]["content"].strip()
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return custom_id, None, "응답 형식 오류", {}
+    return custom_id, text, None, body.get("usage") or {}
+
+
+# provider → Batch API transport (fireworks 등 OpenAI 형식 Batch API 가 없는 provider 는 미등록)
+PROVIDER_TRANSPORTS: dict[str, type[BatchTransport]] = {
+    "openai": OpenAIBatchTransport,
+}
+
+
+def supports_batch(provider: str, batch_cfg: dict) -> bool:
+    return batch_cfg.get("transport") == "local" or provider in PROVIDER_TRANSPORTS
+
+
+def make_transport(provider: str, batch_cfg: dict, default_dir: Path) -> BatchTransport | None:
+    """
+    provider 별 batch transport
+    - transport: "local" 이면 provider 와 무관하게 로컬 디렉토리 대역
+    - 지원하지 않는 provider → None (호출 측에서 동기 호출로 대체)
+    """
+    if not supports_batch(provider, batch_cfg):
+        return None
+    if batch_cfg.get("transport") == "local":
+        return LocalFileTransport(Path(batch_cfg.get("local_dir") or default_dir / "local"))
+    return PROVIDER_TRANSPORTS[provider](completion_window=batch_cfg.get("completion_window", "24h"))
+
+
+def wait_for(transport: BatchTransport, batch_id: str, poll_interval: float, timeout: float,
+             log: Optional[Callable] = None, sleep: Callable[[float], None] = time.sleep) -> str:
+    deadline = time.monotonic() + timeout
+    while True:
+        status = transport.status(batch_id)
+        if status in FINAL_STATES:
+            return status
+        if time.monotonic() >= deadline:
+            return "timeout"
+        if log:
+            log(f"⏳ batch {batch_id} 상태: {status} → {poll_interval}s 후 재확인")
+        sleep(poll_interval)
@@ -0,0 +1,222 @@
+import json
+import math
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+
+from config.setting import cfg
+from llm.batch_mode import supports_batch
+from llm.token_counter import count_tokens_batch
+
+KEEP, DOWNGRADE, DROP = "keep", "downgrade", "drop"
+
+
+@dataclass
+class PlanItem:
+    tag: str
+    importance: float
+    provider: str
+    model: str
+    token_in: int
+    token_out_est: int
+    cost_usd: float
+    action: str = KEEP
+
+    @property
+    def tokens(self) -> int:
+        return self.token_in + self.token_out_est
+
+
+@dataclass
+class StagePlan:
+    stage: str
+    items: list[PlanItem]
+    budget_usd: float | None
+    budget_tokens: int | None
+    run_remaining_usd: float | None
+    over_budget: bool = False
+    notes: list[str] = field(default_factory=list)
+
+    @property
+    def active(self) -> list[PlanItem]:
+        return [it for it in self.items if it.action != DROP]
+
+    @property
+    def total_usd(self) -> float:
+        return round(sum(it.cost_usd for it in self.active), 6)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(it.tokens for it in self.active)
+
+    def by_tag(self) -> dict[str, PlanItem]:
+        return {it.tag: it for it in self.items}
+
+    def report(self) -> str:
+        n_down = sum(it.action == DOWNGRADE for it in self.items)
+        n_drop = sum(it.action == DROP for it in self.items)
+        lines = [
+            f"📋 [{self.stage}] 호출 계획: {len(self.active)}/{len(self.items)}건 "
+            f"(모델 변경 {n_down}, 생략 {n_drop})",
+            f"   예상 토큰 {self.total_tokens} / 한도 {self.budget_tokens or '∞'}",
+            f"   예상 비용 ${self.total_usd} / 스테이지 한도 ${self.budget_usd or '∞'}"
+            f" / 실행 잔여 ${'∞' if self.run_remaining_usd is None else round(self.run_remaining_usd, 6)}",
+        ]
+        if self.over_budget:
+            lines.append("   ⚠️ 보호 대상만 남았지만 여전히 예산 초과")
+        lines += [f"   - {n}" for n in self.notes]
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.stage,
+            "budget_usd": self.budget_usd,
+            "budget_tokens": self.budget_tokens,
+            "run_remaining_usd": self.run_remaining_usd,
+            "total_usd": self.total_usd,
+            "total_tokens": self.total_tokens,
+            "over_budget": self.over_budget,
+            "notes": self.notes,
+            "items": [asdict(it) for it in self.items],
+        }
+
+
+def importance_by_tag(tags: list[str], strategy_df=None, df_for_call=None) -> dict[str, float]:
+    """
+    tag → 중요도 매핑
+    - strategy_df["File"] == tag 이면 그대로 사용
+    - df_for_call의 name4save 로 파일명을 찾아 연결
+    - 정보 없으면 0 (가장 먼저 비용 절감 대상)
+    """
+    if strategy_df is None or "Importance" not in getattr(strategy_df, "columns", []):
+        return {t: 0.0 for t in tags}
+    by_file = dict(zip(strategy_df["File"], strategy_df["Importance"]))
+    tag_to_file = {}
+    if df_for_call is not None and {"id", "name4save"} <= set(df_for_call.columns):
+        tag_to_file = dict(zip(df_for_call["id"], df_for_call["name4save"]))
+    result = {}
+    for t in tags:
+        value = by_file.get(t, by_file.get(tag_to_file.get(t), 0.0))
+        try:
+            result[t] = float(value)
+        except (TypeError, ValueError):
+            result[t] = 0.0
+    return result
+
+
+class BudgetPlanner:
+    def __init__(self, stage: str, llm_config: dict, timestamp: str | None = None):
+        self.stage = stage
+        self.llm_config = llm_config
+        self.timestamp = timestamp or cfg.get_timestamp()
+        self.plan_dir = cfg.get_results_path(self.timestamp)["plan"]
+
+        budget = cfg.get_budget_config()
+        stage_budget = budget.get("stage", {}).get(stage, {}) or {}
+        self.budget_usd = stage_budget.get("usd")
+        self.budget_tokens = stage_budget.get("tokens")
+        self.run_usd = (budget.get("run") or {}).get("usd")
+        self.output_ratio = float(budget.get("output_ratio", 0.5))
+        self.protect_importance = budget.get("protect_importance")
+        fallback = budget.get("fallback") or {}
+        self.fallback_model = fallback.get("model")
+        self.fallback_provider = fallback.get("provider") or cfg.LLM_PROVIDER_MAP.get(self.fallback_model)
+        # batch 스테이지: Batch API 로 나가는 호출은 할인 단가 (미지원 provider 로 바뀐 항목은 동기 호출 → 정가)
+        self.batch_cfg = cfg.get_batch_config() if llm_config.get("mode") == "batch" else None
+
+    # ✅ 같은 실행에서 다른 스테이지가 이미 잡아둔 예상 비용 합계
+    def _run_committed_usd(self) -> float:
+        total = 0.0
+        if not self.plan_dir.exists():
+            return total
+        for f in self.plan_dir.glob("*.json"):
+            if f.stem == self.stage:
+                continue
+            try:
+                total += float(json.loads(f.read_text(encoding="utf-8")).get("total_usd", 0.0))
+            except Exception:
+                continue
+        return total
+
+    def _estimate(self, item: PlanItem):
+        max_tokens = int(self.llm_config.get("max_tokens", 1024))
+        item.token_out_est = min(max_tokens, math.ceil(item.token_in * self.output_ratio))
+        batched = self.batch_cfg is not None and supports_batch(item.provider, self.batch_cfg)
+        discount = cfg.BATCH_DISCOUNT if batched else 1.0
+        item.cost_usd = round(
+            (cfg.calc_cost(item.model, item.token_in, "input")
+             + cfg.calc_cost(item.model, item.token_out_est, "output")) * discount, 6
+        )
+
+    def _within(self, plan: StagePlan) -> bool:
+        limits = [
+            (plan.total_usd, self.budget_usd),
+            (plan.total_tokens, self.budget_tokens),
+            (plan.total_usd, plan.run_remaining_usd),
+        ]
+        return all(limit is None or value <= limit for value, limit in limits)
+
+    def plan(self, prompts: list[str], tags: list[str], importance: dict[str, float] | None = None,
+             prior: StagePlan | None = None) -> StagePlan:
+        """
+        스테이지 전체 프롬프트에 대한 사전 계획 (네트워크 I/O 없음)
+        1. 기본 모델 기준 토큰/비용 추정
+        2. 예산 초과 시 중요도 낮은 순으로 fallback 모델로 변경
+        3. 그래도 초과면 같은 순서로 생략
+        - prior: 같은 실행에서 이 스테이지가 이미 세운 계획 (run_dag 파일별 호출)
+          → 기존 항목은 그대로 예산에 포함, 변경/생략 대상은 이번 프롬프트만
+        """
+        importance = importance or {}
+        model = self.llm_config["model"][0]
+        provider = self.llm_config["provider"][0]
+        counts = count_tokens_batch(prompts, model)
+
+        items = []
+        for tag, n in zip(tags, counts):
+            item = PlanItem(tag, importance.get(tag, 0.0), provider, model, n, 0, 0.0)
+            self._estimate(item)
+            items.append(item)
+
+        run_remaining = None
+        if self.run_usd is not None:
+            run_remaining = max(0.0, float(self.run_usd) - self._run_committed_usd())
+        new_tags = set(tags)
+        kept = [it for it in prior.items if it.tag not in new_tags] if prior is not None else []
+        plan = StagePlan(self.stage, kept + items, self.budget_usd, self.budget_tokens, run_remaining,
+                         notes=list(prior.notes) if prior is not None else [])
+
+        if not self._within(plan):
+            pos = {t: i for i, t in enumerate(tags)}
+            # 중요도 낮은 순 → 비용 큰 순 → 원래 순서
+            order = sorted(
+                (it for it in items
+                 if self.protect_importance is None or it.importance < self.protect_importance),
+                key=lambda it: (it.importance, -it.cost_usd, pos[it.tag]),
+            )
+            if self.fallback_model and self.fallback_model != model:
+                fb_counts = dict(zip(
+                    [it.tag for it in order],
+                    count_tokens_batch([prompts[pos[it.tag]] for it in order], self.fallback_model),
+                ))
+                for it in order:
+                    if self._within(plan):
+                        break
+                    it.model, it.provider, it.action = self.fallback_model, self.fallback_provider, DOWNGRADE
+                    it.token_in = fb_counts[it.tag]
+                    self._estimate(it)
+                note = f"fallback 모델: {self.fallback_provider}:{self.fallback_model}"
+                if note not in plan.notes:
+                    plan.notes.append(note)
+            for it in order:
+                if self._within(plan):
+                    break
+                it.action = DROP
+            plan.over_budget = not self._within(plan)
+
+        self.save(plan)
+        return plan
+
+    def save(self, plan: StagePlan) -> Path:
+        self.plan_dir.mkdir(parents=True, exist_ok=True)
+        path = self.plan_dir / f"{self.stage}.json"
+        path.write_text(json.dumps(plan.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
@@ -1,20 +1,32 @@
 import os
-import openai
-from openai import OpenAI
+import functools
+from typing import Iterator
 from dotenv import load_dotenv
+from llm.result import LLMText
 
 load_dotenv()
 API_KEY = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(api_key=API_KEY)
+# 재시도는 llm.retry 에서 일괄 처리 → SDK 자체 재시도는 끔
+# SDK import / client 생성은 첫 호출 때 한 번만
+@functools.lru_cache(maxsize=1)
+def _client():
+    from openai import OpenAI
+    return OpenAI(api_key=API_KEY, max_retries=0)
 
-def call(prompt: str, llm_param: dict) -> str:
+# 고정 prefix 는 system 메시지로 → 요청 앞부분이 매번 같아 prompt cache 적중
+def _messages(prompt: str, system_msg: str = "") -> list[dict]:
+    messages = [{"role": "system", "content": system_msg}] if system_msg else []
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+def call(prompt: str, llm_param: dict, system_msg: str = "") -> str:
     if not API_KEY:
         raise ValueError("OPENAI_API_KEY 없음")
 
-    response = client.chat.completions.create(
+    response = _client().chat.completions.create(
         model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
+        messages=_messages(prompt, system_msg),
         temperature=llm_param.get("temperature", 0.7),
         max_tokens=llm_param.get("max_tokens", 1024),
         top_p=llm_param.get("top_p", 0.8),
@@ -22,4 +34,29 @@ def call(prompt: str, llm_param: dict) -> str:
         presence_penalty=0
     )
 
-    return response.choices[0].message.content.strip()
+    usage = response.usage.model_dump() if response.usage else {}
+    return LLMText(response.choices[0].message.content.strip(), usage)
+
+
+# ✅ 스트리밍 호출: 텍스트 조각을 도착 순서대로 yield
+def stream(prompt: str, llm_param: dict, system_msg: str = "") -> Iterator[str]:
+    if not API_KEY:
+        raise ValueError("OPENAI_API_KEY 없음")
+
+    response = _client().chat.completions.create(
+        model="gpt-4o",
+        messages=_messages(prompt, system_msg),
+        temperature=llm_param.get("temperature", 0.7),
+        max_tokens=llm_param.get("max_tokens", 1024),
+        top_p=llm_param.get("top_p", 0.8),
+        frequency_penalty=0,
+        presence_penalty=0,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+
+    for chunk in response:
+        if chunk.usage:
+            yield LLMText("", chunk.usage.model_dump())
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
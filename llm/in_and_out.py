@@ -0,0 +1,248 @@
+import gzip
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+from llm.path_allocator import atomic_write_text
+
+try:
+    import zstandard
+except ImportError:  # zstd 미설치 환경은 gzip 으로 기록
+    zstandard = None
+
+MAGIC = b"IOSEG1"
+CODEC_GZIP, CODEC_ZSTD = 1, 2
+HEADER_SIZE = len(MAGIC) + 1
+LEN = struct.Struct(">I")
+
+
+# ─────────────────────────────────────
+# 🔹 codec: 레코드 단위 압축 (random access 유지)
+# ─────────────────────────────────────
+def _default_codec() -> int:
+    return CODEC_ZSTD if zstandard is not None else CODEC_GZIP
+
+
+def _compress(codec: int, data: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress(codec: int, data: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd 세그먼트 읽기에는 zstandard 패키지 필요")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def index_path_for(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _scan(fh, codec: int) -> tuple[dict[str, dict[str, int]], int]:
+    """
+    세그먼트 파일 전체를 헤더만 따라가며 index 재구성
+    - 크래시로 잘린 마지막 레코드는 제외하고 마지막 정상 offset 반환
+    """
+    index: dict[str, dict[str, int]] = {}
+    offset = HEADER_SIZE
+    fh.seek(offset)
+    while True:
+        head = fh.read(LEN.size)
+        if len(head) < LEN.size:
+            break
+        (size,) = LEN.unpack(head)
+        payload = fh.read(size)
+        if len(payload) < size:
+            break
+        try:
+            rec = json.loads(_decompress(codec, payload))
+        except Exception:
+            break
+        index.setdefault(rec["tag"], {})[rec["kind"]] = offset
+        offset += LEN.size + size
+    return index, offset
+
+
+def _load_index(path: Path, size: int) -> dict[str, dict[str, int]] | None:
+    # 저장된 index 가 현재 파일 크기와 맞을 때만 사용 (아니면 재스캔)
+    idx_path = index_path_for(path)
+    if not idx_path.exists():
+        return None
+    try:
+        data = json.loads(idx_path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return None
+    return data["index"] if data.get("size") == size else None
+
+
+class SegmentRecorder:
+    """
+    실행별 프롬프트/응답 기록기 (txt 파일 수백만 개 대체)
+    - 레코드: [4byte 길이][압축 JSON {tag, kind, text, ts}] 를 append
+    - index: tag → {kind: offset}, 닫을 때 <file>.idx 로 저장
+    - 같은 tag/kind 를 다시 기록하면 index 는 마지막 레코드를 가리킴
+    - 재실행 시 기존 파일 이어쓰기 (잘린 꼬리는 잘라냄)
+    - 같은 파일을 여러 곳에서 쓸 때는 open_recorder() 로 공유 (인스턴스마다 offset / index 를 따로 들면 서로 덮어씀)
+    """
+
+    def __init__(self, path: Path, codec: int | None = None):
+        self.path = path
+        self._key = path.resolve()
+        self._refs = 0
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and path.stat().st_size >= HEADER_SIZE:
+            self._fh = path.open("r+b")
+            header = self._fh.read(HEADER_SIZE)
+            if header[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"세그먼트 파일 형식 아님: {path}")
+            self.codec = header[-1]
+            size = path.stat().st_size
+            self.index = _load_index(path, size)
+            if self.index is None:
+                self.index, end = _scan(self._fh, self.codec)
+                self._fh.truncate(end)
+            self._fh.seek(0, os.SEEK_END)
+        else:
+            self.codec = codec or _default_codec()
+            self._fh = path.open("w+b")
+            self._fh.write(MAGIC + bytes([self.codec]))
+            self._fh.flush()
+            self.index = {}
+        self._reader = SegmentReader(path, index=self.index, codec=self.codec)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, tag: str, kind: str, text: str) -> int:
+        rec = {"tag": tag, "kind": kind, "text": text, "ts": round(time.time(), 3)}
+        payload = _compress(self.codec, json.dumps(rec, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            offset = self._fh.tell()
+            self._fh.write(LEN.pack(len(payload)) + payload)
+            self._fh.flush()
+            self.index.setdefault(tag, {})[kind] = offset
+        return offset
+
+    def has(self, tag: str, kind: str) -> bool:
+        return kind in self.index.get(tag, {})
+
+    def get(self, tag: str, kind: str = "out") -> str | None:
+        return self._reader.get(tag, kind)
+
+    def close(self):
+        # open_recorder() 로 공유 중이면 마지막 사용자가 닫을 때만 실제로 닫음
+        with _recorders_lock:
+            if self._refs > 1:
+                self._refs -= 1
+                return
+            self._refs = 0
+            if _recorders.get(self._key) is self:
+                del _recorders[self._key]
+        with self._lock:
+            if self._fh.closed:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            size = self._fh.tell()
+            self._fh.close()
+            self._reader.close()
+            atomic_write_text(index_path_for(self.path), json.dumps({"size": size, "index": self.index}))
+
+
+_recorders: dict[Path, SegmentRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+# ✅ 경로당 recorder 하나 (프로세스 내 공유) → run_dag 처럼 같은 스테이지 manager 가 동시에 여럿이어도 레코드 유실 없음
+def open_recorder(path: Path, codec: int | None = None) -> SegmentRecorder:
+    key = path.resolve()
+    with _recorders_lock:
+        recorder = _recorders.get(key)
+        if recorder is None:
+            recorder = _recorders[key] = SegmentRecorder(path, codec)
+        recorder._refs += 1
+        return recorder
+
+
+class SegmentReader:
+    """
+    세그먼트 파일 읽기
+    - get(tag, kind): index offset 으로 바로 읽음 (pread)
+    - replay(kind): 처음부터 순서대로 레코드 스트리밍 (디버깅 / 재처리용)
+    """
+
+    def __init__(self, path: Path, index: dict[str, dict[str, int]] | None = None, codec: int | None = None):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        header = os.pread(self._fd, HEADER_SIZE, 0)
+        if header[:len(MAGIC)] != MAGIC:
+            os.close(self._fd)
+            raise ValueError(f"세그먼트 파일 형식 아님: {path}")
+        self.codec = codec or header[-1]
+        if index is None:
+            index = _load_index(path, os.fstat(self._fd).st_size)
+        if index is None:
+            with path.open("rb") as fh:
+                index, _ = _scan(fh, self.codec)
+        self.index = index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def tags(self) -> list[str]:
+        return list(self.index)
+
+    def read_at(self, offset: int) -> dict:
+        (size,) = LEN.unpack(os.pread(self._fd, LEN.size, offset))
+        payload = os.pread(self._fd, size, offset + LEN.size)
+        return json.loads(_decompress(self.codec, payload))
+
+    def get(self, tag: str, kind: str = "out") -> str | None:
+        offset = self.index.get(tag, {}).get(kind)
+        return None if offset is None else self.read_at(offset)["text"]
+
+    def replay(self, kind: str | None = None) -> Iterator[dict]:
+        with self.path.open("rb") as fh:
+            fh.seek(HEADER_SIZE)
+            while True:
+                head = fh.read(LEN.size)
+                if len(head) < LEN.size:
+                    return
+                (size,) = LEN.unpack(head)
+                payload = fh.read(size)
+                if len(payload) < size:
+                    return
+                rec = json.loads(_decompress(self.codec, payload))
+                if kind is None or rec["kind"] == kind:
+                    yield rec
+
+
+# ✅ 디버깅용: python -m llm.in_and_out <세그먼트 파일> [tag] [in|out]
+if __name__ == "__main__":
+    seg_path = Path(sys.argv[1])
+    with SegmentReader(seg_path) as reader:
+        if len(sys.argv) > 2:
+            print(reader.get(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "out"))
+        else:
+            for tag in reader.tags():
+                print(f"{tag}\t{','.join(reader.index[tag])}")
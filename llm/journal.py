@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+PENDING, IN_FLIGHT, DONE, FAILED = "pending", "in_flight", "done", "failed"
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class StageJournal:
+    """
+    스테이지 작업 journal (append-only JSONL)
+    - tag 별 상태: pending → in_flight → done(hash) / failed(attempts)
+    - 매 기록은 OS 버퍼까지 flush, fsync 는 N건/T초 단위로 묶어서 수행
+    - 재실행 시 파일을 replay 해서 tag 별 마지막 상태 복원
+    - 같은 파일을 여러 곳에서 쓸 때는 open_journal() 로 공유 (상태 / 기록 순서를 한 인스턴스가 관리)
+    """
+
+    def __init__(self, path: Path, fsync_every: int = 32, fsync_interval: float = 1.0):
+        self.path = path
+        self._key = path.resolve()
+        self._refs = 0
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.state: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._replay()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = self.path.open("a", encoding="utf-8")
+
+    def _replay(self):
+        if not self.path.exists():
+            return
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 크래시로 잘린 마지막 줄
+                self.state[rec["tag"]] = rec
+
+    def _write(self, rec: dict):
+        self._fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        self._unsynced += 1
+        now = time.monotonic()
+        if self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+            self._last_sync = now
+
+    def mark(self, tag: str, state: str, **fields):
+        with self._lock:
+            prev = self.state.get(tag, {})
+            rec = {"tag": tag, "state": state, "attempts": prev.get("attempts", 0), "ts": round(time.time(), 3)}
+            if state == FAILED:
+                rec["attempts"] += 1
+            rec.update(fields)
+            self.state[tag] = rec
+            self._write(rec)
+
+    def mark_many(self, tags: list[str], state: str):
+        with self._lock:
+            for tag in tags:
+                prev = self.state.get(tag, {})
+                rec = {"tag": tag, "state": state, "attempts": prev.get("attempts", 0), "ts": round(time.time(), 3)}
+                self.state[tag] = rec
+                self._write(rec)
+
+    # ✅ 상태는 그대로 두고 마지막 기록에 필드 추가 (완료 후 토큰/비용 기록 → 재실행 시 ledger 복원용)
+    def annotate(self, tag: str, **fields):
+        with self._lock:
+            rec = {**self.state.get(tag, {"tag": tag, "state": PENDING, "attempts": 0}), **fields}
+            self.state[tag] = rec
+            self._write(rec)
+
+    def mark_done(self, tag: str, out_path: Path, text: str):
+        self.mark(tag, DONE, hash=text_hash(text), out_path=str(out_path))
+
+    # ✅ 완료 기록의 hash 와 주어진 결과가 일치하는지 (세그먼트 기록 재사용 시)
+    def matches(self, tag: str, text: str | None) -> bool:
+        rec = self.state.get(tag)
+        return bool(rec) and rec.get("state") == DONE and text is not None and text_hash(text) == rec.get("hash")
+
+    def completed_output(self, tag: str) -> str | None:
+        """
+        완료 기록이 있고 out 파일 내용 hash 가 일치하면 그 결과를 반환
+        - 파일이 없거나 바뀌었으면 None → 다시 호출 대상
+        """
+        rec = self.state.get(tag)
+        if not rec or rec.get("state") != DONE or not rec.get("out_path"):
+            return None
+        path = Path(rec["out_path"])
+        if not path.exists():
+            return None
+        text = path.read_text(encoding="utf-8")
+        return text if self.matches(tag, text) else None
+
+    def summary(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for rec in self.state.values():
+            counts[rec["state"]] = counts.get(rec["state"], 0) + 1
+        return counts
+
+    def close(self):
+        # open_journal() 로 공유 중이면 마지막 사용자가 닫을 때만 실제로 닫음
+        with _journals_lock:
+            if self._refs > 1:
+                self._refs -= 1
+                return
+            self._refs = 0
+            if _journals.get(self._key) is self:
+                del _journals[self._key]
+        with self._lock:
+            if self._fh.closed:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+
+
+_journals: dict[Path, StageJournal] = {}
+_journals_lock = threading.Lock()
+
+
+# ✅ 경로당 journal 하나 (프로세스 내 공유) → 같은 스테이지 manager 가 동시에 여럿이어도 상태가 갈라지지 않음
+def open_journal(path: Path) -> StageJournal:
+    key = path.resolve()
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = StageJournal(path)
+        journal._refs += 1
+        return journal
@@ -0,0 +1,117 @@
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from config.setting import cfg
+
+IN_COLUMNS = ["prompt", "llm", "meta data", "token", "cached token", "cost($)", "cost(krw)", "name4save", "save_path"]
+OUT_COLUMNS = ["prompt", "llm", "purpose", "Is upload", "upload pf",
+               "token", "cost($)", "cost(krw)", "name4save", "save_path"]
+
+
+class InRecord:
+    __slots__ = ("prompt", "llm", "meta_data", "token", "cached", "cost_usd", "cost_krw", "name4save", "save_path")
+
+    def __init__(self, prompt, llm, meta_data, token, cost_usd, cost_krw, name4save, save_path, cached=0):
+        self.prompt = prompt
+        self.llm = llm
+        self.meta_data = meta_data
+        self.token = token
+        self.cached = cached
+        self.cost_usd = cost_usd
+        self.cost_krw = cost_krw
+        self.name4save = name4save
+        self.save_path = save_path
+
+    def row(self) -> tuple:
+        return (self.prompt, self.llm, self.meta_data, self.token, self.cached, self.cost_usd, self.cost_krw,
+                self.name4save, self.save_path)
+
+
+class OutRecord:
+    __slots__ = ("prompt", "llm", "purpose", "is_upload", "upload_pf", "token", "cost_usd", "cost_krw",
+                 "name4save", "save_path")
+
+    def __init__(self, prompt, llm, purpose, token, cost_usd, cost_krw, name4save, save_path,
+                 is_upload=False, upload_pf=""):
+        self.prompt = prompt
+        self.llm = llm
+        self.purpose = purpose
+        self.is_upload = is_upload
+        self.upload_pf = upload_pf
+        self.token = token
+        self.cost_usd = cost_usd
+        self.cost_krw = cost_krw
+        self.name4save = name4save
+        self.save_path = save_path
+
+    def row(self) -> tuple:
+        return (self.prompt, self.llm, self.purpose, self.is_upload, self.upload_pf, self.token,
+                self.cost_usd, self.cost_krw, self.name4save, self.save_path)
+
+
+class CallLedger:
+    """
+    LLM 호출 기록 (append-only)
+    - 워커 스레드에서 O(1) append (lock 보호)
+    - DataFrame 변환은 필요할 때 한 번만 수행
+    - artifact store(in / out) 경유 Parquet 저장 → 실행 간 비용 조회 시 필요한 컬럼만 읽음
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in: list[InRecord] = []
+        self._out: list[OutRecord] = []
+        self._tags: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._out)
+
+    def add(self, rec_in: InRecord, rec_out: OutRecord):
+        with self._lock:
+            self._in.append(rec_in)
+            self._out.append(rec_out)
+            self._tags.add(rec_in.prompt)
+
+    def has(self, tag: str) -> bool:
+        return tag in self._tags
+
+    def to_frames(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        with self._lock:
+            in_rows = [r.row() for r in self._in]
+            out_rows = [r.row() for r in self._out]
+        return (pd.DataFrame(in_rows, columns=IN_COLUMNS),
+                pd.DataFrame(out_rows, columns=OUT_COLUMNS))
+
+    # ✅ provider prompt cache 적중 비율 (입력 토큰 중 cached 비중)
+    def cache_share(self) -> tuple[int, int, float]:
+        with self._lock:
+            total = sum(r.token or 0 for r in self._in)
+            cached = sum(r.cached or 0 for r in self._in)
+        return cached, total, round(cached / total * 100, 1) if total else 0.0
+
+
+# ✅ 실행 간 비용 조회: 모든 results/<timestamp>/df 에서 필요한 컬럼만 스캔
+def load_ledger_columns(kind: str = "in", columns: list[str] | None = None,
+                        base_dir: Path | None = None) -> pd.DataFrame:
+    base_dir = base_dir or cfg.RESULTS_DIR
+    columns = columns or ["llm", "token", "cost($)"]
+    frames = []
+    for run_dir in sorted(p for p in base_dir.glob("*") if p.is_dir()):
+        path = cfg.get_results_path(run_dir.name, base_dir)[kind]
+        if not path.exists():
+            continue
+        df = pd.read_parquet(path, columns=columns)
+        df.insert(0, "run", run_dir.name)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["run", *columns])
+    return pd.concat(frames, ignore_index=True)
+
+
+def cost_by_run(base_dir: Path | None = None) -> pd.DataFrame:
+    in_df = load_ledger_columns("in", ["token", "cost($)"], base_dir)
+    out_df = load_ledger_columns("out", ["token", "cost($)"], base_dir)
+    total = pd.concat([in_df, out_df], ignore_index=True)
+    return total.groupby("run", as_index=False)[["token", "cost($)"]].sum()
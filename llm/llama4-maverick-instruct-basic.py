@@ -1,21 +1,19 @@
 import os
 import requests
+from typing import Iterator
 from dotenv import load_dotenv
+from llm.stream import iter_sse_content
+from llm.result import LLMText
 
 load_dotenv()
 API_KEY = os.getenv("FIREWORKS_API_KEY")
 
-def call(prompt: str, llm_param: dict) -> str:
-    if not API_KEY:
-        raise ValueError("FIREWORKS_API_KEY 없음")
-
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-
-    payload = {
+def _payload(prompt: str, llm_param: dict, system_msg: str = "") -> dict:
+    messages = []
+    if system_msg:
+        messages.append({"role": "system", "content": [{"type": "text", "text": system_msg}]})
+    messages.append({"role": "user", "content": [{"type": "text", "text": prompt}]})
+    return {
         "model": "accounts/fireworks/models/llama4-maverick-instruct-basic",
         "max_tokens": llm_param.get("max_tokens", 1024),
         "top_p": llm_param.get("top_p", 0.8),
@@ -23,17 +21,41 @@ def call(prompt: str, llm_param: dict) -> str:
         "temperature": llm_param.get("temperature", 0.7),
         "presence_penalty": 0,
         "frequency_penalty": 0,
-        "messages": [
-            {
-                "role": "user",
-                "content": [{"type": "text", "text": prompt}]
-            }
-        ]
+        "messages": messages
+    }
+
+
+def _headers(accept: str = "application/json") -> dict:
+    if not API_KEY:
+        raise ValueError("FIREWORKS_API_KEY 없음")
+    return {
+        "Authorization": f"Bearer {API_KEY}",
+        "Content-Type": "application/json",
+        "Accept": accept
     }
 
+
+def call(prompt: str, llm_param: dict, system_msg: str = "") -> str:
+    headers = _headers()
+    payload = _payload(prompt, llm_param, system_msg)
+
     response = requests.post(
         "https://api.fireworks.ai/inference/v1/chat/completions",
         headers=headers, json=payload, timeout=60
     )
     response.raise_for_status()
-    return response.json()["choices"][0]["message"]["content"].strip()
+    data = response.json()
+    return LLMText(data["choices"][0]["message"]["content"].strip(), data.get("usage"))
+
+
+# ✅ 스트리밍 호출: SSE 조각을 도착 순서대로 yield
+def stream(prompt: str, llm_param: dict, system_msg: str = "") -> Iterator[str]:
+    headers = _headers("text/event-stream")
+    payload = {**_payload(prompt, llm_param, system_msg), "stream": True}
+
+    with requests.post(
+        "https://api.fireworks.ai/inference/v1/chat/completions",
+        headers=headers, json=payload, timeout=60, stream=True
+    ) as response:
+        response.raise_for_status()
+        yield from iter_sse_content(response)
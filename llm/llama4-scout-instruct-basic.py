@@ -1,18 +1,21 @@
 import os
 import requests
+from typing import Iterator
 from dotenv import load_dotenv
+from llm.stream import iter_sse_content
+from llm.result import LLMText
 
 load_dotenv()
 API_KEY = os.getenv("FIREWORKS_API_KEY")
 
-def call(prompt: str, llm_param: dict, system_msg: str = "", log_func=None) -> str:
+def _request(prompt: str, llm_param: dict, system_msg: str = "", stream: bool = False) -> tuple[dict, dict]:
     if not API_KEY:
         raise ValueError("FIREWORKS_API_KEY 없음")
 
     headers = {
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": "application/json",
-        "Accept": "application/json"
+        "Accept": "text/event-stream" if stream else "application/json"
     }
 
     messages = []
@@ -30,6 +33,12 @@ def call(prompt: str, llm_param: dict, system_msg: str = "", log_func=None) -> s
         "frequency_penalty": 0,
         "messages": messages
     }
+    if stream:
+        payload["stream"] = True
+    return headers, payload
+
+def call(prompt: str, llm_param: dict, system_msg: str = "", log_func=None) -> str:
+    headers, payload = _request(prompt, llm_param, system_msg)
 
     try:
         response = requests.post(
@@ -40,9 +49,28 @@ def call(prompt: str, llm_param: dict, system_msg: str = "", log_func=None) -> s
         )
         response.raise_for_status()
         data = response.json()
-        return data["choices"][0]["message"]["content"].strip()
+        return LLMText(data["choices"][0]["message"]["content"].strip(), data.get("usage"))
+    except Exception as e:
+        # 원본 예외 유지 → 재시도 엔진이 status / timeout 여부로 분류
+        if log_func:
+            log_func(f"[FIREWORKS] ❌ 호출 실패: {e}")
+        raise
+
+
+# ✅ 스트리밍 호출: SSE 조각을 도착 순서대로 yield
+def stream(prompt: str, llm_param: dict, system_msg: str = "", log_func=None) -> Iterator[str]:
+    headers, payload = _request(prompt, llm_param, system_msg, stream=True)
+    try:
+        with requests.post(
+            "https://api.fireworks.ai/inference/v1/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=60,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            yield from iter_sse_content(response)
     except Exception as e:
-        msg = f"[FIREWORKS] ❌ 호출 실패: {e}"
         if log_func:
-            log_func(msg)
-        raise RuntimeError(msg)
+            log_func(f"[FIREWORKS] ❌ 스트리밍 호출 실패: {e}")
+        raise
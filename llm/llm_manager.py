@@ -1,35 +1,123 @@
 from pathlib import Path
 import pandas as pd
 import functools
+import threading
 import time
-import tiktoken
 from typing import Any
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from config.setting import cfg
-from llm.llm_router import call_llm
+from config.tracing import counter, span, traced
+from llm.llm_router import call_llm, stream_llm
+from llm.retry import RetryBudget, RetryPolicy
+from llm.result import CallFailure, SKIPPED, cached_tokens, failure_from, usage_of
+from llm.stream import LLMStream
+from llm.tag_index import build_tag_index
+from llm.path_allocator import PathAllocator, atomic_write_text
+from llm.journal import open_journal, IN_FLIGHT, PENDING, FAILED
+from llm.batch_mode import (FINAL_STATES, BatchTransport, build_batch_line, make_transport, parse_output_line,
+                            wait_for, write_batch_file)
+from llm.ledger import CallLedger, InRecord, OutRecord
+from llm.in_and_out import open_recorder
+from llm.token_counter import count_tokens, count_tokens_batch
+from llm.minimize_token import PromptCompressor
+from prompt.layout import join_prefix, split_prefix
+from llm.prompt_packer import Pack, PackTask, pack_tasks, split_packed_response
+from llm.budget_planner import BudgetPlanner, StagePlan, importance_by_tag, DOWNGRADE, DROP
+from pipeline.artifacts import get_store
 
 
+# ✅ tag 는 journal / 토큰 수 / 확정 프롬프트 / 저장 경로의 키 → 한 호출 안에서 중복되면 결과가 서로 덮어씀
+def _check_unique_tags(tags: list[str]):
+    seen, dup = set(), []
+    for t in tags:
+        if t in seen:
+            dup.append(t)
+        seen.add(t)
+    if dup:
+        raise ValueError(f"중복 tag {len(dup)}건: " + ", ".join(sorted(set(dup))[:10]))
+
+
+class _StageShared:
+    # 같은 실행 · 같은 스테이지 LLMManager 끼리 공유 (run_dag 는 파일마다 manager 생성)
+    # - ledger: save_all 이 스테이지 전체 호출 기록을 저장 / plan: 스테이지 예산을 파일별이 아닌 스테이지 누적으로 적용
+    def __init__(self):
+        self.ledger = CallLedger()
+        self.plan: StagePlan | None = None
+        self.lock = threading.Lock()
+
+
+_shared: dict[tuple[str, str], _StageShared] = {}
+_shared_lock = threading.Lock()
+
+
+def _stage_shared(timestamp: str, stage: str) -> _StageShared:
+    with _shared_lock:
+        state = _shared.get((timestamp, stage))
+        if state is None:
+            state = _shared[(timestamp, stage)] = _StageShared()
+        return state
+
+
+def release_stage_state(timestamp: str):
+    # 실행 종료 후 메모리 해제 (daemon 모드: 실행마다 ledger 가 쌓이지 않도록)
+    with _shared_lock:
+        for key in [k for k in _shared if k[0] == timestamp]:
+            del _shared[key]
+
 
 class LLMManager:
-    def __init__(self, stage: str, repo_df: pd.DataFrame, df_for_call: pd.DataFrame | None = None):
+    def __init__(self, stage: str, repo_df: pd.DataFrame, df_for_call: pd.DataFrame | None = None,
+                 strategy_df: pd.DataFrame | None = None, llm_config: dict | None = None,
+                 exchange_rate: float | None = None):
         self.stage = stage
         self.repo_df = repo_df
         self.call_count = 0
-        self.config = cfg.get_llm_config(stage)
+        self.config = llm_config or cfg.get_llm_config(stage)
         self.model = self.config["model"][0]
         self.provider = self.config["provider"][0]
         self.params = {k: self.config[k] for k in ["temperature", "top_p", "top_k", "max_tokens"]}
-        self.exchange_rate = cfg.get_usd_exchange_rate()
+        # 환율 조회는 네트워크 요청 → 벤치마크 등에서는 고정값 주입
+        self.exchange_rate = exchange_rate if exchange_rate is not None else cfg.get_usd_exchange_rate()
         self.timestamp = cfg.get_timestamp()
         self.paths = cfg.get_results_path(self.timestamp)
         self.log_file = cfg.init_log_file(self.timestamp)
         self.df_for_call = df_for_call
+        self.tag_index = build_tag_index(df_for_call)
+        self.path_alloc = PathAllocator()
+        self.strategy_df = strategy_df
+        self.prompt_tokens: dict[str, int] = {}
+        self.plan: StagePlan | None = None
+        self._routes: dict[str, dict] = {}
+        self._prepared: dict[str, str] = {}
+        self._batch_meta: dict[str, tuple] = {}
+        compress_cfg = cfg.get_compress_config(stage)
+        self.compressor = PromptCompressor(
+            stage, self.model,
+            target_tokens=compress_cfg.get("target_tokens"),
+            context_lines=compress_cfg.get("context_lines", 2),
+        ) if compress_cfg.get("enabled") else None
         self.n_files = len(df_for_call) if df_for_call is not None else len(repo_df["Diff list"].iloc[0])
-        self.in_df = pd.DataFrame(columns=["prompt", "llm", "meta data", "token", "cost($)", "cost(krw)",
-                                           "name4save", "save_path"])
-        self.out_df = pd.DataFrame(columns=["prompt", "llm", "purpose", "Is upload", "upload pf",
-                                            "token", "cost($)", "cost(krw)", "name4save", "save_path"])
+        self._shared = _stage_shared(self.timestamp, stage)
+        self.ledger = self._shared.ledger
+        retry_cfg = cfg.get_retry_config(stage)
+        self.retry_policy = RetryPolicy(retry_cfg["max_attempts"], retry_cfg["base_delay"], retry_cfg["max_delay"])
+        self.retry_budget = RetryBudget(retry_cfg["stage_budget"])
+        # journal / 세그먼트 기록은 같은 스테이지 manager 끼리 공유 (run_dag 는 파일마다 manager 생성)
+        self.journal = open_journal(self.paths["journal"] / f"{stage}.jsonl")
+        self.records = (
+            open_recorder(self.paths["records"] / f"{stage}.seg")
+            if cfg.get_io_record_config()["mode"] == "segment" else None
+        )
+
+    # ✅ 호출 기록은 ledger 에 쌓고, DataFrame 은 조회 시점에만 생성
+    @property
+    def in_df(self) -> pd.DataFrame:
+        return self.ledger.to_frames()[0]
+
+    @property
+    def out_df(self) -> pd.DataFrame:
+        return self.ledger.to_frames()[1]
 
     def __enter__(self):
         self._start_time = time.perf_counter()
@@ -42,104 +130,557 @@ class LLMManager:
         if exc_type:
             msg += f" ❌ 예외 발생: {exc_val}"
         cfg.log(msg, self.log_file)
+        cfg.log(f"[{self.stage}] journal 상태: {self.journal.summary()}", self.log_file)
+        cached, total, share = self.ledger.cache_share()
+        if cached:
+            cfg.log(f"🧊 [{self.stage}] prompt cache 적중: {cached}/{total} 입력 토큰 ({share}%)", self.log_file)
+        self.journal.close()
+        if self.records is not None:
+            self.records.close()
+
+    # ✅ 스테이지 전체 프롬프트 토큰 수 사전 계산 (dispatch 전 예산 점검용)
+    def count_prompts(self, prompts: list[str], tags: list[str]) -> dict[str, int]:
+        _check_unique_tags(tags)
+        with span("llm.count_prompts", cat="tokenize", stage=self.stage, prompts=len(prompts)):
+            counts = count_tokens_batch(prompts, self.model)
+        self.prompt_tokens.update(zip(tags, counts))
+        cfg.log(f"[{self.stage}] 프롬프트 {len(prompts)}개 토큰 사전 계산: 총 {sum(counts)}", self.log_file)
+        return dict(zip(tags, counts))
+
+    # ✅ dispatch 전 토큰/비용 계획 수립 + 리포트 (네트워크 I/O 없음)
+    def plan_stage(self, prompts: list[str], tags: list[str]) -> StagePlan:
+        _check_unique_tags(tags)
+        importance = importance_by_tag(tags, self.strategy_df, self.df_for_call)
+        planner = BudgetPlanner(self.stage, self.config, self.timestamp)
+        with span("llm.plan", cat="tokenize", stage=self.stage, prompts=len(prompts)), self._shared.lock:
+            self.plan = self._shared.plan = planner.plan(prompts, tags, importance, prior=self._shared.plan)
+        # plan 에는 같은 스테이지의 이전 항목도 포함 → 이번 tag 만 반영
+        wanted = set(tags)
+        for it in self.plan.items:
+            if it.tag not in wanted:
+                continue
+            self.prompt_tokens[it.tag] = it.token_in
+            if it.action == DOWNGRADE:
+                self._routes[it.tag] = {**self.config, "provider": [it.provider], "model": [it.model]}
+            else:
+                self._routes.pop(it.tag, None)
+        cfg.log(self.plan.report(), self.log_file)
+        return self.plan
 
-    def call(self, prompt: str, tag: str = "llm_call") -> str:
-        enc = tiktoken.encoding_for_model("gpt-4")
-        token_in = len(enc.encode(prompt))
-
-        in_path = self._get_unique_file_path(self.paths[f"{self.stage}_in"], f"in_{tag}")
-        out_path = self._get_unique_file_path(self.paths[f"{self.stage}_out"], f"out_{tag}")
-        name4save = None
-        save_path = None
-        meta_data = f"{self.stage}:{tag}"
-        purpose = f"{self.stage}_result"
-
-        if self.df_for_call is not None and "id" in self.df_for_call.columns:
-            matched = self.df_for_call[self.df_for_call["id"] == tag]
-            if not matched.empty:
-                row = matched.iloc[0]
-                try:
-                    save_path_list = row.get("save_path", [])
-                    if isinstance(save_path_list, list) and len(save_path_list) >= 2:
-                        in_path = Path(save_path_list[0])
-                        out_path = Path(save_path_list[1])
-                        save_path = save_path_list
-                    name4save = row.get("name4save")
-                    meta_data = row.get("meta data", meta_data)
-                    purpose = row.get("purpose", purpose)
-                except Exception as e:
-                    cfg.log(f"[{self.stage}] {tag} 메타정보 파싱 실패: {e}", self.log_file)
+    def _routed_config(self, tag: str) -> dict | None:
+        return self._routes.get(tag)
 
+    # ✅ tag 별 저장 경로/메타정보 조회 (생성 시 만든 인덱스 사용)
+    def _tag_meta(self, tag: str) -> tuple:
+        meta = self.tag_index.get(tag)
+        if meta is not None and meta.in_path is not None:
+            in_path, out_path = meta.in_path, meta.out_path
+            save_path = list(meta.save_path)
+        else:
+            in_path = self._get_unique_file_path(self.paths[f"{self.stage}_in"], f"in_{tag}")
+            out_path = self._get_unique_file_path(self.paths[f"{self.stage}_out"], f"out_{tag}")
+            save_path = None
+        if meta is None:
+            return in_path, out_path, None, save_path, f"{self.stage}:{tag}", f"{self.stage}_result"
+        return (in_path, out_path, meta.name4save, save_path,
+                meta.meta_data or f"{self.stage}:{tag}", meta.purpose or f"{self.stage}_result")
+
+    # ✅ in/out 기록 (토큰 → 비용 환산 포함)
+    def _record(self, tag: str, model: str, token_in: int, token_out: int,
+                name4save=None, save_path=None, meta_data=None, purpose=None, discount: float = 1.0,
+                cached: int = 0, journal: bool = True):
+        if journal:
+            # 재실행 시 재사용된 tag 도 같은 in/out 행을 남기도록 완료 기록에 함께 보관
+            self.journal.annotate(tag, usage={
+                "model": model, "token_in": token_in, "token_out": token_out, "name4save": name4save,
+                "save_path": save_path, "meta_data": meta_data, "purpose": purpose, "discount": discount,
+                "cached": cached,
+            })
+        cached = min(cached, token_in)
+        cost_in = (cfg.calc_cost(model, token_in - cached, "input")
+                   + cfg.calc_cost(model, cached, "input") * cfg.CACHED_INPUT_RATIO)
+        cost_in = round(cost_in * discount, 6)
+        cost_out = round(cfg.calc_cost(model, token_out, "output") * discount, 6)
+        cost_in_krw = round(cost_in * self.exchange_rate, 4)
+        cost_out_krw = round(cost_out * self.exchange_rate, 4)
+
+        self.ledger.add(
+            InRecord(tag, model, meta_data or f"{self.stage}:{tag}", token_in, cost_in, cost_in_krw,
+                     name4save, save_path, cached),
+            OutRecord(tag, model, purpose or f"{self.stage}_result", token_out, cost_out, cost_out_krw,
+                      name4save, save_path),
+        )
+
+    # ✅ 프롬프트/응답 보관 (segment: 실행별 압축 세그먼트에 append / txt: 호출마다 파일)
+    def _read_input(self, tag: str, in_path: Path | None) -> str | None:
+        if self.records is not None:
+            return self.records.get(tag, "in")
+        return in_path.read_text(encoding="utf-8") if in_path is not None and in_path.exists() else None
+
+    def _save_input(self, tag: str, text: str, in_path: Path | None):
+        if self.records is not None:
+            if not self.records.has(tag, "in"):
+                self.records.append(tag, "in", text)
+        elif in_path is not None and not in_path.exists():
+            atomic_write_text(in_path, text)
+
+    def _save_output(self, tag: str, text: str, out_path: Path):
+        if self.records is not None:
+            self.records.append(tag, "out", text)
+            self.journal.mark_done(tag, self.records.path, text)
+        else:
+            atomic_write_text(out_path, text)
+            self.journal.mark_done(tag, out_path, text)
+
+    # ✅ 전송할 프롬프트 확정
+    # - call_all / call_batch 가 미리 압축해 둔 프롬프트 우선
+    # - txt 모드: 단계가 기록한 in 파일이 원본 (없으면 기존과 같이 "input prompt missing" 실패)
+    # - segment 모드: 이전에 기록된 입력 → 없으면 인자 prompt 사용 (단계가 직접 기록할 in 파일이 없음)
+    def _prepare_prompt(self, prompt: str, tag: str, in_path: Path, model: str) -> tuple[str, int]:
+        prompt_text = self._prepared.pop(tag, None)
+        token_in = self.prompt_tokens.get(tag) if prompt_text is not None else None
+        if prompt_text is None:
+            prompt_text = self._read_input(tag, in_path)
+            if prompt_text is None:
+                if self.records is None:
+                    raise FileNotFoundError(f"in 파일 없음: {in_path}")
+                prompt_text = prompt
+            if self.compressor is not None:
+                prompt_text = self.compressor.compress(prompt_text)
+        self._save_input(tag, prompt_text, in_path)
+        if token_in is None:
+            token_in = count_tokens(prompt_text, model)
+        return prompt_text, token_in
+
+    def _max_workers(self) -> int:
+        return self.config.get("max_workers", 5 if self.provider == "fireworks" else 1)
+
+    def _llm_log(self, message: str, **fields):
+        cfg.log(f"[{self.stage}] {message}", self.log_file, stage=self.stage, **fields)
+
+    def call(self, prompt: str, tag: str = "llm_call", llm_config: dict | None = None) -> str | CallFailure:
+        llm_config = llm_config or self.config
+        model = llm_config["model"][0]
+        if llm_config.get("stream"):
+            try:
+                with span("llm.stream", cat="network", stage=self.stage, tag=tag, model=model):
+                    return self.call_stream(prompt, tag, llm_config).result().strip()
+            except Exception as e:
+                cfg.log(f"[{self.stage}] [{tag}] 스트리밍 호출 실패: {e}", self.log_file)
+                failure = failure_from(tag, e)
+                self.journal.mark(tag, FAILED, error=failure.error, status=failure.status)
+                return failure
+
+        in_path, out_path, name4save, save_path, meta_data, purpose = self._tag_meta(tag)
         try:
-            prompt_text = in_path.read_text(encoding="utf-8")
+            prompt_text, token_in = self._prepare_prompt(prompt, tag, in_path, model)
         except Exception as e:
             cfg.log(f"[{self.stage}] {tag} 입력 프롬프트 로딩 실패: {e}", self.log_file)
-            return f"[ERROR] input prompt missing"
+            return CallFailure(tag, f"input prompt missing: {e}")
 
+        self.journal.mark(tag, IN_FLIGHT)
         t0 = time.perf_counter()
         try:
-            response = call_llm(prompt_text, self.config, log=lambda m: cfg.log(m, self.log_file))
+            with span("llm.call", cat="network", stage=self.stage, tag=tag, model=model):
+                response = call_llm(prompt_text, llm_config, log=self._llm_log,
+                                    policy=self.retry_policy, budget=self.retry_budget)
         except Exception as e:
-            cfg.log(f"[{self.stage}] [{tag}] 호출 실패: {e}", self.log_file)
-            return f"[ERROR] {e}"
+            failure = failure_from(tag, e)
+            self._llm_log(f"[{tag}] 호출 실패: {e}", tag=tag, status=failure.status,
+                          duration=round(time.perf_counter() - t0, 3))
+            self.journal.mark(tag, FAILED, error=failure.error, status=failure.status)
+            return failure
         t1 = time.perf_counter()
 
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        out_path.write_text(response, encoding="utf-8")
-
-        token_out = len(enc.encode(response))
-        cost_in = cfg.calc_cost(self.model, token_in, "input")
-        cost_out = cfg.calc_cost(self.model, token_out, "output")
-        cost_in_krw = round(cost_in * self.exchange_rate, 4)
-        cost_out_krw = round(cost_out * self.exchange_rate, 4)
+        self._save_output(tag, response, out_path)
 
-        self.in_df.loc[len(self.in_df)] = {
-            "prompt": tag, "llm": self.model, "meta data": meta_data,
-            "token": token_in, "cost($)": cost_in, "cost(krw)": cost_in_krw,
-            "name4save": name4save, "save_path": save_path
-        }
-        self.out_df.loc[len(self.out_df)] = {
-            "prompt": tag, "llm": self.model, "purpose": purpose,
-            "Is upload": False, "upload pf": "", "token": token_out,
-            "cost($)": cost_out, "cost(krw)": cost_out_krw,
-            "name4save": name4save, "save_path": save_path
-        }
+        usage = usage_of(response)
+        token_in = usage.get("prompt_tokens") or token_in
+        token_out = usage.get("completion_tokens") or count_tokens(response, model)
+        self._record(tag, model, token_in, token_out, name4save, save_path, meta_data, purpose,
+                     cached=cached_tokens(usage))
+        counter(f"llm.tokens.{self.stage}", input=token_in, output=token_out)
+        self._llm_log(f"[{tag}] 호출 완료 ({model})", tag=tag, model=model, duration=round(t1 - t0, 3),
+                      token_in=token_in, token_out=token_out, cached=cached_tokens(usage))
 
         return response
 
-    def call_all(self, prompts: list[str], tags: list[str]) -> list[str]:
+    def call_stream(self, prompt: str, tag: str = "llm_call", llm_config: dict | None = None) -> LLMStream:
+        """
+        스트리밍 호출 → LLMStream 반환
+        - 조각이 도착하는 즉시 out 파일에 기록
+        - first_line() 으로 커밋 메시지 제목 등 후처리를 완료 전에 시작 가능
+        - 스트림 종료 시 in/out 기록
+        """
+        llm_config = llm_config or self.config
+        model = llm_config["model"][0]
+        in_path, out_path, name4save, save_path, meta_data, purpose = self._tag_meta(tag)
+        prompt_text, token_in = self._prepare_prompt(prompt, tag, in_path, model)
+        self.journal.mark(tag, IN_FLIGHT)
+        chunks = stream_llm(prompt_text, llm_config, log=self._llm_log,
+                            policy=self.retry_policy, budget=self.retry_budget)
+
+        def _on_complete(text: str, token_out: int, usage: dict):
+            if self.records is not None:
+                self._save_output(tag, text, out_path)
+            else:
+                self.journal.mark_done(tag, out_path, text)
+            self._record(tag, model, usage.get("prompt_tokens") or token_in, token_out, name4save, save_path, meta_data, purpose,
+                         cached=cached_tokens(usage))
+
+        return LLMStream(chunks, out_path, model, on_complete=_on_complete, keep_file=self.records is None)
+
+    # ✅ journal 기준 완료된 tag 는 기존 결과 재사용
+    def _resume(self, tags: list[str]) -> dict[int, str]:
+        reused = {}
+        for i, t in enumerate(tags):
+            if self.records is not None:
+                text = self.records.get(t, "out")
+                text = text if self.journal.matches(t, text) else None
+            else:
+                text = self.journal.completed_output(t)
+            if text is not None:
+                reused[i] = text
+                self._record_reused(t, text)
+        if reused:
+            cfg.log(f"[{self.stage}] journal 재사용: {len(reused)}/{len(tags)}건 완료 결과 사용", self.log_file)
+        return reused
+
+    # ✅ 재사용된 tag 도 in/out 기록 → save_all 이 이전 실행 기록을 빈 DataFrame 으로 덮어쓰지 않음
+    def _record_reused(self, tag: str, text: str):
+        if self.ledger.has(tag):
+            return
+        usage = self.journal.state.get(tag, {}).get("usage")
+        if usage:
+            self._record(tag, journal=False, **usage)
+            return
+        # usage 없는 이전 journal → 보관된 입력/출력으로 토큰 재계산
+        in_path, _, name4save, save_path, meta_data, purpose = self._tag_meta(tag)
+        prompt_text = self._read_input(tag, in_path) or ""
+        self._record(tag, self.model, count_tokens(prompt_text, self.model), count_tokens(text, self.model),
+                     name4save, save_path, meta_data, purpose, journal=False)
+
+    # ✅ pack.stages 에 포함된 스테이지 + 모든 프롬프트가 같은 prefix 공유 → 묶음 호출 대상
+    def _packable(self, prompts: list[str]) -> bool:
+        pack_cfg = cfg.get_pack_config()
+        if not pack_cfg["enabled"] or self.stage not in pack_cfg["stages"] or len(prompts) < 2:
+            return False
+        prefixes = {split_prefix(p)[0] for p in prompts}
+        return len(prefixes) == 1 and "" not in prefixes
+
+    def _task_file(self, tag: str) -> str:
+        meta = self.tag_index.get(tag)
+        return meta.name4save if meta is not None and meta.name4save else tag
+
+    @traced("llm.call_all", cat="llm")
+    def call_all(self, prompts: list[str], tags: list[str]) -> list[str | CallFailure]:
+        _check_unique_tags(tags)
+        if self.config.get("mode") == "batch":
+            return self.call_batch(prompts, tags)
+        if self._packable(prompts):
+            header = split_prefix(prompts[0])[0]
+            tasks = [(t, self._task_file(t), split_prefix(p)[1]) for p, t in zip(prompts, tags)]
+            packed = self.call_packed(header, tasks)
+            return [packed[t] for t in tags]
         results = [None] * len(prompts)
+        for i, text in self._resume(tags).items():
+            results[i] = text
+        todo = [i for i in range(len(prompts)) if results[i] is None]
+        if not todo:
+            return results
+        self.journal.mark_many([tags[i] for i in todo], PENDING)
+        idx_map = todo
+        prompts, tags = [prompts[i] for i in todo], [tags[i] for i in todo]
+
+        if self.compressor is not None:
+            with span("llm.compress", cat="tokenize", stage=self.stage, prompts=len(prompts)):
+                prompts = self.compressor.compress_batch(prompts)
+            cfg.log(self.compressor.report(), self.log_file)
+        plan = self.plan_stage(prompts, tags)
+        actions = {it.tag: it.action for it in plan.items}
+        jobs = []
+        for i, (p, t) in enumerate(zip(prompts, tags)):
+            if actions.get(t) == DROP:
+                results[idx_map[i]] = CallFailure(t, "예산 초과로 호출 생략", kind=SKIPPED)
+                continue
+            jobs.append((idx_map[i], p, t))
+        self._dispatch(jobs, results)
+        return results
 
-        if self.provider == "fireworks":
-            with ThreadPoolExecutor(max_workers=5) as executor:
+    # ✅ (결과 위치, 확정 프롬프트, tag) 목록을 설정된 동시성으로 호출 (예산 계획의 모델 변경 반영)
+    def _dispatch(self, jobs: list[tuple[int, str, str]], results: list):
+        for _, p, t in jobs:
+            self._prepared[t] = p
+        workers = self._max_workers()
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
                 futures = {
-                    executor.submit(self.call, p, tag=t): i
-                    for i, (p, t) in enumerate(zip(prompts, tags))
+                    executor.submit(self.call, p, tag=t, llm_config=self._routed_config(t)): (i, t)
+                    for i, p, t in jobs
                 }
                 for future in as_completed(futures):
-                    i = futures[future]
+                    i, t = futures[future]
                     try:
                         results[i] = future.result()
                     except Exception as e:
-                        results[i] = f"[ERROR] {e}"
+                        results[i] = failure_from(t, e)
+        else:
+            for i, p, t in jobs:
+                results[i] = self.call(p, tag=t, llm_config=self._routed_config(t))
+                time.sleep(self.config.get("interval", 2.0))
+
+    # ✅ 야간 배치 모드: 스테이지 프롬프트 전체를 배치 파일로 제출 → 완료까지 polling
+    def call_batch(self, prompts: list[str], tags: list[str],
+                   transport: BatchTransport | None = None) -> list[str | CallFailure]:
+        """
+        OpenAI batch 형식(JSONL)으로 제출 후 결과를 tag / out 파일 / in·out 기록으로 되돌림
+        - transport 는 provider 별로 선택 (user_config batch.transport / 인자로 고정 가능)
+        - Batch API 가 없는 provider(fireworks 등, 예산 계획으로 변경된 tag 포함) 는 동기 호출로 처리
+        - 이전 실행에서 제출만 된 batch 는 다시 제출하지 않고 결과만 수거
+        - 모델이 다르면(예산 계획으로 변경된 tag) 배치 파일을 모델별로 분리
+        - timeout 까지 끝나지 않은 batch 의 tag 는 batch_id 와 함께 in_flight 유지 → --resume 시 재제출 없이 수거
+        """
+        _check_unique_tags(tags)
+        batch_cfg = cfg.get_batch_config()
+        transports: dict[str, BatchTransport | None] = {}
+
+        def transport_for(provider: str) -> BatchTransport | None:
+            if transport is not None:
+                return transport
+            if provider not in transports:
+                transports[provider] = make_transport(provider, batch_cfg, self.paths["batch"])
+            return transports[provider]
+
+        results: list = [None] * len(prompts)
+        for i, text in self._resume(tags).items():
+            results[i] = text
+        pos = {t: i for i, t in enumerate(tags)}
+
+        pending_batches = {
+            self.journal.state[t]["batch_id"]: self.journal.state[t].get("provider", self.provider)
+            for i, t in enumerate(tags)
+            if results[i] is None and self.journal.state.get(t, {}).get("state") == IN_FLIGHT
+            and self.journal.state[t].get("batch_id")
+        }
+        waiting: set[str] = set()
+        for batch_id, provider in sorted(pending_batches.items()):
+            status = self._collect_batch(batch_id, transport_for(provider), pos, results, batch_cfg)
+            if status not in FINAL_STATES:
+                waiting.add(batch_id)
+
+        def still_waiting(t: str) -> bool:
+            return self.journal.state.get(t, {}).get("batch_id") in waiting
+
+        todo = [i for i in range(len(prompts)) if results[i] is None and not still_waiting(tags[i])]
+        if todo:
+            self.journal.mark_many([tags[i] for i in todo], PENDING)
+            sub_prompts, sub_tags = [prompts[i] for i in todo], [tags[i] for i in todo]
+            if self.compressor is not None:
+                sub_prompts = self.compressor.compress_batch(sub_prompts)
+                cfg.log(self.compressor.report(), self.log_file)
+            plan = self.plan_stage(sub_prompts, sub_tags)
+            actions = {it.tag: it.action for it in plan.items}
+
+            by_model: dict[str, tuple[dict, list[tuple[str, str]]]] = {}
+            sync_jobs: list[tuple[str, str, dict]] = []
+            for p, t in zip(sub_prompts, sub_tags):
+                if actions.get(t) == DROP:
+                    results[pos[t]] = CallFailure(t, "예산 초과로 호출 생략", kind=SKIPPED)
+                    continue
+                llm_cfg = self._routed_config(t) or self.config
+                if transport_for(llm_cfg["provider"][0]) is None:
+                    sync_jobs.append((t, p, llm_cfg))
+                    continue
+                by_model.setdefault(llm_cfg["model"][0], (llm_cfg, []))[1].append((t, p))
+
+            submitted = []
+            for n, (model, (llm_cfg, items)) in enumerate(by_model.items()):
+                provider = llm_cfg["provider"][0]
+                lines = []
+                for t, p in items:
+                    meta = self._tag_meta(t)
+                    self._batch_meta[t] = meta
+                    self._save_input(t, p, meta[0])
+                    lines.append(build_batch_line(t, p, llm_cfg))
+                path = write_batch_file(self.paths["batch"] / f"{self.stage}_{model}_{n}.jsonl", lines)
+                with span("llm.batch.submit", cat="network", stage=self.stage, model=model, items=len(items)):
+                    batch_id = transport_for(provider).submit(path)
+                for t, _ in items:
+                    self.journal.mark(t, IN_FLIGHT, batch_id=batch_id, model=model, provider=provider)
+                cfg.log(f"[{self.stage}] batch 제출: {batch_id} ({model}, {len(items)}건)", self.log_file)
+                submitted.append((batch_id, provider))
+
+            # batch 처리 대기 중에 Batch API 미지원 provider 분은 동기 호출
+            if sync_jobs:
+                cfg.log(f"[{self.stage}] batch 미지원 provider {sorted({c['provider'][0] for _, _, c in sync_jobs})}"
+                        f" → 동기 호출 {len(sync_jobs)}건", self.log_file)
+                for t, p, _ in sync_jobs:
+                    self._prepared[t] = p
+                with ThreadPoolExecutor(max_workers=self._max_workers()) as executor:
+                    outs = executor.map(lambda job: self.call(job[1], tag=job[0], llm_config=job[2]), sync_jobs)
+                    for (t, _, _), out in zip(sync_jobs, outs):
+                        results[pos[t]] = out
+
+            for batch_id, provider in submitted:
+                if self._collect_batch(batch_id, transport_for(provider), pos, results, batch_cfg) not in FINAL_STATES:
+                    waiting.add(batch_id)
+
+        for i, t in enumerate(tags):
+            if results[i] is not None:
+                continue
+            if still_waiting(t):
+                batch_id = self.journal.state[t]["batch_id"]
+                results[i] = CallFailure(t, f"batch {batch_id} 처리 중 (--resume 으로 결과 수거)", retryable=True)
+                continue
+            results[i] = CallFailure(t, "batch 응답 없음")
+            self.journal.mark(t, FAILED, error="batch 응답 없음")
+        if waiting:
+            cfg.log(f"[{self.stage}] 미완료 batch {len(waiting)}개 → in_flight 유지: {sorted(waiting)}", self.log_file)
+        return results
+
+    def _collect_batch(self, batch_id: str, transport: BatchTransport, pos: dict[str, int],
+                       results: list, batch_cfg: dict) -> str:
+        with span("llm.batch.wait", cat="network", stage=self.stage, batch_id=batch_id):
+            status = wait_for(transport, batch_id, batch_cfg["poll_interval"], batch_cfg["timeout"],
+                              log=self._llm_log)
+        if status != "completed":
+            cfg.log(f"[{self.stage}] batch {batch_id} 종료 상태: {status}", self.log_file)
+            return status
+        for line in transport.results(batch_id):
+            tag, text, error, usage = parse_output_line(line)
+            i = pos.get(tag)
+            if i is None or results[i] is not None:
+                continue
+            if error:
+                results[i] = CallFailure(tag, error)
+                self.journal.mark(tag, FAILED, error=error, batch_id=batch_id)
+                continue
+            model = self.journal.state.get(tag, {}).get("model", self.model)
+            in_path, out_path, name4save, save_path, meta_data, purpose = (
+                self._batch_meta.pop(tag, None) or self._tag_meta(tag)
+            )
+            self._save_output(tag, text, out_path)
+            token_in = usage.get("prompt_tokens") or self.prompt_tokens.get(tag) or 0
+            token_out = usage.get("completion_tokens") or count_tokens(text, model)
+            self._record(tag, model, token_in, token_out, name4save, save_path,
+                         f"{meta_data}|{batch_id}", purpose, discount=cfg.BATCH_DISCOUNT, cached=cached_tokens(usage))
+            results[i] = text
+        return status
+
+    # ✅ 작은 파일 여러 개를 한 요청으로 묶어서 호출
+    def call_packed(self, header: str, tasks: list[tuple[str, str, str]],
+                    groups: dict[str, list[str]] | None = None) -> dict[str, str | CallFailure]:
+        """
+        (tag, 파일명, 본문) 작업 목록을 묶음 요청으로 처리
+        - groups: StructuralGrouperV2 결과(중심 파일 → 연관 파일), 같은 그룹끼리 묶음
+        - 응답은 tag 별로 분리 → 개별 out 파일 / out_df 행으로 기록
+        - 파싱 누락 항목만 다시 묶어서 재시도, 마지막엔 단독 호출
+        - call_all 과 같은 압축 / 예산 계획 적용: 생략 대상은 SKIPPED, 모델 변경 대상은 단독 호출
+        - pack.stages 에 포함된 스테이지는 call_all 에서 자동으로 이 경로 사용
+        """
+        _check_unique_tags([t for t, _, _ in tasks])
+        pack_cfg = cfg.get_pack_config()
+        items = [PackTask(tag, file, body) for tag, file, body in tasks]
+        results: dict[str, str | CallFailure] = {}
+        reused = self._resume([t.tag for t in items])
+        results.update({items[i].tag: text for i, text in reused.items()})
+        items = [t for i, t in enumerate(items) if i not in reused]
+        if not items:
+            return results
+
+        # 압축 / 예산 계획은 단독 호출과 같은 기준 (예산 계획은 작업별 단독 프롬프트 기준 → 보수적 추정)
+        if self.compressor is not None:
+            with span("llm.compress", cat="tokenize", stage=self.stage, prompts=len(items)):
+                for t, body in zip(items, self.compressor.compress_batch([t.body for t in items])):
+                    t.body = body
+            cfg.log(self.compressor.report(), self.log_file)
+        plan = self.plan_stage([join_prefix(header, t.body) for t in items], [t.tag for t in items])
+        actions = {it.tag: it.action for it in plan.items}
+        keep, routed = [], []
+        for t in items:
+            if actions.get(t.tag) == DROP:
+                results[t.tag] = CallFailure(t.tag, "예산 초과로 호출 생략", kind=SKIPPED)
+            elif actions.get(t.tag) == DOWNGRADE:
+                routed.append(t)  # 변경된 모델로 단독 호출
+            else:
+                keep.append(t)
+
+        if pack_cfg["enabled"]:
+            packs, singles = pack_tasks(keep, header, self.model, pack_cfg["max_tokens"],
+                                        pack_cfg["small_tokens"], groups)
         else:
-            for i, (p, t) in enumerate(zip(prompts, tags)):
-                results[i] = self.call(p, tag=t)
-                time.sleep(2)
+            packs, singles = [], keep
+        singles += routed
+        cfg.log(f"[{self.stage}] 묶음 호출: {len(items)}건 → 묶음 {len(packs)}개 + 단독 {len(singles)}건",
+                self.log_file)
 
+        by_tag = {t.tag: t for t in items}
+        for attempt in range(pack_cfg["retries"] + 1):
+            missing: list[str] = []
+            for parsed, lost in self._dispatch_packs(packs, attempt):
+                results.update(parsed)
+                missing += lost
+            if not missing:
+                break
+            cfg.log(f"[{self.stage}] 묶음 응답 누락 {len(missing)}건 → 해당 항목만 재시도", self.log_file)
+            if attempt == pack_cfg["retries"]:
+                singles += [by_tag[t] for t in missing]
+                break
+            packs, extra = pack_tasks([by_tag[t] for t in missing], header, self.model,
+                                      pack_cfg["max_tokens"], pack_cfg["small_tokens"], groups)
+            singles += extra
+
+        if singles:
+            out: list = [None] * len(singles)
+            self._dispatch([(i, join_prefix(header, t.body), t.tag) for i, t in enumerate(singles)], out)
+            results.update({t.tag: r for t, r in zip(singles, out)})
         return results
 
+    def _dispatch_packs(self, packs: list[Pack], attempt: int) -> list[tuple[dict[str, str], list[str]]]:
+        workers = self._max_workers()
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(lambda x: self._call_pack(x[1], f"pack{attempt}_{x[0]}"), enumerate(packs)))
+        return [self._call_pack(p, f"pack{attempt}_{i}") for i, p in enumerate(packs)]
+
+    def _call_pack(self, pack: Pack, pack_tag: str) -> tuple[dict[str, str], list[str]]:
+        in_path = None if self.records is not None else (
+            self._get_unique_file_path(self.paths[f"{self.stage}_in"], f"in_{pack_tag}")
+        )
+        self._save_input(pack_tag, pack.prompt, in_path)
+        self.journal.mark_many(pack.tags, IN_FLIGHT)
+        try:
+            with span("llm.pack_call", cat="network", stage=self.stage, tag=pack_tag, items=len(pack.tasks)):
+                response = call_llm(pack.prompt, self.config, log=self._llm_log,
+                                    policy=self.retry_policy, budget=self.retry_budget)
+        except Exception as e:
+            cfg.log(f"[{self.stage}] [{pack_tag}] 묶음 호출 실패: {e}", self.log_file)
+            for tag in pack.tags:
+                self.journal.mark(tag, FAILED, error=str(e))
+            return {}, pack.tags
+
+        parsed, missing = split_packed_response(response, pack.tags)
+        # 입력 토큰 = 개별 본문 + 공통 헤더 균등 분배 / 출력 토큰 = 결과별 실측
+        shared_in = max(0, pack.tokens - sum(t.tokens for t in pack.tasks)) // len(pack.tasks)
+        for t in pack.tasks:
+            if t.tag not in parsed:
+                continue
+            _, out_path, name4save, save_path, meta_data, purpose = self._tag_meta(t.tag)
+            self._save_output(t.tag, parsed[t.tag], out_path)
+            self._record(t.tag, self.model, t.tokens + shared_in, count_tokens(parsed[t.tag], self.model),
+                         name4save, save_path, f"{meta_data}|{pack_tag}", purpose)
+        return parsed, missing
+
     def _get_unique_file_path(self, folder: Path, base_name: str) -> Path:
-        folder.mkdir(parents=True, exist_ok=True)
-        path = folder / f"{base_name}.txt"
-        counter = 1
-        while path.exists():
-            path = folder / f"{base_name}_{counter}.txt"
-            counter += 1
-        return path
+        return self.path_alloc.allocate(folder, base_name)
 
+    # ✅ in/out 기록도 artifact store 경유 → 같은 실행의 다음 단계는 메모리 객체 사용, Parquet 저장은 백그라운드
     def save_all(self):
-        save_df(self.in_df, self.paths["in"])
-        save_df(self.out_df, self.paths["out"])
+        # 스테이지 공유 ledger 전체를 저장 → 파일별 manager 가 각자 저장해도 다른 파일 기록이 빠지지 않음
+        with self._shared.lock:
+            in_df, out_df = self.ledger.to_frames()
+            store = get_store(self.timestamp)
+            store.put("in", in_df)
+            store.put("out", out_df)
         cfg.log(f"[{self.stage}] in/out DataFrame 저장 완료", self.log_file)
 
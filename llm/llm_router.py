@@ -1,26 +1,96 @@
 import importlib
-from typing import Optional, Callable
+import inspect
+from typing import Optional, Callable, Iterator
+
+from llm.retry import LLMCallError, RetryBudget, RetryPolicy, classify, with_retry
+from prompt.layout import split_prefix
 log: Optional[Callable] = None
 
-def call_llm(prompt: str, llm_cfg: dict, log: Optional[Callable] = None) -> str:
-    providers = llm_cfg["provider"]
-    models = llm_cfg["model"]
-    llm_param = {
+def _llm_param(llm_cfg: dict) -> dict:
+    return {
         "temperature": llm_cfg.get("temperature", 0.7),
         "top_p": llm_cfg.get("top_p", 0.9),
         "top_k": llm_cfg.get("top_k", 80),
         "max_tokens": llm_cfg.get("max_tokens", 1024)
     }
 
+def _load(model: str, attr: str):
+    module = importlib.import_module(f"llm.{model}")
+    if not hasattr(module, attr):
+        raise LLMCallError(f"'{attr}' 함수 없음 in llm.{model}")
+    return module
+
+# ✅ prefix 가 있으면 system 메시지로 분리 전달 (system 미지원 provider 는 한 덩어리로)
+def _invoke(module, fn_name: str, prompt: str, llm_param: dict):
+    fn = getattr(module, fn_name)
+    system_msg, body = split_prefix(prompt)
+    if not system_msg:
+        return fn(prompt, llm_param)
+    if "system_msg" in inspect.signature(fn).parameters:
+        return fn(body, llm_param, system_msg=system_msg)
+    return fn(f"{system_msg}\n\n{body}", llm_param)
+
+def call_llm(prompt: str, llm_cfg: dict, log: Optional[Callable] = None,
+             policy: Optional[RetryPolicy] = None, budget: Optional[RetryBudget] = None) -> str:
+    """
+    provider 순서대로 호출
+    - provider 별로 재시도 엔진(지수 백오프 + jitter) 적용
+    - 재시도 불가 오류 / 재시도 소진 시 다음 provider 로 fallback
+    - 전부 실패하면 마지막 LLMCallError 발생
+    """
+    providers = llm_cfg["provider"]
+    models = llm_cfg["model"]
+    llm_param = _llm_param(llm_cfg)
+    policy = policy or RetryPolicy()
+    last_err = LLMCallError("❌ 모든 LLM 호출 실패: fallback 실패")
+
     for provider, model in zip(providers, models):
         try:
+            module = _load(model, "call")
+            return with_retry(lambda: _invoke(module, "call", prompt, llm_param), policy, budget,
+                              log=log, label=f"{provider}:{model}")
+        except Exception as e:
+            last_err = classify(e)
+            if log:
+                log(f"⚠️ {provider}:{model} 호출 실패 → {last_err}")
+            continue
+
+    raise last_err
+
+
+# ✅ 스트리밍 호출: 첫 조각을 받기 전까지만 재시도 / 다음 provider 로 fallback
+def stream_llm(prompt: str, llm_cfg: dict, log: Optional[Callable] = None,
+               policy: Optional[RetryPolicy] = None, budget: Optional[RetryBudget] = None) -> Iterator[str]:
+    providers = llm_cfg["provider"]
+    models = llm_cfg["model"]
+    llm_param = _llm_param(llm_cfg)
+    policy = policy or RetryPolicy()
+    last_err = LLMCallError("❌ 모든 LLM 스트리밍 호출 실패: fallback 실패")
+
+    for provider, model in zip(providers, models):
+        def _open():
             module = importlib.import_module(f"llm.{model}")
-            if not hasattr(module, "call"):
-                raise AttributeError(f"'call' 함수 없음 in llm.{model}")
-            return module.call(prompt, llm_param)
+            if hasattr(module, "stream"):
+                chunks = _invoke(module, "stream", prompt, llm_param)
+            elif hasattr(module, "call"):
+                chunks = iter([_invoke(module, "call", prompt, llm_param)])
+            else:
+                raise LLMCallError(f"'stream'/'call' 함수 없음 in llm.{model}")
+            return chunks, next(chunks, None)
+
+        try:
+            chunks, first = with_retry(_open, policy, budget, log=log, label=f"{provider}:{model}")
         except Exception as e:
+            last_err = classify(e)
             if log:
-                log(f"⚠️ {provider}:{model} 호출 실패 → {e}")
+                log(f"⚠️ {provider}:{model} 스트리밍 호출 실패 → {last_err}")
             continue
+        if first is not None:
+            yield first
+        try:
+            yield from chunks
+        except Exception as e:
+            raise classify(e) from e
+        return
 
-    raise RuntimeError("❌ 모든 LLM 호출 실패: fallback 실패")
\ No newline at end of file
+    raise last_err
@@ -0,0 +1,272 @@
+import hashlib
+import re
+from collections import Counter
+
+from llm.token_counter import count_tokens, count_tokens_batch, get_encoder
+from prompt.layout import join_prefix, split_prefix
+
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@")
+FILE_HEADERS = ("--- a/", "+++ b/", "--- /dev/null", "+++ /dev/null", "diff --git ")
+IMPORT_LINE = re.compile(r"^[+\- ]?\s*(?:import\s+[\w.]+(?:\s+as\s+\w+)?|from\s+[\w.]+\s+import\s+.+)\s*$")
+
+# ✅ 예산 초과 시 잘라내는 우선순위 (숫자 작을수록 끝까지 보존)
+SECTION_PRIORITY = {"template": 0, "change": 1, "shared": 2, "structure": 3, "context": 4}
+MIN_BLOCK_CHARS = 120
+
+
+# ─────────────────────────────────────
+# 🔹 diff 단위 정리
+# ─────────────────────────────────────
+def _split_hunks(text: str) -> list[tuple[str, list[str]]]:
+    """
+    텍스트를 ("text" | "hunk", lines) 조각으로 분리
+    - '@@' 헤더로 시작하는 구간만 hunk 로 취급
+    - diff 가 아닌 일반 텍스트/파일 헤더는 "text" 로 그대로 통과
+    """
+    parts: list[tuple[str, list[str]]] = []
+    kind, cur = "text", []
+    for line in text.split("\n"):
+        if HUNK_HEADER.match(line):
+            if cur:
+                parts.append((kind, cur))
+            kind, cur = "hunk", [line]
+            continue
+        if kind == "hunk":
+            if line[:1] in {"+", "-", " ", "\\", ""} and not line.startswith(FILE_HEADERS):
+                cur.append(line)
+                continue
+            parts.append((kind, cur))
+            kind, cur = "text", []
+        cur.append(line)
+    if cur or not parts:
+        parts.append((kind, cur))
+    return parts
+
+
+def _join_hunks(parts: list[tuple[str, list[str]]]) -> str:
+    return "\n".join(line for _, lines in parts for line in lines)
+
+
+def _is_whitespace_only(hunk: list[str]) -> bool:
+    # 공백 제거 후 삭제/추가 줄이 같은 순서로 일치할 때만 (줄 순서 변경 / 빈 줄 외 변경은 보존)
+    def normalized(sign: str) -> list[str]:
+        return [n for l in hunk[1:] if l.startswith(sign) and (n := "".join(l[1:].split()))]
+
+    return normalized("-") == normalized("+")
+
+
+def strip_whitespace_hunks(text: str) -> str:
+    parts = [(k, lines) for k, lines in _split_hunks(text) if not (k == "hunk" and _is_whitespace_only(lines))]
+    return _join_hunks(parts)
+
+
+def collapse_context(text: str, keep: int = 2) -> str:
+    """
+    hunk 내부의 변경 없는 context 줄(' ')이 길게 이어지면
+    앞/뒤 keep 줄만 남기고 가운데는 한 줄 요약으로 대체
+    """
+    parts = []
+    for kind, hunk in _split_hunks(text):
+        if kind != "hunk":
+            parts.append((kind, hunk))
+            continue
+        body, run = [hunk[0]], []
+        for line in hunk[1:] + [None]:
+            if line is not None and line.startswith(" "):
+                run.append(line)
+                continue
+            if len(run) > keep * 2 + 1:
+                body += run[:keep] + [f" … ({len(run) - keep * 2} unchanged lines)"] + run[-keep:]
+            else:
+                body += run
+            run = []
+            if line is not None:
+                body.append(line)
+        parts.append((kind, body))
+    return _join_hunks(parts)
+
+
+# ─────────────────────────────────────
+# 🔹 그룹 단위 중복 제거
+# ─────────────────────────────────────
+def _ref_id(block: str) -> str:
+    # 내용 기반 참조 ID → 실행/순서가 바뀌어도 동일 (prefix cache 에도 유리)
+    return "R" + hashlib.sha1(block.encode("utf-8")).hexdigest()[:8]
+
+
+def _blocks(text: str) -> list[str]:
+    return [b for b in re.split(r"\n\s*\n", text) if len(b) >= MIN_BLOCK_CHARS]
+
+
+def dedupe_group(texts: dict[str, str]) -> tuple[dict[str, str], str]:
+    """
+    같은 그룹(한 요청에 함께 들어갈 파일들)의 중복 제거
+    - 2개 이상 파일에 반복되는 import 줄 → 공통 블록으로 이동
+    - 2개 이상 파일에 동일한 문단(boilerplate) → [[REF:Rxxxxxxxx]] 로 치환
+    - 반환: (파일별 본문, 공통 참조 블록)
+    """
+    if len(texts) < 2:
+        return dict(texts), ""
+
+    import_counts = Counter()
+    block_counts = Counter()
+    for text in texts.values():
+        import_counts.update({l.lstrip("+- ").strip() for l in text.split("\n") if IMPORT_LINE.match(l)})
+        block_counts.update(set(_blocks(text)))
+
+    shared_imports = sorted(k for k, v in import_counts.items() if v >= 2)
+    shared_blocks = sorted((b for b, v in block_counts.items() if v >= 2), key=_ref_id)
+    shared_set = set(shared_imports)
+
+    result = {}
+    for key, text in texts.items():
+        for block in shared_blocks:
+            text = text.replace(block, f"[[REF:{_ref_id(block)}]]")
+        lines = [
+            l for l in text.split("\n")
+            if not (IMPORT_LINE.match(l) and l.lstrip("+- ").strip() in shared_set and l[:1] != "-")
+        ]
+        result[key] = "\n".join(lines)
+
+    shared = []
+    if shared_imports:
+        shared.append("[COMMON IMPORTS]\n" + "\n".join(shared_imports))
+    for block in shared_blocks:
+        shared.append(f"[REF:{_ref_id(block)}]\n{block}")
+    return result, "\n\n".join(shared)
+
+
+def elide_repeats(text: str) -> str:
+    # ✅ 한 프롬프트 안에서 같은 문단이 반복되면 두 번째부터 참조로 치환
+    seen = set()
+    out = []
+    for part in re.split(r"(\n\s*\n)", text):
+        if len(part) >= MIN_BLOCK_CHARS and part in seen:
+            out.append(f"[[SAME AS {_ref_id(part)}]]")
+            continue
+        if len(part) >= MIN_BLOCK_CHARS:
+            seen.add(part)
+            out.append(f"[{_ref_id(part)}]\n{part}" if text.count(part) > 1 else part)
+            continue
+        out.append(part)
+    return "".join(out)
+
+
+# ─────────────────────────────────────
+# 🔹 토큰 예산 맞춤
+# ─────────────────────────────────────
+def truncate_tokens(text: str, budget: int, model: str) -> str:
+    if budget <= 0:
+        return ""
+    enc = get_encoder(model)
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= budget:
+        return text
+    marker = "\n… (truncated)"
+    keep = max(0, budget - len(enc.encode(marker)))
+    return enc.decode(tokens[:keep]) + marker
+
+
+def text_sections(text: str, has_prefix: bool) -> list[tuple[str, str]]:
+    """
+    문자열 프롬프트 본문 → (섹션명, 본문) 목록 (예산 절단용)
+    - diff hunk → 'change'
+    - 그 밖의 텍스트 → prefix 가 있으면 'context' (지시문은 prefix 에 있음), 없으면 'template' (지시문 보존)
+    """
+    other = "context" if has_prefix else "template"
+    return [("change" if kind == "hunk" else other, "\n".join(lines)) for kind, lines in _split_hunks(text)]
+
+
+def trim_to_budget(sections: list[tuple[str, str]], budget: int, model: str, sep: str = "\n\n") -> str:
+    """
+    (섹션명, 본문) 목록을 토큰 예산에 맞춰 결합
+    - SECTION_PRIORITY 순서(동률이면 원래 순서)로 예산을 배분 → 결정적
+    - 예산을 넘는 섹션은 앞부분만 남기고, 이후 섹션은 제외
+    - 출력 순서는 원래 섹션 순서 유지
+    """
+    counts = count_tokens_batch([body for _, body in sections], model)
+    order = sorted(range(len(sections)), key=lambda i: (SECTION_PRIORITY.get(sections[i][0], 9), i))
+    kept: dict[int, str] = {}
+    remaining = budget
+    for i in order:
+        name, body = sections[i]
+        if counts[i] <= remaining:
+            kept[i] = body
+            remaining -= counts[i]
+        elif remaining > 0:
+            kept[i] = truncate_tokens(body, remaining, model)
+            remaining = 0
+    return sep.join(kept[i] for i in sorted(kept) if kept[i])
+
+
+# ─────────────────────────────────────
+# 🔹 스테이지 단위 압축기
+# ─────────────────────────────────────
+class PromptCompressor:
+    def __init__(self, stage: str, model: str, target_tokens: int | None = None, context_lines: int = 2):
+        self.stage = stage
+        self.model = model
+        self.target_tokens = target_tokens
+        self.context_lines = context_lines
+        self.stats = {"prompts": 0, "tokens_before": 0, "tokens_after": 0, "truncated": 0}
+
+    def _compress_text(self, text: str) -> str:
+        # 고정 prefix 는 그대로 두고 (cache 적중 유지) 가변 본문만 압축
+        prefix, text = split_prefix(text)
+        text = strip_whitespace_hunks(text)
+        text = collapse_context(text, keep=self.context_lines)
+        return join_prefix(prefix, elide_repeats(text))
+
+    def compress(self, prompt: str | list[tuple[str, str]]) -> str:
+        return self.compress_batch([prompt])[0]
+
+    def compress_batch(self, prompts: list[str | list[tuple[str, str]]]) -> list[str]:
+        """
+        프롬프트 묶음 압축
+        - 문자열: diff 정리 후 예산 초과 시 prefix 는 그대로 두고 본문을 섹션(hunk / 지시문·맥락)으로 나눠 배분
+        - (섹션명, 본문) 목록: 'change' 섹션만 diff 정리, 우선순위 기반 예산 배분
+        """
+        raw, results = [], []
+        for p in prompts:
+            if isinstance(p, str):
+                raw.append(p)
+                results.append(self._compress_text(p))
+            else:
+                raw.append("\n\n".join(body for _, body in p))
+                sections = [(n, self._compress_text(b) if n == "change" else b) for n, b in p]
+                results.append(sections)
+
+        after = [r if isinstance(r, str) else "\n\n".join(b for _, b in r) for r in results]
+        after_counts = count_tokens_batch(after, self.model)
+        for i, n in enumerate(after_counts):
+            if not self.target_tokens or n <= self.target_tokens:
+                continue
+            r = results[i]
+            after[i] = (
+                self._trim_text(r) if isinstance(r, str)
+                else trim_to_budget(r, self.target_tokens, self.model)
+            )
+            after_counts[i] = count_tokens(after[i], self.model)
+            self.stats["truncated"] += 1
+
+        self.stats["prompts"] += len(prompts)
+        self.stats["tokens_before"] += sum(count_tokens_batch(raw, self.model))
+        self.stats["tokens_after"] += sum(after_counts)
+        return after
+
+    def _trim_text(self, text: str) -> str:
+        # 문자열 프롬프트도 섹션 우선순위로 절단 (뒤쪽 지시문이 잘려 나가지 않도록)
+        prefix, body = split_prefix(text)
+        budget = self.target_tokens - (count_tokens(join_prefix(prefix, ""), self.model) if prefix else 0)
+        if budget <= 0:
+            return truncate_tokens(text, self.target_tokens, self.model)
+        return join_prefix(prefix, trim_to_budget(text_sections(body, bool(prefix)), budget, self.model, sep="\n"))
+
+    def report(self) -> str:
+        before, after = self.stats["tokens_before"], self.stats["tokens_after"]
+        saved = before - after
+        ratio = round(saved / before * 100, 1) if before else 0.0
+        return (
+            f"🗜️ [{self.stage}] 프롬프트 압축: {self.stats['prompts']}개, "
+            f"{before} → {after} 토큰 (-{saved}, {ratio}%), 예산 절단 {self.stats['truncated']}건"
+        )
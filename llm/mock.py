@@ -0,0 +1,166 @@
+"""
+과금 없는 로컬 mock provider (벤치마크 / 오프라인 재현용)
+- user_config.yml 의 llm.<stage>: provider ["mock"], model ["mock"] 로 선택
+- mock: 섹션으로 지연 분포 / 오류율 / 429 burst / 재생(replay) 세그먼트 설정
+- 응답: replay 세그먼트에 같은 프롬프트가 있으면 기록된 응답, 없으면 합성 응답
+"""
+import hashlib
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+from config.setting import cfg
+from llm.result import LLMText
+from prompt.layout import join_prefix
+
+DEFAULTS = {
+    "latency": {"dist": "lognormal", "median": 0.5, "sigma": 0.5, "min": 0.0, "max": 30.0},
+    "error_rate": 0.0,
+    "burst_429": {"every": 0, "length": 0, "retry_after": None},
+    "replay": None,
+    "output_words": 120,
+    "seed": None,
+}
+
+
+class MockHTTPError(Exception):
+    # requests / openai 예외처럼 status_code, response.headers 제공 → llm.retry.classify 가 그대로 분류
+    def __init__(self, status_code: int, retry_after: float | None = None):
+        super().__init__(f"mock HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("MockResponse", (), {
+            "status_code": status_code,
+            "headers": {"retry-after": str(retry_after)} if retry_after is not None else {},
+        })()
+
+
+class MockBackend:
+    def __init__(self, conf: dict | None = None, seed: int | None = None):
+        conf = conf or {}
+        self.conf = {**DEFAULTS, **conf}
+        for key in ("latency", "burst_429"):
+            self.conf[key] = {**DEFAULTS[key], **(conf.get(key) or {})}
+        self.rng = random.Random(seed if seed is not None else self.conf.get("seed"))
+        self._lock = threading.Lock()
+        self._replay: dict[str, str] | None = None
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.errors: dict[int, int] = {}
+
+    # ─────────────────────────────────────
+    # 🔹 지연 / 오류 주입
+    # ─────────────────────────────────────
+    def latency(self) -> float:
+        lat = self.conf["latency"]
+        dist = lat.get("dist", "lognormal")
+        with self._lock:
+            if dist == "fixed":
+                value = lat.get("median", 0.5)
+            elif dist == "uniform":
+                value = self.rng.uniform(lat.get("min", 0.1), lat.get("max", 1.0))
+            else:
+                value = self.rng.lognormvariate(0, lat.get("sigma", 0.5)) * lat.get("median", 0.5)
+        return min(max(value, lat.get("min", 0.0)), lat.get("max", 60.0))
+
+    def _fault(self, n: int) -> MockHTTPError | None:
+        burst = self.conf.get("burst_429") or {}
+        every, length = burst.get("every", 0), burst.get("length", 0)
+        if every and length and n % every < length:
+            return MockHTTPError(429, burst.get("retry_after"))
+        with self._lock:
+            roll = self.rng.random()
+        if roll < self.conf.get("error_rate", 0.0):
+            return MockHTTPError(self.rng.choice([500, 502, 503]))
+        return None
+
+    def _enter(self) -> int:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return self.calls
+
+    def _leave(self, err: MockHTTPError | None = None):
+        with self._lock:
+            self.in_flight -= 1
+            if err is not None:
+                self.errors[err.status_code] = self.errors.get(err.status_code, 0) + 1
+
+    # ─────────────────────────────────────
+    # 🔹 응답 (replay → 합성)
+    # ─────────────────────────────────────
+    def _load_replay(self) -> dict[str, str]:
+        if self._replay is None:
+            self._replay = {}
+            path = self.conf.get("replay")
+            if path and Path(path).exists():
+                from llm.in_and_out import SegmentReader
+                with SegmentReader(Path(path)) as reader:
+                    prompts = {}
+                    for rec in reader.replay():
+                        if rec["kind"] == "in":
+                            prompts[rec["tag"]] = _key(rec["text"])
+                        elif rec["tag"] in prompts:
+                            self._replay[prompts[rec["tag"]]] = rec["text"]
+        return self._replay
+
+    def respond(self, prompt: str, llm_param: dict) -> str:
+        recorded = self._load_replay().get(_key(prompt))
+        if recorded is not None:
+            return recorded
+        n_words = min(llm_param.get("max_tokens", 1024), self.conf.get("output_words", 120))
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        words = [digest[i % 56:i % 56 + 8] for i in range(n_words)]
+        return f"mock: {digest[:12]}\n\n" + " ".join(words)
+
+    def call(self, prompt: str, llm_param: dict) -> LLMText:
+        n = self._enter()
+        err = self._fault(n)
+        try:
+            time.sleep(self.latency() if err is None else self.latency() * 0.1)
+            if err is not None:
+                raise err
+            text = self.respond(prompt, llm_param)
+        finally:
+            self._leave(err)
+        return LLMText(text, {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4})
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "max_in_flight": self.max_in_flight, "errors": dict(self.errors)}
+
+
+def _key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+_backend: MockBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def configure(conf: dict | None = None, seed: int | None = None) -> MockBackend:
+    # 벤치마크에서 설정 교체 (None 이면 user_config.yml 의 mock 섹션)
+    global _backend
+    with _backend_lock:
+        _backend = MockBackend(conf if conf is not None else cfg.get_user_config().get("mock"), seed)
+        return _backend
+
+
+def backend() -> MockBackend:
+    return _backend if _backend is not None else configure()
+
+
+def call(prompt: str, llm_param: dict, system_msg: str = "") -> str:
+    return backend().call(join_prefix(system_msg, prompt), llm_param)
+
+
+# ✅ 스트리밍: 합성 응답을 단어 단위 조각으로 나눠 yield
+def stream(prompt: str, llm_param: dict, system_msg: str = "") -> Iterator[str]:
+    text = call(prompt, llm_param, system_msg)
+    words = text.split(" ")
+    for i, word in enumerate(words):
+        yield word if i == len(words) - 1 else word + " "
+    yield LLMText("", text.usage)
@@ -0,0 +1,55 @@
+import os
+import threading
+from pathlib import Path
+
+
+class PathAllocator:
+    """
+    스테이지 단위 파일 경로 할당기
+    - 폴더는 처음 한 번만 스캔, 이후는 메모리 카운터로 이름 결정 (stat 호출 없음)
+    - lock 안에서 이름 확정 → 스레드 간 같은 파일명 경쟁 없음
+    - 이름 규칙은 기존과 동일: base.txt, base_1.txt, base_2.txt ...
+    """
+
+    def __init__(self, suffix: str = ".txt"):
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._taken: dict[Path, set[str]] = {}
+        self._next: dict[tuple[Path, str], int] = {}
+
+    def _scan(self, folder: Path) -> set[str]:
+        taken = self._taken.get(folder)
+        if taken is None:
+            folder.mkdir(parents=True, exist_ok=True)
+            taken = {p.name for p in folder.iterdir()}
+            self._taken[folder] = taken
+        return taken
+
+    def allocate(self, folder: Path, base_name: str) -> Path:
+        with self._lock:
+            taken = self._scan(folder)
+            n = self._next.get((folder, base_name), 0)
+            while True:
+                name = f"{base_name}{self.suffix}" if n == 0 else f"{base_name}_{n}{self.suffix}"
+                n += 1
+                if name not in taken:
+                    break
+            self._next[(folder, base_name)] = n
+            taken.add(name)
+            return folder / name
+
+
+def temp_path_for(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+# ✅ 임시 파일에 쓰고 rename → 중간까지 쓴 응답이 완성본처럼 보이지 않음
+def atomic_write_text(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = temp_path_for(path)
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,117 @@
+import re
+from dataclasses import dataclass
+
+from llm.minimize_token import dedupe_group
+from llm.token_counter import count_tokens, count_tokens_batch
+
+RESULT_BLOCK = re.compile(r"<<<RESULT id=\"(?P<id>[^\"]+)\">>>\n?(?P<body>.*?)\n?<<<END RESULT>>>", re.S)
+
+FORMAT_RULES = (
+    "Several files are given below, each wrapped in <<<FILE id=\"...\">>> ... <<<END FILE>>>.\n"
+    "Handle every file independently and answer for EACH file with exactly one block:\n"
+    "<<<RESULT id=\"<same id>\">>>\n<your answer for that file>\n<<<END RESULT>>>\n"
+    "Do not merge files, do not skip any id, and write nothing outside the blocks."
+)
+
+
+@dataclass
+class PackTask:
+    tag: str
+    file: str
+    body: str
+    tokens: int = 0
+
+
+@dataclass
+class Pack:
+    tasks: list[PackTask]
+    prompt: str = ""
+    tokens: int = 0
+
+    @property
+    def tags(self) -> list[str]:
+        return [t.tag for t in self.tasks]
+
+
+def _group_order(tasks: list[PackTask], groups: dict[str, list[str]] | None) -> list[PackTask]:
+    """
+    StructuralGrouperV2 그룹(중심 파일 → 연관 파일)을 기준으로 같은 그룹 파일을 인접 배치
+    - 파일은 처음 등장한 그룹에 소속
+    - 그룹 정보 없으면 원래 순서 유지
+    """
+    if not groups:
+        return list(tasks)
+    group_of: dict[str, int] = {}
+    for gi, (center, related) in enumerate(groups.items()):
+        for f in [center, *related]:
+            group_of.setdefault(str(f), gi)
+    fallback = len(groups)
+    indexed = list(enumerate(tasks))
+    indexed.sort(key=lambda x: (group_of.get(x[1].file, fallback + x[0]), x[0]))
+    return [t for _, t in indexed]
+
+
+def build_packed_prompt(header: str, tasks: list[PackTask]) -> str:
+    bodies, shared = dedupe_group({t.tag: t.body for t in tasks})
+    parts = [header.strip(), FORMAT_RULES]
+    if shared:
+        parts.append(f"<<<SHARED>>>\n{shared}\n<<<END SHARED>>>")
+    for t in tasks:
+        parts.append(f"<<<FILE id=\"{t.tag}\" name=\"{t.file}\">>>\n{bodies[t.tag]}\n<<<END FILE>>>")
+    return "\n\n".join(parts)
+
+
+def pack_tasks(tasks: list[PackTask], header: str, model: str, max_tokens: int,
+               small_tokens: int, groups: dict[str, list[str]] | None = None) -> tuple[list[Pack], list[PackTask]]:
+    """
+    작은 파일 작업을 토큰 예산 내에서 하나의 요청으로 묶음
+    - small_tokens 초과 작업은 묶지 않고 단독 처리 대상으로 반환
+    - 그룹 순서대로 first-fit (남은 예산에 들어가는 첫 묶음에 배치, 없으면 새 묶음)
+      → 같은 그룹은 대체로 같은/앞쪽 묶음에 모이고, 뒤에 오는 작은 작업이 앞 묶음의 빈자리를 채움
+    - 반환: (묶음 목록, 단독 처리 작업 목록)
+    """
+    counts = count_tokens_batch([t.body for t in tasks], model)
+    for t, n in zip(tasks, counts):
+        t.tokens = n
+
+    base = count_tokens(f"{header.strip()}\n\n{FORMAT_RULES}", model)
+    per_item = 24  # FILE/RESULT 구분자 오버헤드 근사치
+    singles = [t for t in tasks if t.tokens > small_tokens]
+    bins: list[list[PackTask]] = []
+    loads: list[int] = []
+    for t in _group_order([t for t in tasks if t.tokens <= small_tokens], groups):
+        need = t.tokens + per_item
+        for i, load in enumerate(loads):
+            if load + need <= max_tokens:
+                bins[i].append(t)
+                loads[i] += need
+                break
+        else:
+            bins.append([t])
+            loads.append(base + need)
+    packs = [Pack(b) for b in bins]
+
+    # 1건짜리 묶음은 단독 처리가 더 저렴
+    singles += [p.tasks[0] for p in packs if len(p.tasks) == 1]
+    packs = [p for p in packs if len(p.tasks) > 1]
+    for p in packs:
+        p.prompt = build_packed_prompt(header, p.tasks)
+    for p, n in zip(packs, count_tokens_batch([p.prompt for p in packs], model)):
+        p.tokens = n
+    return packs, singles
+
+
+def split_packed_response(text: str, tags: list[str]) -> tuple[dict[str, str], list[str]]:
+    """
+    묶음 응답을 tag 별 결과로 분리
+    - 알 수 없는 id, 빈 결과는 무시
+    - 반환: (tag → 결과, 누락 tag 목록)
+    """
+    wanted = set(tags)
+    results: dict[str, str] = {}
+    for m in RESULT_BLOCK.finditer(text or ""):
+        tag, body = m.group("id"), m.group("body").strip()
+        if tag in wanted and body and tag not in results:
+            results[tag] = body
+    missing = [t for t in tags if t not in results]
+    return results, missing
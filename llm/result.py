@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+
+ERROR, SKIPPED = "error", "skipped"
+
+
+@dataclass(frozen=True)
+class CallFailure:
+    """
+    LLM 호출 실패 결과 (문자열 "[ERROR] ..." 대체)
+    - bool 값은 False → `if result:` 로 정상 응답만 골라낼 수 있음
+    - str() 은 기존 로그 형식 유지
+    """
+    tag: str
+    error: str
+    status: int | None = None
+    retryable: bool = False
+    attempts: int = 0
+    kind: str = ERROR
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __str__(self) -> str:
+        return f"[{self.kind.upper()}] {self.error}"
+
+
+class LLMText(str):
+    """
+    provider 응답 텍스트 (str 그대로 사용 가능)
+    - usage: provider 가 돌려준 토큰 사용량 (prompt_tokens / completion_tokens / prompt_tokens_details)
+    """
+    usage: dict
+
+    def __new__(cls, text: str, usage: dict | None = None):
+        obj = super().__new__(cls, text)
+        obj.usage = usage or {}
+        return obj
+
+
+def usage_of(result) -> dict:
+    return getattr(result, "usage", None) or {}
+
+
+# ✅ prefix cache 적중 토큰 수 (OpenAI / Fireworks 공통: prompt_tokens_details.cached_tokens)
+def cached_tokens(usage: dict) -> int:
+    details = usage.get("prompt_tokens_details") or {}
+    return int(details.get("cached_tokens") or usage.get("cached_tokens") or 0)
+
+
+def is_failure(result) -> bool:
+    return isinstance(result, CallFailure)
+
+
+def failure_from(tag: str, exc: BaseException) -> CallFailure:
+    return CallFailure(
+        tag=tag,
+        error=str(exc),
+        status=getattr(exc, "status", None),
+        retryable=getattr(exc, "retryable", False),
+        attempts=getattr(exc, "attempts", 0),
+    )
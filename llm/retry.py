@@ -0,0 +1,117 @@
+import random
+import threading
+import time
+from typing import Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+
+class LLMCallError(Exception):
+    """
+    provider 호출 실패 공통 예외
+    - status: HTTP 상태코드 (없으면 None)
+    - retryable: 재시도 의미 있는 오류인지 (timeout / 429 / 5xx)
+    - retry_after: 서버가 알려준 대기 시간(초)
+    """
+
+    def __init__(self, message: str, status: int | None = None, retryable: bool = False,
+                 retry_after: float | None = None, attempts: int = 0):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.attempts = attempts
+
+
+def _status_of(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after_of(exc: BaseException) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(exc: BaseException) -> LLMCallError:
+    """
+    provider 별 예외 → LLMCallError 로 정규화
+    - requests / openai SDK 모두 status_code, 예외 이름 기준으로 판단
+    - timeout / 연결 오류 / 429 / 5xx → 재시도
+    - 그 외 4xx(인증, 잘못된 요청), 설정 오류(ValueError 등) → 즉시 실패
+    """
+    if isinstance(exc, LLMCallError):
+        return exc
+    status = _status_of(exc)
+    name = type(exc).__name__
+    if status is not None:
+        retryable = status in RETRYABLE_STATUS
+    else:
+        retryable = (
+            isinstance(exc, (TimeoutError, ConnectionError))
+            or any(key in name for key in ("Timeout", "Connection", "ChunkedEncoding", "RateLimit"))
+        )
+    return LLMCallError(f"{name}: {exc}", status=status, retryable=retryable, retry_after=_retry_after_of(exc))
+
+
+class RetryBudget:
+    # ✅ 스테이지 전체에서 허용할 재시도 횟수 (스레드 공유)
+    def __init__(self, total: int | None = None):
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.total is not None and self.used >= self.total:
+                return False
+            self.used += 1
+            return True
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    # full jitter: [0, min(cap, base × 2^n)] 균등 분포
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            return min(self.max_delay, max(backoff, retry_after))
+        return backoff
+
+
+def with_retry(fn: Callable[[], T], policy: RetryPolicy, budget: RetryBudget | None = None,
+               log: Optional[Callable] = None, label: str = "", sleep: Callable[[float], None] = time.sleep) -> T:
+    """
+    fn 을 정책에 따라 재시도
+    - 재시도 불가 오류 / 시도 횟수 소진 / 스테이지 예산 소진 시 LLMCallError 발생
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn()
+        except Exception as e:
+            err = classify(e)
+            err.attempts = attempt
+            if not err.retryable or attempt >= policy.max_attempts:
+                raise err from e
+            if budget is not None and not budget.take():
+                if log:
+                    log(f"⚠️ {label} 재시도 예산 소진 → 중단 ({err})")
+                raise err from e
+            wait = policy.delay(attempt - 1, err.retry_after)
+            if log:
+                log(f"🔁 {label} 재시도 {attempt}/{policy.max_attempts - 1} ({err.status or '-'}) → {wait:.2f}s 대기")
+            sleep(wait)
@@ -0,0 +1,138 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from llm.path_allocator import temp_path_for
+from llm.result import LLMText
+from llm.token_counter import count_tokens
+
+
+def iter_sse_content(response) -> Iterator[str]:
+    """
+    OpenAI 호환 SSE(chat.completions, stream=True) 응답에서 텍스트 조각만 추출
+    - 'data: {...}' 줄 단위 파싱, 'data: [DONE]' 에서 종료
+    - usage 가 실린 조각은 빈 LLMText(usage=...) 로 전달
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        try:
+            obj = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if obj.get("usage"):
+            yield LLMText("", obj["usage"])
+        choices = obj.get("choices") or []
+        if not choices:
+            continue
+        content = (choices[0].get("delta") or {}).get("content")
+        if content:
+            yield content
+
+
+class LLMStream:
+    """
+    스트리밍 응답 iterator
+    - 조각이 도착하는 즉시 임시 파일에 기록 (진행 중 응답 확인 / 중단 시 정리)
+    - 완료 시 out_path 로 rename → 중간 상태 파일이 완성본처럼 보이지 않음
+    - first_line(): 첫 줄이 도착하면 바로 반환, 이후 iteration 은 이어서 진행
+    - token_out: 완료 시 provider usage(completion_tokens) 우선, 없으면 최종 텍스트 기준 1회 계산
+    - result(): 끝까지 받은 뒤 받은 조각을 이어 반환 (파일 재읽기 없음, keep_file=False 면 파일 삭제)
+    """
+
+    def __init__(self, chunks: Iterable[str], out_path: Path, model: str,
+                 on_complete: Callable[[str, int, dict], None] | None = None, keep_file: bool = True):
+        self._chunks = iter(chunks)
+        self.out_path = out_path
+        self.model = model
+        self.on_complete = on_complete
+        self.keep_file = keep_file
+        self.token_out = 0
+        self.usage: dict = {}
+        self.done = False
+        self._pending: list[str] = []
+        self._parts: list[str] = []
+        self._fh = None
+        self._tmp_path = temp_path_for(out_path)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self._pending:
+            return self._pending.pop(0)
+        return self._pull()
+
+    def _pull(self) -> str:
+        if self.done:
+            raise StopIteration
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._finish()
+            raise
+        except Exception:
+            self._abort()
+            raise
+        if getattr(chunk, "usage", None):
+            self.usage = chunk.usage
+        if not chunk:
+            return chunk
+        if self._fh is None:
+            self.out_path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self._tmp_path.open("w", encoding="utf-8")
+        self._fh.write(chunk)
+        self._fh.flush()
+        self._parts.append(chunk)
+        return chunk
+
+    def _close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def _finish(self):
+        self.done = True
+        self._close()
+        if not self._tmp_path.exists():
+            self.out_path.parent.mkdir(parents=True, exist_ok=True)
+            self._tmp_path.write_text("", encoding="utf-8")
+        os.replace(self._tmp_path, self.out_path)
+        text = self.text
+        self.token_out = self.usage.get("completion_tokens") or count_tokens(text, self.model)
+        if self.on_complete:
+            self.on_complete(text, self.token_out, self.usage)
+
+    def _abort(self):
+        # 중간 실패한 응답은 완성본처럼 보이지 않도록 제거
+        self.done = True
+        self._close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    @property
+    def text(self) -> str:
+        # 지금까지 받은 전체 텍스트
+        return "".join(self._parts)
+
+    def first_line(self) -> str:
+        buf = "".join(self._pending)
+        while "\n" not in buf.lstrip("\n") and not self.done:
+            try:
+                chunk = self._pull()
+            except StopIteration:
+                break
+            self._pending.append(chunk)
+            buf += chunk
+        return buf.lstrip("\n").split("\n", 1)[0].strip()
+
+    def result(self) -> str:
+        for _ in self:
+            pass
+        text = self.text
+        if not self.keep_file:
+            self.out_path.unlink(missing_ok=True)
+        return text
@@ -0,0 +1,65 @@
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
+
+import pandas as pd
+
+
+@dataclass(frozen=True, slots=True)
+class TagMeta:
+    in_path: Path | None
+    out_path: Path | None
+    save_path: tuple[str, ...] | None
+    name4save: str | None
+    meta_data: str | None
+    purpose: str | None
+
+
+def _is_missing(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _column(df: pd.DataFrame, name: str) -> list:
+    return df[name].tolist() if name in df.columns else [None] * len(df)
+
+
+def build_tag_index(df_for_call: pd.DataFrame | None) -> Mapping[str, TagMeta]:
+    """
+    df_for_call → tag 별 메타정보 인덱스 (생성 후 변경 불가)
+    - 같은 id 가 여러 번 나오면 첫 행 사용 (기존 동작 유지)
+    - save_path 는 [in 경로, out 경로, ...] 형식만 허용, 아니면 즉시 ValueError
+    """
+    if df_for_call is None or "id" not in df_for_call.columns:
+        return MappingProxyType({})
+
+    index: dict[str, TagMeta] = {}
+    errors = []
+    rows = zip(
+        df_for_call["id"].tolist(), _column(df_for_call, "save_path"), _column(df_for_call, "name4save"),
+        _column(df_for_call, "meta data"), _column(df_for_call, "purpose"),
+    )
+    for tag, save_path, name4save, meta_data, purpose in rows:
+        if tag in index:
+            continue
+        in_path = out_path = None
+        if not _is_missing(save_path):
+            if (not isinstance(save_path, (list, tuple)) or len(save_path) < 2
+                    or not all(isinstance(p, (str, Path)) for p in save_path)):
+                errors.append(f"{tag}: save_path={save_path!r}")
+                continue
+            save_path = tuple(str(p) for p in save_path)
+            in_path, out_path = Path(save_path[0]), Path(save_path[1])
+        else:
+            save_path = None
+        index[tag] = TagMeta(
+            in_path, out_path, save_path,
+            None if _is_missing(name4save) else name4save,
+            None if _is_missing(meta_data) else meta_data,
+            None if _is_missing(purpose) else purpose,
+        )
+
+    if errors:
+        raise ValueError(f"df_for_call save_path 형식 오류 {len(errors)}건: " + "; ".join(errors[:10]))
+    return MappingProxyType(index)
@@ -0,0 +1,102 @@
+import functools
+import re
+import threading
+
+import tiktoken
+
+# ✅ 모델 → 토크나이저 계열 매핑
+# - gpt-4o 계열은 o200k_base
+# - llama4 계열은 tiktoken 기반 BPE(약 200k vocab) → tiktoken에 전용 vocab이 없어 o200k_base로 근사
+# - 그 외(gpt-4 등)는 cl100k_base
+TOKENIZER_FAMILY = {
+    "gpt-4o": "o200k_base",
+    "llama4-maverick-instruct-basic": "o200k_base",
+    "llama4-scout-instruct-basic": "o200k_base",
+}
+DEFAULT_ENCODING = "cl100k_base"
+BATCH_THREADS = 8
+
+
+def get_encoding_name(model: str) -> str:
+    if model in TOKENIZER_FAMILY:
+        return TOKENIZER_FAMILY[model]
+    if model.startswith("llama4"):
+        return "o200k_base"
+    if _offline:
+        return DEFAULT_ENCODING
+    try:
+        return tiktoken.encoding_for_model(model).name
+    except KeyError:
+        return DEFAULT_ENCODING
+
+
+# ✅ 오프라인 근사 인코더 (벤치마크 / 네트워크 없는 환경용)
+# - tiktoken 은 처음 쓸 때 BPE vocab 파일을 내려받음 → 사전 토큰화 조각 1개 = 토큰 1개로 근사
+# - decode 가능 (조각 ↔ id 사전), encode / encode_batch / decode 인터페이스는 tiktoken 과 동일
+PRETOKEN = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|_+|\s+(?!\S)|\s+")
+
+
+class OfflineEncoding:
+    def __init__(self, name: str):
+        self.name = f"offline:{name}"
+        self._ids: dict[str, int] = {}
+        self._pieces: list[str] = []
+        self._lock = threading.Lock()
+
+    def _id(self, piece: str) -> int:
+        token = self._ids.get(piece)
+        if token is None:
+            with self._lock:
+                token = self._ids.setdefault(piece, len(self._pieces))
+                if token == len(self._pieces):
+                    self._pieces.append(piece)
+        return token
+
+    def encode(self, text: str, **_) -> list[int]:
+        return [self._id(piece) for piece in PRETOKEN.findall(text)]
+
+    def encode_batch(self, texts: list[str], num_threads: int = BATCH_THREADS, **_) -> list[list[int]]:
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(self._pieces[t] for t in tokens)
+
+
+_offline = False
+
+
+def use_offline_encoder(enabled: bool = True):
+    # 이후 생성되는 인코더를 오프라인 근사 인코더로 교체 (이미 만든 인코더 캐시는 비움)
+    global _offline
+    _offline = enabled
+    _get_encoding.cache_clear()
+
+
+# ✅ 프로세스 전역 인코더 캐시 (encoding 이름 단위로 1회만 생성)
+@functools.lru_cache(maxsize=None)
+def _get_encoding(name: str) -> tiktoken.Encoding | OfflineEncoding:
+    return OfflineEncoding(name) if _offline else tiktoken.get_encoding(name)
+
+
+def get_encoder(model: str) -> tiktoken.Encoding | OfflineEncoding:
+    return _get_encoding(get_encoding_name(model))
+
+
+def count_tokens(text: str, model: str) -> int:
+    if not text:
+        return 0
+    return len(get_encoder(model).encode(text, disallowed_special=()))
+
+
+def count_tokens_batch(texts: list[str], model: str, num_threads: int = BATCH_THREADS) -> list[int]:
+    """
+    프롬프트 묶음 전체 토큰 수를 한 번에 계산
+    - tiktoken encode_batch(스레드 병렬) 사용
+    - 입력 순서 그대로 반환
+    """
+    if not texts:
+        return []
+    enc = get_encoder(model)
+    encoded = enc.encode_batch(list(texts), num_threads=num_threads, disallowed_special=())
+    return [len(tokens) for tokens in encoded]
+
@@ -0,0 +1,177 @@
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from config.setting import cfg
+from config.tracing import span
+
+# ✅ 산출물별 필수 컬럼 (처음 put 할 때 한 번만 검증)
+SCHEMAS: dict[str, tuple[str, ...]] = {
+    "repo": ("Diff list",),
+    "strategy": ("File", "Importance", "path"),
+}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def _signature(df: pd.DataFrame) -> tuple:
+    return tuple(zip(df.columns, map(str, df.dtypes)))
+
+
+class ArtifactStore:
+    """
+    실행(run) 단위 DataFrame 저장소
+    - 같은 프로세스 안에서는 메모리 객체를 그대로 넘김 (pickle 왕복 없음)
+    - put 과 동시에 백그라운드 스레드가 Parquet 로 저장 (내구성 / 단계별 재실행용)
+    - 같은 이름을 연달아 put 하면 마지막 버전만 기록
+    - get: 메모리 → results/<ts>/df/<name>_df.parquet → 기존 .pkl 순으로 조회
+      (store 를 거치지 않은 단계가 파일을 새로 쓰면 mtime 비교로 감지해 다시 읽음)
+    - 스키마(필수 컬럼)는 이름별 첫 put 에서만 검증, 이후는 컬럼/dtype 서명이 같으면 생략
+    """
+
+    def __init__(self, timestamp: str, base_dir: Path | None = None):
+        base_dir = base_dir or cfg.RESULTS_DIR
+        self.timestamp = timestamp
+        self.df_dir = base_dir / timestamp / "df"
+        self.legacy = cfg.get_results_path(timestamp, base_dir)
+        self._mem: dict[str, tuple[pd.DataFrame, float]] = {}  # name → (df, 기준 시각)
+        self._own_writes: dict[Path, float] = {}  # store 가 직접 기록한 파일 → mtime
+        self._signatures: dict[str, tuple] = {}
+        self._versions: dict[str, int] = {}
+        self._pending: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"artifacts-{timestamp}")
+
+    def path_for(self, name: str) -> Path:
+        return self.df_dir / f"{name}_df.parquet"
+
+    def pickle_path_for(self, name: str) -> Path:
+        # 기존 .pkl 산출물 경로가 있으면 그대로, 없으면(in / out 등 parquet 전용) df/<name>_df.pkl
+        legacy = self.legacy.get(name)
+        return legacy if legacy is not None and legacy.suffix == ".pkl" else self.df_dir / f"{name}_df.pkl"
+
+    def validate(self, name: str, df: pd.DataFrame):
+        sig = _signature(df)
+        if self._signatures.get(name) == sig:
+            return
+        missing = [c for c in SCHEMAS.get(name, ()) if c not in df.columns]
+        if missing:
+            raise SchemaError(f"{name}_df 필수 컬럼 누락: {missing}")
+        self._signatures[name] = sig
+
+    def put(self, name: str, df: pd.DataFrame, persist: bool = True) -> pd.DataFrame:
+        self.validate(name, df)
+        with self._lock:
+            self._mem[name] = (df, time.time())
+            version = self._versions.get(name, 0) + 1
+            self._versions[name] = version
+            if persist:
+                self._pending[name] = self._pool.submit(self._persist, name, df, version)
+        return df
+
+    def _persist(self, name: str, df: pd.DataFrame, version: int):
+        if self._versions.get(name) != version:
+            return  # 더 최신 버전이 대기 중 → 중간 버전은 건너뜀
+        path = self.path_for(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with span("artifacts.persist", cat="io", artifact=name, rows=len(df)):
+            try:
+                df.to_parquet(tmp, index=False)
+            except Exception as e:
+                # list/object 혼합 컬럼 등 Arrow 변환 불가 → pickle 로 대체
+                tmp.unlink(missing_ok=True)
+                pkl = self.pickle_path_for(name)
+                pkl_tmp = pkl.with_name(f".{pkl.name}.tmp")
+                df.to_pickle(pkl_tmp)
+                with self._lock:
+                    os.replace(pkl_tmp, pkl)
+                    self._own_writes[pkl] = pkl.stat().st_mtime
+                    # 이전 버전 parquet 가 남아 있으면 다음 실행이 오래된 내용을 읽음 → 삭제
+                    path.unlink(missing_ok=True)
+                    self._own_writes.pop(path, None)
+                cfg.log(f"⚠️ {name}_df Parquet 저장 실패 → pickle 저장 ({e})", cfg.init_log_file(self.timestamp))
+                return
+            with self._lock:
+                os.replace(tmp, path)
+                self._own_writes[path] = path.stat().st_mtime
+
+    def _latest_external(self, name: str) -> tuple[float, Path | None]:
+        # store 밖에서 기록된 가장 최근 파일 (parquet / .pkl), 호출 측에서 lock 보유 → 형식은 확장자로 구분
+        latest: tuple[float, Path | None] = (0.0, None)
+        for path in (self.path_for(name), self.pickle_path_for(name)):
+            if not path.exists():
+                continue
+            mtime = path.stat().st_mtime
+            if self._own_writes.get(path) == mtime:
+                continue
+            if mtime > latest[0]:
+                latest = (mtime, path)
+        return latest
+
+    def get(self, name: str) -> pd.DataFrame | None:
+        with self._lock:
+            entry = self._mem.get(name)
+            mtime, path = self._latest_external(name)
+        # 메모리 객체가 디스크보다 최신이면 그대로 사용
+        if entry is not None and (path is None or mtime <= entry[1]):
+            return entry[0]
+        if path is None:
+            return None
+        df = pd.read_parquet(path) if path.suffix == ".parquet" else pd.read_pickle(path)
+        self.validate(name, df)
+        with self._lock:
+            self._mem[name] = (df, mtime)
+        return df
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def flush(self):
+        # 대기 중인 Parquet 기록 완료까지 대기
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.result()
+
+    def close(self):
+        self.flush()
+        self._pool.shutdown(wait=True)
+
+
+_stores: dict[str, ArtifactStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(timestamp: str | None = None) -> ArtifactStore:
+    timestamp = timestamp or cfg.get_timestamp()
+    with _stores_lock:
+        store = _stores.get(timestamp)
+        if store is None:
+            store = _stores[timestamp] = ArtifactStore(timestamp)
+        return store
+
+
+def release_store(timestamp: str):
+    # 실행 종료 후 메모리 해제 (daemon 모드: 실행마다 store 가 쌓이지 않도록)
+    with _stores_lock:
+        store = _stores.pop(timestamp, None)
+    if store is not None:
+        store.close()
+
+
+@atexit.register
+def close_all():
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.close()
@@ -0,0 +1,228 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from config.tracing import span
+
+_STOP = object()
+DONE, SKIPPED, FAILED = "done", "skipped", "failed"
+
+
+@dataclass
+class StageSpec:
+    """
+    DAG 노드 1개
+    - fn(item, ctx) → 결과 (ctx: 앞 단계 결과 {stage: result})
+    - None 반환 시 해당 item 은 이후 단계 생략 (필터)
+    - batch=True: 앞 단계가 모든 item 을 끝낸 뒤 fn(items, ctxs) 한 번 실행 (업로드 등)
+    """
+    name: str
+    fn: Callable[..., Any]
+    after: tuple[str, ...] = ()
+    workers: int = 1
+    queue_size: int = 8
+    batch: bool = False
+
+
+@dataclass
+class DagResult:
+    ctx: dict[Any, dict[str, Any]] = field(default_factory=dict)
+    status: dict[Any, dict[str, str]] = field(default_factory=dict)
+    errors: dict[tuple[Any, str], str] = field(default_factory=dict)
+    stage_time: dict[str, float] = field(default_factory=dict)
+    wall: float = 0.0
+
+    def failed(self) -> list[tuple[Any, str]]:
+        return list(self.errors)
+
+
+class PipelineDAG:
+    """
+    파일 단위로 단계를 흘려보내는 DAG 실행기
+    - 단계마다 bounded queue + 전용 worker 수 → 느린 단계가 앞 단계를 자연스럽게 늦춤 (backpressure)
+    - item 은 의존 단계가 모두 끝나는 즉시 다음 단계로 이동 (단계 전체 완료를 기다리지 않음)
+    - 실패/생략 item 은 하위 단계 전부 생략 처리 → 나머지 item 은 계속 진행
+    """
+
+    def __init__(self, log: Callable[[str], None] | None = None):
+        self.stages: dict[str, StageSpec] = {}
+        self.log = log
+
+    def add(self, name: str, fn: Callable[..., Any], after: tuple[str, ...] | list[str] = (),
+            workers: int = 1, queue_size: int = 8, batch: bool = False) -> "PipelineDAG":
+        if name in self.stages:
+            raise ValueError(f"중복 단계: {name}")
+        self.stages[name] = StageSpec(name, fn, tuple(after), max(1, workers), max(1, queue_size), batch)
+        return self
+
+    def order(self) -> list[str]:
+        # 위상 정렬 + 의존성 검증
+        for spec in self.stages.values():
+            unknown = [d for d in spec.after if d not in self.stages]
+            if unknown:
+                raise ValueError(f"알 수 없는 선행 단계: {spec.name} ← {unknown}")
+        ordered, visiting, visited = [], set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"순환 의존성: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].after:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return ordered
+
+    def run(self, items: list[Any]) -> DagResult:
+        order = self.order()
+        children: dict[str, list[str]] = {n: [] for n in order}
+        for n in order:
+            for dep in self.stages[n].after:
+                children[dep].append(n)
+
+        result = DagResult()
+        lock = threading.Lock()
+        queues = {n: queue.Queue(maxsize=self.stages[n].queue_size) for n in order if not self.stages[n].batch}
+        pending_deps: dict[tuple[Any, str], int] = {}
+        batch_ready: dict[str, list[Any]] = {n: [] for n in order if self.stages[n].batch}
+        remaining = {n: len(items) for n in order}
+        all_done = threading.Event()
+        for item in items:
+            result.ctx[item] = {}
+            result.status[item] = {}
+            for n in order:
+                pending_deps[(item, n)] = len(self.stages[n].after)
+        if not items:
+            all_done.set()
+
+        def resolve(item: Any, name: str, state: str, value: Any = None):
+            # item 의 한 단계 종료 → 하위 단계 준비 여부 갱신
+            # - 일괄 단계 도착 기록과 실행 여부 판단은 remaining 감소와 같은 lock 안에서
+            #   (다른 스레드가 remaining == 0 을 먼저 보고 일부 item 만으로 실행하지 않도록)
+            ready, skipped = [], []
+            with lock:
+                result.status[item][name] = state
+                if state == DONE:
+                    result.ctx[item][name] = value
+                remaining[name] -= 1
+                for child in children[name]:
+                    if child in result.status[item]:
+                        continue  # 다른 선행 단계 실패로 이미 생략됨
+                    if state != DONE:
+                        result.status[item][child] = SKIPPED
+                        skipped.append(child)
+                        continue
+                    pending_deps[(item, child)] -= 1
+                    if pending_deps[(item, child)] == 0:
+                        if self.stages[child].batch:
+                            batch_ready[child].append(item)
+                        else:
+                            ready.append(child)
+                release = self._take_batches(batch_ready, remaining)
+                if not any(remaining.values()):
+                    all_done.set()
+            for child in skipped:
+                resolve(item, child, SKIPPED)
+            for child in ready:
+                queues[child].put(item)
+            for batch_name, taken in release:
+                run_batch(batch_name, taken)
+
+        def run_batch(name: str, ready_items: list[Any]):
+            spec = self.stages[name]
+            t0 = time.perf_counter()
+            try:
+                with span(f"dag.{name}", cat="pipeline", items=len(ready_items)):
+                    value = spec.fn(ready_items, [result.ctx[i] for i in ready_items])
+                state = DONE
+            except Exception as e:
+                value, state = None, FAILED
+                with lock:
+                    for i in ready_items:
+                        result.errors[(i, name)] = f"{type(e).__name__}: {e}"
+                if self.log:
+                    self.log(f"❌ [{name}] 일괄 단계 실패: {e}")
+            with lock:
+                result.stage_time[name] = result.stage_time.get(name, 0.0) + time.perf_counter() - t0
+            for i in ready_items:
+                resolve(i, name, state, value)
+
+        def worker(name: str):
+            spec = self.stages[name]
+            q = queues[name]
+            while True:
+                item = q.get()
+                if item is _STOP:
+                    return
+                t0 = time.perf_counter()
+                try:
+                    with span(f"dag.{name}", cat="pipeline", item=str(item)):
+                        value = spec.fn(item, result.ctx[item])
+                    state = DONE if value is not None else SKIPPED
+                except Exception as e:
+                    value, state = None, FAILED
+                    with lock:
+                        result.errors[(item, name)] = f"{type(e).__name__}: {e}"
+                    if self.log:
+                        self.log(f"❌ [{name}] {item} 실패: {e}")
+                with lock:
+                    result.stage_time[name] = result.stage_time.get(name, 0.0) + time.perf_counter() - t0
+                resolve(item, name, state, value)
+
+        threads = [
+            threading.Thread(target=worker, args=(n,), name=f"dag-{n}-{k}", daemon=True)
+            for n in queues for k in range(self.stages[n].workers)
+        ]
+        for t in threads:
+            t.start()
+
+        t_start = time.perf_counter()
+        roots = [n for n in order if not self.stages[n].after]
+
+        def feed():
+            for item in items:
+                for n in roots:
+                    if self.stages[n].batch:
+                        with lock:
+                            batch_ready[n].append(item)
+                            release = self._take_batches(batch_ready, remaining)
+                        for batch_name, taken in release:
+                            run_batch(batch_name, taken)
+                    else:
+                        queues[n].put(item)
+
+        feeder = threading.Thread(target=feed, name="dag-feeder", daemon=True)
+        feeder.start()
+        all_done.wait()
+        feeder.join()
+        for n, q in queues.items():
+            for _ in range(self.stages[n].workers):
+                q.put(_STOP)
+        for t in threads:
+            t.join()
+        result.wall = time.perf_counter() - t_start
+        return result
+
+    # ─────────────────────────────────────
+    # 🔹 일괄(batch) 단계: 앞 단계가 모든 item 을 끝낸 뒤 한 번 실행
+    # ─────────────────────────────────────
+    def _take_batches(self, batch_ready, remaining) -> list[tuple[str, list[Any]]]:
+        # 호출 측이 lock 을 잡은 상태에서만 사용 → 실행할 묶음을 꺼내고 대기열 비움
+        taken = []
+        for name, ready_items in batch_ready.items():
+            spec = self.stages[name]
+            if not ready_items or any(remaining[d] for d in spec.after):
+                continue
+            if not spec.after and len(ready_items) < remaining[name]:
+                continue
+            taken.append((name, list(ready_items)))
+            ready_items.clear()
+        return taken
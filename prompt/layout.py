@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from config.setting import cfg
+from prompt.template_engine import CompiledTemplate, get_registry
+
+PREFIX_END = "\n<<<END PREFIX>>>\n"
+CHANGE_REF = {"en": "the change given below", "ko": "변경 내용"}
+
+
+# ─────────────────────────────────────
+# 🔹 고정 prefix / 가변 본문 분리
+# ─────────────────────────────────────
+def load_template(language: str, name: str) -> CompiledTemplate:
+    return get_registry().get(language, name)
+
+
+def _normalize(text: str) -> str:
+    # 줄바꿈 / 줄 끝 공백 정규화 → 같은 입력이면 항상 같은 바이트열
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def build_prefix(template: CompiledTemplate, structure: tuple[list[str], list[str]] | None = None,
+                 style_rules: list[str] | None = None) -> str:
+    """
+    템플릿 지시문 + 저장소 구조 + 스타일 규칙 → byte-stable prefix
+    - 컴파일된 템플릿의 {change} 자리는 '아래 변경 내용' 참조로 채우고 실제 diff 는 prefix 뒤에 배치
+    - 타임스탬프 등 실행마다 달라지는 값은 넣지 않음 (provider prompt cache 적중 조건)
+    """
+    values = {"change": CHANGE_REF.get(template.language, CHANGE_REF["en"])} if "change" in template.fields else {}
+    parts = [_normalize(template.render(**values))]
+    if structure:
+        folder_lines, file_lines = structure
+        parts.append("[STRUCTURE]\n" + "\n".join(folder_lines) + "\n" + "\n".join(file_lines))
+    if style_rules:
+        parts.append("[STYLE]\n" + "\n".join(f"- {rule}" for rule in style_rules))
+    return "\n\n".join(parts)
+
+
+def split_prefix(prompt: str) -> tuple[str, str]:
+    """
+    PREFIX_END 기준으로 (system 메시지, user 메시지) 분리
+    - 구분자가 없으면 기존 방식 그대로 user 메시지만 사용
+    """
+    prefix, sep, body = prompt.partition(PREFIX_END)
+    return (prefix, body) if sep else ("", prompt)
+
+
+def join_prefix(prefix: str, body: str) -> str:
+    return f"{prefix}{PREFIX_END}{body}" if prefix else body
+
+
+class PromptLayout:
+    """
+    스테이지 프롬프트 빌더
+    - prefix(템플릿/구조/스타일)는 한 번만 만들고 모든 파일이 같은 바이트열을 공유
+    - 파일별 diff / 맥락은 항상 prefix 뒤에 붙임 → provider prefix cache 재사용
+    """
+
+    def __init__(self, template: CompiledTemplate, structure: tuple[list[str], list[str]] | None = None,
+                 style_rules: list[str] | None = None):
+        self.language = template.language
+        self.prefix = build_prefix(template, structure, style_rules)
+
+    @classmethod
+    def from_config(cls, base_path: Path | None = None, style_rules: list[str] | None = None) -> "PromptLayout":
+        template = get_registry().select()
+        structure = cfg.build_llm_file_structure(base_path) if base_path else None
+        return cls(template, structure, style_rules)
+
+    def render(self, change: str, context: str = "") -> str:
+        body = _normalize(change)
+        if context:
+            body = f"{_normalize(context)}\n\n{body}"
+        return join_prefix(self.prefix, body)
+
+    def render_all(self, changes: list[str]) -> list[str]:
+        return [self.render(c) for c in changes]
@@ -0,0 +1,95 @@
+import functools
+from pathlib import Path
+from string import Formatter
+
+from config.setting import cfg
+
+TEMPLATE_DIR = cfg.BASE_DIR / "template"
+LANGUAGES = ("en", "ko")
+
+
+class CompiledTemplate:
+    """
+    미리 파싱된 템플릿
+    - 본문을 고정 문자열 / placeholder 조각 목록으로 한 번만 분해
+    - render 는 조각 join 만 수행 (파일 I/O, 재파싱 없음)
+    """
+
+    __slots__ = ("language", "name", "source", "segments", "slots", "fields")
+
+    def __init__(self, language: str, name: str, source: str):
+        self.language = language
+        self.name = name
+        self.source = source
+        segments, slots = [], []
+        try:
+            parsed = list(Formatter().parse(source))
+        except ValueError as e:
+            raise ValueError(f"템플릿 파싱 실패: {language}/{name} ({e})") from e
+        for literal, field, spec, conversion in parsed:
+            if literal:
+                segments.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"지원하지 않는 placeholder: {language}/{name} {{{field}}}")
+            slots.append((len(segments), field))
+            segments.append("")
+        self.segments = tuple(segments)
+        self.slots = tuple(slots)
+        self.fields = frozenset(f for _, f in slots)
+
+    def render(self, **values: str) -> str:
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"템플릿 값 누락: {self.language}/{self.name} {sorted(missing)}")
+        out = list(self.segments)
+        for pos, field in self.slots:
+            out[pos] = values[field]
+        return "".join(out)
+
+
+class TemplateRegistry:
+    """
+    template/<language>/<name>.txt 전체를 시작 시 한 번 로딩 + 검증 + 컴파일
+    - key: (language, name)
+    - 언어별로 빠진 템플릿은 missing() 으로 확인
+    """
+
+    def __init__(self, root: Path = TEMPLATE_DIR, languages: tuple[str, ...] = LANGUAGES):
+        self.root = root
+        self.templates: dict[tuple[str, str], CompiledTemplate] = {}
+        for language in languages:
+            for path in sorted((root / language).glob("*.txt")):
+                source = path.read_text(encoding="utf-8")
+                self.templates[(language, path.stem)] = CompiledTemplate(language, path.stem, source)
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def names(self, language: str) -> list[str]:
+        return sorted(name for lang, name in self.templates if lang == language)
+
+    def missing(self) -> dict[str, list[str]]:
+        all_names = {name for _, name in self.templates}
+        languages = {lang for lang, _ in self.templates}
+        gaps = {lang: sorted(all_names - set(self.names(lang))) for lang in languages}
+        return {lang: names for lang, names in gaps.items() if names}
+
+    def get(self, language: str, name: str) -> CompiledTemplate:
+        try:
+            return self.templates[(language, name)]
+        except KeyError:
+            raise KeyError(f"템플릿 없음: {language}/{name} (사용 가능: {self.names(language)})") from None
+
+    # ✅ user_config.yml 의 style.language.commit / style.style.commit_final 로 선택
+    def select(self, user_config: dict | None = None) -> CompiledTemplate:
+        style = (user_config or cfg.get_user_config()).get("style", {})
+        language = style.get("language", {}).get("commit", "en")
+        name = style.get("style", {}).get("commit_final", "internal")
+        return self.get(language, name)
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry(root: Path = TEMPLATE_DIR) -> TemplateRegistry:
+    return TemplateRegistry(root)
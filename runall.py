@@ -1,13 +1,42 @@
 # runall.py (중복 load_df 제거 최종 완성본)
+import importlib
+import inspect
 import sys
+from pathlib import Path
+from typing import Callable
 from config.setting import cfg
-from scripts.dataframe import load_df
-from scripts.ext_info import extract_all_info
-from scripts.mm_gen import mm_gen_main
-from scripts.fst_mapper import fst_mapper_main
-from scripts.fx_elab import fx_elab_main
-from scripts.gen_msg import gen_msg_main
-from scripts.upload import upload_main
+from config.tracing import traced, tracer
+from pipeline.dag import PipelineDAG
+
+# ✅ 단계 모듈은 실제로 실행할 때만 import
+# - python runall.py upload 가 다른 단계의 pandas / libcst / tiktoken / openai 로딩 비용을 내지 않도록
+STAGES = {
+    "extract": ("scripts.ext_info", "extract_all_info"),
+    "strategy": ("scripts.mm_gen", "mm_gen_main"),
+    "classify": ("scripts.fst_mapper", "fst_mapper_main"),
+    "explain": ("scripts.fx_elab", "fx_elab_main"),
+    "commit_msg": ("scripts.gen_msg", "gen_msg_main"),
+    "upload": ("scripts.upload", "upload_main"),
+}
+# ✅ DAG 에서 파일마다 실행하는 단계 (files=[file] 진입점 필요)
+PER_FILE_STAGES = ("strategy", "classify", "explain", "commit_msg")
+# 단계 → 반환 DataFrame 을 담을 산출물 이름 (뒤 단계 결과가 앞 단계 결과를 대체)
+STAGE_ARTIFACTS = {"extract": "repo", "strategy": "strategy", "classify": "strategy"}
+
+
+def load_stage(name: str) -> Callable:
+    module, fn = STAGES[name]
+    return getattr(importlib.import_module(module), fn)
+
+
+def supports_per_file(name: str) -> bool:
+    return "files" in inspect.signature(load_stage(name)).parameters
+
+
+def _is_frame(value) -> bool:
+    # pandas 가 이미 로딩된 경우에만 확인 (DataFrame 을 반환한 단계가 있으면 로딩돼 있음)
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(value, pd.DataFrame)
 
 
 class RunAllPipeline:
@@ -15,59 +44,97 @@ class RunAllPipeline:
         self.timestamp = cfg.get_timestamp()
         self.paths = cfg.get_results_path(self.timestamp)
         self.log_file = cfg.init_log_file(self.timestamp)
+        self._store = None
         self.strategy_df = None
         cfg.log(f"🚀 RunAll 시작: {self.timestamp}", self.log_file)
 
+    # ✅ artifact store(pandas) 도 처음 쓸 때 로딩
+    @property
+    def store(self):
+        if self._store is None:
+            from pipeline.artifacts import get_store
+            self._store = get_store(self.timestamp)
+        return self._store
+
+    # ✅ 단계 실행 → 반환한 DataFrame 은 store 에 put (다음 단계는 pickle 왕복 없이 메모리 객체 사용)
+    def _run_stage(self, name: str, **kwargs):
+        out = load_stage(name)(**kwargs)
+        artifact = STAGE_ARTIFACTS.get(name)
+        if artifact and _is_frame(out):
+            self.store.put(artifact, out)
+        return out
+
+    @traced("runall.extract", cat="pipeline")
     def run_extract(self) -> bool:
         cfg.log("📦 1단계: Git 변경 정보 수집 시작", self.log_file)
-        updated = extract_all_info()
+        updated = self._run_stage("extract")
+        if _is_frame(updated):
+            updated = not updated.empty
         if not updated:
             cfg.log("🛑 변경된 파일 없음 → 전체 파이프라인 중단", self.log_file)
             return False
         cfg.log("✅ Git 정보 수집 완료", self.log_file)
         return True
 
+    @traced("runall.strategy", cat="pipeline")
     def run_strategy(self) -> bool:
         try:
             cfg.log("🧠 2단계: 전략 예측 시작", self.log_file)
-            mm_gen_main()
+            self._run_stage("strategy")
             cfg.log("✅ 전략 예측 완료", self.log_file)
-            self.strategy_df = load_df(self.paths["strategy"])
+            self.strategy_df = self.store.get("strategy")
             return True
         except Exception as e:
             cfg.log(f"❌ 전략 예측 실패: {e}", self.log_file)
             return False
 
+    @traced("runall.classify", cat="pipeline")
     def run_classify(self):
         if self.strategy_df is None or self.strategy_df.empty:
             cfg.log("⚠️ strategy_df 없음 또는 비어있음 → 분류 생략", self.log_file)
             return
         try:
             cfg.log("📊 3단계: 파일 전략 분류 시작", self.log_file)
-            fst_mapper_main()
+            self._run_stage("classify")
             cfg.log("✅ 파일 전략 분류 완료", self.log_file)
+            self.strategy_df = self.store.get("strategy")
         except Exception as e:
             cfg.log(f"❌ 파일 전략 분류 실패: {e}", self.log_file)
 
+    @traced("runall.explain", cat="pipeline")
+    def run_explain(self):
+        if self.strategy_df is None or self.strategy_df.empty:
+            cfg.log("⚠️ strategy_df 없음 또는 비어있음 → 기능 설명 생략", self.log_file)
+            return
+        try:
+            cfg.log("📝 4단계: 기능 설명 생성 시작", self.log_file)
+            self._run_stage("explain")
+            cfg.log("✅ 기능 설명 생성 완료", self.log_file)
+        except Exception as e:
+            cfg.log(f"❌ 기능 설명 생성 실패: {e}", self.log_file)
+
+    @traced("runall.commit_msg", cat="pipeline")
     def run_commit_msg(self):
         if self.strategy_df is None or self.strategy_df[self.strategy_df["Importance"] > 3].empty:
             cfg.log("⚠️ 커밋 메시지 대상 없음 → 생략", self.log_file)
             return
         try:
             cfg.log("✉️ 5단계: 커밋 메시지 생성 시작", self.log_file)
-            gen_msg_main()
+            self._run_stage("commit_msg")
             cfg.log("✅ 커밋 메시지 생성 완료", self.log_file)
         except Exception as e:
             cfg.log(f"❌ 커밋 메시지 생성 실패: {e}", self.log_file)
 
+    @traced("runall.upload", cat="pipeline")
     def run_upload(self):
         try:
             cfg.log("☁️ 6단계: 커밋 및 업로드 시작", self.log_file)
-            upload_main()
+            self._run_stage("upload")
             cfg.log("✅ 커밋 및 업로드 완료", self.log_file)
         except Exception as e:
             cfg.log(f"❌ 업로드 실패: {e}", self.log_file)
 
+    @traced("runall.all", cat="pipeline")
     def run_all(self):
         if not self.run_extract():
             return
@@ -79,15 +146,126 @@ class RunAllPipeline:
         self.run_upload()
         cfg.log("🎯 전체 파이프라인 종료", self.log_file)
 
+    @traced("runall.dag", cat="pipeline")
+    def run_dag(self, only: set[str] | None = None):
+        """
+        파일 단위 DAG 실행
+        - extract 는 전체 한 번 → 변경 파일 목록 확보
+        - strategy → (classify, explain) → commit_msg 는 파일마다 독립적으로 진행
+          (한 파일의 전략 예측이 끝나면 다른 파일 분류 중에도 바로 다음 단계 시작)
+        - upload 는 모든 파일의 commit_msg 가 끝난 뒤 한 번 (단일 push)
+        - 단계 함수는 files=[file] 로 해당 파일만 처리하고 결과(DataFrame)를 반환
+          (공유 산출물 pickle 은 쓰지 않음 → upload 직전에 파일별 결과를 합쳐 store 에 한 번 put)
+        - 파일별 LLMManager 는 같은 스테이지끼리 journal / 호출 기록 / 예산 계획을 공유
+          (스테이지 예산은 파일별이 아닌 스테이지 누적, save_all 은 스테이지 전체 in/out 저장)
+        - files 진입점이 없는 단계가 있으면 파일마다 단계 전체가 다시 돌게 되므로 run_all 로 대체
+        - only: 지정 시 변경 파일 중 해당 파일만 진행 (daemon 증분 실행)
+        """
+        missing = [name for name in PER_FILE_STAGES if not supports_per_file(name)]
+        if missing:
+            cfg.log(f"⚠️ 파일 단위 진입점(files 인자) 없는 단계: {missing} → 전체 순차 실행으로 대체", self.log_file)
+            self.run_all()
+            return
+        if not self.run_extract():
+            return
+        files = list(self.store.get("repo")["Diff list"].iloc[0])
+        if only is not None:
+            files = [f for f in files if Path(f).as_posix() in only]
+        pipe_cfg = cfg.get_pipeline_config()
+        workers, qsize = pipe_cfg["workers"], pipe_cfg["queue_size"]
+
+        def per_file(fn):
+            def step(file, ctx):
+                out = fn(files=[file])
+                return file if out is None else out
+            return step
+
+        upload_main = load_stage("upload")
+
+        def upload(items, ctxs):
+            self._put_merged(ctxs)
+            return upload_main()
+
+        dag = PipelineDAG(log=lambda m: cfg.log(m, self.log_file))
+        dag.add("strategy", per_file(load_stage("strategy")), workers=workers.get("strategy", 4), queue_size=qsize)
+        dag.add("classify", per_file(load_stage("classify")), after=["strategy"],
+                workers=workers.get("classify", 2), queue_size=qsize)
+        dag.add("explain", per_file(load_stage("explain")), after=["strategy"],
+                workers=workers.get("explain", 4), queue_size=qsize)
+        dag.add("commit_msg", per_file(load_stage("commit_msg")), after=["classify", "explain"],
+                workers=workers.get("commit_msg", 4), queue_size=qsize)
+        dag.add("upload", upload, after=["commit_msg"], batch=True)
+
+        cfg.log(f"🧭 DAG 실행 시작: 파일 {len(files)}개", self.log_file)
+        result = dag.run(files)
+        self.strategy_df = self.store.get("strategy")
+        stage_time = ", ".join(f"{k} {round(v, 2)}s" for k, v in result.stage_time.items())
+        cfg.log(f"🎯 DAG 실행 종료 ({round(result.wall, 2)}s, 실패 {len(result.errors)}건 / 단계 누적: {stage_time})",
+                self.log_file)
+
+    # ✅ 파일별 단계 결과 → 산출물별로 합쳐 store 에 put (파일마다 마지막으로 만든 단계 결과 사용)
+    def _put_merged(self, ctxs: list[dict]):
+        merged: dict[str, list] = {}
+        for ctx in ctxs:
+            latest = {}
+            for stage, value in ctx.items():
+                artifact = STAGE_ARTIFACTS.get(stage)
+                if artifact and _is_frame(value):
+                    latest[artifact] = value
+            for artifact, df in latest.items():
+                merged.setdefault(artifact, []).append(df)
+        if not merged:
+            return
+        import pandas as pd
+
+        for artifact, frames in merged.items():
+            self.store.put(artifact, pd.concat(frames, ignore_index=True))
+
+    # ✅ 실행 trace 저장 (chrome://tracing / ui.perfetto.dev 에서 열기)
+    def export_trace(self):
+        if self._store is not None:
+            self._store.flush()
+        path = tracer.export(self.paths["trace"])
+        if path:
+            top = ", ".join(f"{name} {sec}s" for name, _, sec in tracer.summary(5))
+            cfg.log(f"⏱️ trace 저장: {path} (상위 구간: {top})", self.log_file)
+
+
+def apply_resume(args: list[str]) -> list[str]:
+    """
+    --resume [timestamp] 처리
+    - timestamp 생략 시 results/ 의 가장 최근 실행을 이어받음
+    - 같은 results/<timestamp>/journal 을 재사용 → 완료된 tag 는 다시 호출하지 않음
+    """
+    if "--resume" not in args:
+        return args
+    i = args.index("--resume")
+    rest = args[:i] + args[i + 1:]
+    timestamp = None
+    if i < len(args) - 1 and args[i + 1][:1].isdigit():
+        timestamp = args[i + 1]
+        rest = args[:i] + args[i + 2:]
+    timestamp = timestamp or cfg.latest_timestamp()
+    if timestamp:
+        cfg.set_timestamp(timestamp)
+        print(f"🔁 이전 실행 이어받기: {timestamp}")
+    else:
+        print("⚠️ 이어받을 실행 기록 없음 → 새 실행")
+    return rest
+
 
 if __name__ == "__main__":
+    args = apply_resume(sys.argv[1:])
     runner = RunAllPipeline()
-    if len(sys.argv) == 1:
-        runner.run_all()
-    else:
-        step = sys.argv[1]
-        method = getattr(runner, f"run_{step}", None)
-        if callable(method):
-            method()
+    try:
+        if not args:
+            runner.run_all()
         else:
-            print(f"❌ 지원되지 않는 실행 단계: {step}")
+            step = args[0]
+            method = getattr(runner, f"run_{step}", None)
+            if callable(method):
+                method()
+            else:
+                print(f"❌ 지원되지 않는 실행 단계: {step}")
+    finally:
+        runner.export_trace()
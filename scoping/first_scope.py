@@ -1,9 +1,13 @@
-import subprocess, yaml, statistics
+import os, subprocess, yaml, statistics
+from datetime import date
 from pathlib import Path
 from collections import defaultdict
 
+from config.tracing import counter, span, traced
+
 USER_CONFIG_PATH = Path("config/user_config.yml")
 
+@traced("scoping.get_changed_files", cat="git")
 def get_changed_files() -> list[str]:
     """
     git status 기반으로 변경된 파일 중
@@ -57,6 +61,7 @@ def get_changed_files() -> list[str]:
     return changed
 from pathlib import Path
 
+@traced("scoping.get_all_py_files", cat="fs")
 def get_all_py_files_in_repo(root: Path = Path(".")) -> list[str]:
     """
     레포 전체에서 유효한 .py 파일 경로를 재귀적으로 탐색
@@ -77,6 +82,58 @@ def get_all_py_files_in_repo(root: Path = Path(".")) -> list[str]:
 
     return py_files
 
+# ✅ 파일별 git 이력 캐시: 파일 → (HEAD, 날짜, (최근 5일 커밋 수, 작성자 수))
+# - 한 번 실행에서는 효과 없음 / daemon 모드에서는 실행 사이 유지
+# - HEAD 가 바뀌어도 그 사이 커밋이 건드리지 않은 파일은 그대로 재사용 (업로드 커밋마다 전부 무효화되지 않도록)
+# - 파일당 항목 1개 → 실행이 쌓여도 크기는 레포 파일 수 이내
+_HISTORY_CACHE: dict[str, tuple[str, str, tuple[int, int]]] = {}
+
+
+def get_head() -> str:
+    result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def _history_file(f: str) -> str:
+    # git diff --relative 출력과 같은 형식 (실행 위치 기준 posix 경로)
+    return Path(os.path.relpath(f)).as_posix()
+
+
+def _history_hit(f: str, head: str) -> bool:
+    entry = _HISTORY_CACHE.get(_history_file(f))
+    return entry is not None and entry[:2] == (head, date.today().isoformat())
+
+
+def revalidate_history(files: list[str], head: str):
+    """
+    이전 HEAD 기준 항목 중 그 사이 커밋에서 바뀌지 않은 파일 → 현재 HEAD 로 승계
+    - 이전 HEAD 마다 git diff --name-only 한 번
+    """
+    today = date.today().isoformat()
+    keys = [_history_file(f) for f in files]
+    old_heads = {e[0] for k in keys if (e := _HISTORY_CACHE.get(k)) and e[1] == today and e[0] != head}
+    for old in old_heads:
+        result = subprocess.run(["git", "diff", "--name-only", "--relative", old, head],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            continue  # 이전 HEAD 를 찾을 수 없음 (rebase 등) → 다시 조회
+        touched = set(result.stdout.splitlines())
+        for k in keys:
+            entry = _HISTORY_CACHE.get(k)
+            if entry and entry[:2] == (old, today) and k not in touched:
+                _HISTORY_CACHE[k] = (head, today, entry[2])
+
+
+def file_history(f: str, head: str) -> tuple[int, int]:
+    if _history_hit(f, head):
+        return _HISTORY_CACHE[_history_file(f)][2]
+    result = subprocess.run(["git", "log", "--since=5.days", "--pretty=format:%s", "--", f], capture_output=True, text=True)
+    recent = len(result.stdout.strip().splitlines())
+    result = subprocess.run(["git", "log", "--format=%an", "--", f], capture_output=True, text=True)
+    authors = len(set(result.stdout.strip().splitlines()))
+    _HISTORY_CACHE[_history_file(f)] = (head, date.today().isoformat(), (recent, authors))
+    return recent, authors
+
 def basic_filter(files: list[str]) -> list[str]:
     """
     확장자 기준 .py만 추출 → PyCG 등 분석용
@@ -84,6 +141,7 @@ def basic_filter(files: list[str]) -> list[str]:
     return [f for f in files if f.endswith(".py")]
 
 
+@traced("scoping.git_tool_filter", cat="scoping")
 def git_tool_filter(files: list[str]) -> tuple[list[str], dict[str, float]]:
     """
     각 파일별 점수 계산 후 기준 이상 파일 추출
@@ -128,7 +186,8 @@ def git_tool_filter(files: list[str]) -> tuple[list[str], dict[str, float]]:
     from_median = statistics.median(all_struct_from) if all_struct_from else 0
 
     # 🔹 git diff 줄 수 계산
-    result = subprocess.run(["git", "diff", "--numstat"] + files, capture_output=True, text=True)
+    with span("git.diff_numstat", cat="git", files=len(files)):
+        result = subprocess.run(["git", "diff", "--numstat"] + files, capture_output=True, text=True)
     for line in result.stdout.strip().splitlines():
         try:
             added, removed, fname = line.split("\t")
@@ -138,20 +197,18 @@ def git_tool_filter(files: list[str]) -> tuple[list[str], dict[str, float]]:
         except:
             continue
 
-    # 🔹 최근 커밋 수 (5일 기준)
-    for f in files:
-        result = subprocess.run(["git", "log", "--since=5.days", "--pretty=format:%s", "--", f], capture_output=True, text=True)
-        commits = result.stdout.strip().splitlines()
-        recent_commit_count[f] = len(commits)
-
-    # 🔹 작성자 수
+    # 🔹 최근 커밋 수 (5일 기준) / 작성자 수 → 이후 커밋이 건드리지 않은 파일은 이력 캐시 재사용
+    head = get_head()
+    revalidate_history(files, head)
+    misses = [f for f in files if not _history_hit(f, head)]
     all_author_counts = []
-    for f in files:
-        result = subprocess.run(["git", "log", "--format=%an", "--", f], capture_output=True, text=True)
-        authors = set(result.stdout.strip().splitlines())
-        count = len(authors)
-        author_counts[f] = count
-        all_author_counts.append(count)
+    with span("git.history", cat="git", files=len(files), misses=len(misses)):
+        for f in files:
+            recent, count = file_history(f, head)
+            recent_commit_count[f] = recent
+            author_counts[f] = count
+            all_author_counts.append(count)
+    counter("scoping.git_calls", calls=2 * len(misses) + 2)
 
     author_avg = statistics.mean(all_author_counts) if all_author_counts else 0
 
@@ -2,8 +2,11 @@ from pathlib import Path
 from typing import List, Dict, Tuple
 from simhash import Simhash
 import libcst as cst
+from libcst.helpers import get_full_name_for_node
 from functools import wraps
 
+from config.tracing import span, traced
+
 # ✅ 의미 없는 import 제거용 stopword
 DEFAULT_IMPORT_STOPWORDS = {
     "os", "sys", "json", "yaml", "logging", "Path", "cfg", "dotenv", "load_dotenv",
@@ -11,6 +14,29 @@ DEFAULT_IMPORT_STOPWORDS = {
     "re", "time", "datetime", "typing"
 }
 
+# ✅ 파일별 시그니처 캐시: 경로 → ((mtime_ns, size), signature)
+# - 수정되지 않은 파일은 libcst 재파싱 생략 (daemon 모드에서 실행 사이 유지)
+_SIGNATURE_CACHE: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+
+# ✅ 파일 경로 → 소속 패키지 (실행 위치 기준, 예: scoping/first_scope.py → ["scoping"])
+def _package_parts(file: Path) -> List[str]:
+    if file.is_absolute():
+        try:
+            file = file.resolve().relative_to(Path.cwd().resolve())
+        except ValueError:
+            pass
+    return list(file.with_suffix("").parts[:-1])
+
+
+# ✅ 상대 import → 절대 모듈명 (from ..a import b: level=2, module="a")
+def _resolve_relative(package: List[str], level: int, module: str | None) -> str | None:
+    if level - 1 > len(package):
+        return None
+    base = package[:len(package) - (level - 1)]
+    parts = base + ([module] if module else [])
+    return ".".join(parts) or None
+
+
 # ✅ 예외 방지용 데코레이터
 def safe_method(fallback=None):
     def decorator(func):
@@ -32,50 +58,52 @@ class StructuralGrouperV2:
         self.sim_matrix: Dict[Tuple[str, str], float] = {}
 
     # ✅ 구조 추출: def, class, import
-    @safe_method(fallback={"symbols": [], "imports": []})
+    # - imports: Simhash 특징값 (단순 이름만, 점 표기 / 상대 import 해석 없음 → 기존 그룹핑 결과 유지)
+    # - modules / submodules: 점 표기·상대 import 까지 해석한 이름 (daemon import 그래프 전용)
+    @safe_method(fallback={"symbols": [], "imports": [], "modules": [], "submodules": []})
     def extract_signature(self, file: Path) -> Dict:
+        stat = file.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = _SIGNATURE_CACHE.get(str(file))
+        if cached and cached[0] == stamp:
+            return cached[1]
         code = file.read_text(encoding="utf-8", errors="ignore")
         module = cst.parse_module(code)
 
-        symbols, imports = [], []
+        symbols, imports, modules, submodules = [], [], [], []
+        package = _package_parts(file)
 
         class Visitor(cst.CSTVisitor):
             def visit_FunctionDef(self, node): symbols.append(node.name.value)
             def visit_ClassDef(self, node): symbols.append(node.name.value)
             def visit_Import(self, node):
                 for n in node.names:
-                    try:
-                        name_obj = getattr(n, "name", None)
-                        if hasattr(name_obj, "value"):
-                            name_val = name_obj.value
-                        elif isinstance(name_obj, str):
-                            name_val = name_obj
-                        else:
-                            name_val = str(name_obj)
-                        if isinstance(name_val, str):
-                            imports.append(name_val)
-                    except Exception as e:
-                        print(f"[⚠️ import 추출 실패] {n} → {e}")
+                    if isinstance(n.name, cst.Name):
+                        imports.append(n.name.value)
+                    name_val = get_full_name_for_node(n.name)
+                    if name_val:
+                        modules.append(name_val)
 
             def visit_ImportFrom(self, node):
-                try:
-                    if node.module:
-                        name_obj = node.module
-                        if hasattr(name_obj, "value"):
-                            name_val = name_obj.value
-                        elif hasattr(name_obj, "name") and hasattr(name_obj.name, "value"):
-                            name_val = name_obj.name.value
-                        elif isinstance(name_obj, str):
-                            name_val = name_obj
-                        else:
-                            name_val = str(name_obj)
-                        if isinstance(name_val, str):
-                            imports.append(name_val)
-                except Exception as e:
-                    print(f"[⚠️ from import 추출 실패] {node} → {e}")
+                if isinstance(node.module, cst.Name):
+                    imports.append(node.module.value)
+                name_val = get_full_name_for_node(node.module) if node.module else None
+                if node.relative:
+                    name_val = _resolve_relative(package, len(node.relative), name_val)
+                if not name_val:
+                    return
+                modules.append(name_val)
+                # from pkg import mod → pkg.mod 가 레포 내 모듈일 수 있음 (import 그래프용 후보)
+                if not isinstance(node.names, cst.ImportStar):
+                    for alias in node.names:
+                        sub = get_full_name_for_node(alias.name)
+                        if sub:
+                            submodules.append(f"{name_val}.{sub}")
 
         module.visit(Visitor())
-        return {"symbols": symbols, "imports": imports}
+        sig = {"symbols": symbols, "imports": imports, "modules": modules, "submodules": submodules}
+        _SIGNATURE_CACHE[str(file)] = (stamp, sig)
+        return sig
 
     # ✅ Simhash 계산 (기본 import는 정제)
     @safe_method(fallback=None)
@@ -88,12 +116,19 @@ class StructuralGrouperV2:
         return Simhash(features)
 
     # ✅ 전체 유사도 매트릭스 계산
+    @traced("scoping.build_similarity_matrix", cat="scoping")
     def build_similarity_matrix(self):
-        for f in self.file_paths:
-            sig = self.extract_signature(f)
-            self.signatures[str(f)] = sig
-            self.fingerprints[str(f)] = self.build_fingerprint(sig)
+        with span("libcst.extract_signatures", cat="libcst", files=len(self.file_paths),
+                  cached=sum(1 for f in self.file_paths if str(f) in _SIGNATURE_CACHE)):
+            for f in self.file_paths:
+                sig = self.extract_signature(f)
+                self.signatures[str(f)] = sig
+                self.fingerprints[str(f)] = self.build_fingerprint(sig)
+
+        with span("simhash.pairwise", cat="scoping", pairs=len(self.file_paths) * (len(self.file_paths) - 1) // 2):
+            self._build_pairs()
 
+    def _build_pairs(self):
         for i, f1 in enumerate(self.file_paths):
             for f2 in self.file_paths[i + 1:]:
                 f1s, f2s = str(f1), str(f2)
@@ -1,11 +1,12 @@
 import os
 import json
+import threading
 import time
 import requests
 from pathlib import Path
+from concurrent.futures import Future
 from datetime import datetime
 from dotenv import load_dotenv
-from config.setting import log  # 로그 저장 함수 불러오기
 # 🔹 환경변수 로드
 load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env")
 
@@ -15,56 +16,171 @@ TOKEN_PATH = Path("config/kakao.json").resolve()
 API_URL = "https://kapi.kakao.com/v2/api/talk/memo/default/send"
 TOKEN_URL = "https://kauth.kakao.com/oauth/token"
 
-# 🔧 access_token 저장
-def save_access_token(token: str):
-    TOKEN_PATH.parent.mkdir(parents=True, exist_ok=True)
-    data = {
+DEFAULT_EXPIRES_IN = 6 * 3600   # expires_in 기록이 없는 예전 kakao.json → 발급 후 6시간으로 간주
+REFRESH_AHEAD = 10 * 60         # 만료 10분 전부터 백그라운드 갱신
+EXPIRY_MARGIN = 30              # 만료 30초 전부터는 만료로 취급 (전송 도중 만료 방지)
+
+
+class KakaoTokenManager:
+    """
+    access_token 수명 관리
+    - kakao.json: access_token / expires_at(epoch) / updated_at (+ 갱신 응답에 새 refresh_token 이 오면 함께 저장)
+      → 토큰이 들어 있으므로 git 추적 제외(.gitignore) + 소유자만 읽기/쓰기(0600)
+    - get(): 유효하면 바로 반환, 만료 임박(REFRESH_AHEAD 이내)이면 현재 토큰 반환 + 백그라운드 갱신
+    - 만료/없음이면 갱신 완료까지 대기 → 401 왕복 없이 처음부터 유효한 토큰으로 전송
+    - 동시 갱신 요청은 진행 중인 Future 하나를 공유 (refresh 요청은 항상 1건)
+    - 장시간 실행(daemon) 중에는 만료 전에 타이머로 미리 갱신
+    """
+
+    def __init__(self, path: Path = TOKEN_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._inflight: Future | None = None
+        self._timer: threading.Timer | None = None
+        self._state = self._load()
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if "expires_at" not in data and data.get("updated_at"):
+            updated = datetime.strptime(data["updated_at"], "%Y-%m-%d %H:%M:%S").timestamp()
+            data["expires_at"] = updated + DEFAULT_EXPIRES_IN
+        return data
+
+    def _save(self, data: dict):
+        # 임시 파일 → rename (삭제 후 재작성 사이에 다른 스레드가 빈 파일을 읽지 않도록)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps(data, ensure_ascii=False, indent=2))
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.path)
+
+    @property
+    def token(self) -> str | None:
+        return self._state.get("access_token")
+
+    def remaining(self) -> float:
+        return self._state.get("expires_at", 0) - time.time()
+
+    def get(self, session: requests.Session | None = None, timeout: float = 5) -> str | None:
+        left = self.remaining()
+        if self.token and left > EXPIRY_MARGIN:
+            if left < REFRESH_AHEAD:
+                self.refresh(session, timeout, background=True)
+            return self.token
+        return self.refresh(session, timeout).result()
+
+    def invalidate(self, token: str):
+        # 서버가 401 을 준 토큰 → 만료 처리 (이미 다른 스레드가 갱신했으면 무시)
+        with self._lock:
+            if self._state.get("access_token") == token:
+                self._state["expires_at"] = 0
+
+    def refresh(self, session: requests.Session | None = None, timeout: float = 5, background: bool = False) -> Future:
+        with self._lock:
+            if self._inflight is not None:
+                return self._inflight
+            future = self._inflight = Future()
+        if background:
+            threading.Thread(target=self._run, args=(future, session, timeout), name="kakao-token", daemon=True).start()
+        else:
+            self._run(future, session, timeout)
+        return future
+
+    def _run(self, future: Future, session: requests.Session | None, timeout: float):
+        try:
+            future.set_result(self._request_token(session, timeout))
+        except Exception as e:
+            print(f"[KAKAO] ❌ 토큰 갱신 실패: {e}")
+            future.set_result(None)
+        finally:
+            with self._lock:
+                self._inflight = None
+
+    def _request_token(self, session: requests.Session | None, timeout: float) -> str | None:
+        refresh_token = self._state.get("refresh_token") or REFRESH_TOKEN
+        if not CLIENT_ID or not refresh_token:
+            print("[KAKAO] ❌ 환경변수 CLIENT_ID 또는 REFRESH_TOKEN 누락")
+            return None
+        data = {
+            "grant_type": "refresh_token",
+            "client_id": CLIENT_ID,
+            "refresh_token": refresh_token
+        }
+        resp = (session or requests).post(TOKEN_URL, data=data, timeout=timeout)
+        print("[KAKAO] ▶ 토큰 갱신 응답 상태코드:", resp.status_code)
+        resp.raise_for_status()
+        body = resp.json()
+        new_token = body.get("access_token")
+        if not new_token:
+            return None
+        state = {
+            "access_token": new_token,
+            "expires_at": time.time() + body.get("expires_in", DEFAULT_EXPIRES_IN),
+            "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        # refresh_token 은 만료가 가까우면 새로 발급됨 → 이후 갱신에 사용
+        if body.get("refresh_token"):
+            state["refresh_token"] = body["refresh_token"]
+        elif self._state.get("refresh_token"):
+            state["refresh_token"] = self._state["refresh_token"]
+        self._save(state)
+        with self._lock:
+            self._state = state
+        self._schedule(timeout)
+        print(f"[KAKAO] ✅ access_token 갱신 (만료까지 {int(self.remaining())}s)")
+        return new_token
+
+    def _schedule(self, timeout: float):
+        # 만료 REFRESH_AHEAD 전에 백그라운드 갱신 예약 (daemon 스레드 → 종료를 막지 않음)
+        # - 호출 측 세션은 그때 닫혀 있을 수 있어 사용하지 않음
+        if self._timer is not None:
+            self._timer.cancel()
+        delay = max(0.0, self.remaining() - REFRESH_AHEAD)
+        self._timer = threading.Timer(delay, self.refresh, args=(None, timeout))
+        self._timer.daemon = True
+        self._timer.start()
+
+
+_manager: KakaoTokenManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_token_manager() -> KakaoTokenManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = KakaoTokenManager()
+        return _manager
+
+# 🔧 access_token 저장 (만료 시각을 모르면 발급 직후로 간주)
+def save_access_token(token: str, expires_in: float = DEFAULT_EXPIRES_IN):
+    manager = get_token_manager()
+    state = {
         "access_token": token,
+        "expires_at": time.time() + expires_in,
         "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     }
-    TOKEN_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    manager._save(state)
+    manager._state = state
     print(f"[KAKAO] ✅ access_token 저장됨: {TOKEN_PATH}")
 
-# 🔧 access_token 로드
+# 🔧 access_token 로드 (만료 임박/만료 시 갱신 포함)
 def load_access_token() -> str | None:
-    if TOKEN_PATH.exists():
-        data = json.loads(TOKEN_PATH.read_text(encoding="utf-8"))
-        return data.get("access_token")
-    return None
-
-# 🔧 access_token 갱신
-def refresh_access_token() -> str | None:
-    if not CLIENT_ID or not REFRESH_TOKEN:
-        print("[KAKAO] ❌ 환경변수 CLIENT_ID 또는 REFRESH_TOKEN 누락")
-        return None
-
-    data = {
-        "grant_type": "refresh_token",
-        "client_id": CLIENT_ID,
-        "refresh_token": REFRESH_TOKEN
-    }
+    return get_token_manager().get()
 
-    try:
-        print("[KAKAO] ▶ refresh 요청 payload:", data)
-        print("[KAKAO] ▶ refresh 요청 URL:", TOKEN_URL)
-        resp = requests.post(TOKEN_URL, data=data, timeout=5)
-        print("[KAKAO] ▶ 응답 상태코드:", resp.status_code)
-        print("[KAKAO] ▶ 응답 본문:", resp.text)
-        resp.raise_for_status()
-        new_token = resp.json().get("access_token")
-        if new_token:
-            if TOKEN_PATH.exists():
-                TOKEN_PATH.unlink()
-                print("[KAKAO] 🧹 이전 kakao.json 삭제 완료")
-            save_access_token(new_token)
-            time.sleep(5)
-            return new_token
-    except Exception as e:
-        print(f"[KAKAO] ❌ 토큰 갱신 실패: {e}")
-    return None
+# 🔧 access_token 갱신 (동시 호출 시 진행 중인 갱신 1건 공유)
+def refresh_access_token(session: requests.Session | None = None, timeout: float = 5) -> str | None:
+    return get_token_manager().refresh(session, timeout).result()
 
-# 🔧 메시지 전송 요청
-def send_kakao_message(token: str, message: str) -> bool:
+# 🔧 메시지 전송 요청 → "ok" | "unauthorized" | "error"
+def _post_message(token: str, message: str, session: requests.Session | None = None, timeout: float = 5) -> str:
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/x-www-form-urlencoded;charset=utf-8"
@@ -78,60 +194,67 @@ def send_kakao_message(token: str, message: str) -> bool:
         }
     }
     try:
-        resp = requests.post(
+        resp = (session or requests).post(
             API_URL,
             headers=headers,
             data={"template_object": json.dumps(payload, ensure_ascii=False)},
-            timeout=5
+            timeout=timeout
         )
         if resp.status_code == 401:
             print("[KAKAO] ❗ access_token 만료로 인해 401 반환됨")
-            return False
-        return resp.status_code == 200 and resp.json().get("result_code") == 0
+            return "unauthorized"
+        return "ok" if resp.status_code == 200 and resp.json().get("result_code") == 0 else "error"
     except Exception as e:
-        return False
+        print(f"[KAKAO] ❌ 전송 요청 실패: {e}")
+        return "error"
+
+
+def send_kakao_message(token: str, message: str, session: requests.Session | None = None, timeout: float = 5) -> bool:
+    return _post_message(token, message, session, timeout) == "ok"
 
 # ✅ commit 메시지 전송
-def send(commit_msg: str, status: str = "success") -> str:
-    token = load_access_token()
+# - session / timeout: 알림 dispatcher 가 넘겨주는 공유 세션 (연결 재사용)
+def send(commit_msg: str, status: str = "success", session: requests.Session | None = None, timeout: float = 5) -> str:
+    manager = get_token_manager()
+    token = manager.get(session, timeout)
     if not token:
-        msg = "[KAKAO] ❌ access_token 없음 → 갱신 시도"
-        refresh_token = refresh_access_token()
-        if not refresh_token:
-            return msg + "\n[KAKAO] ❌ 토큰 갱신 실패"
-        token = refresh_token
+        return "[KAKAO] ❌ access_token 없음 / 토큰 갱신 실패"
 
     prefix = "✅ Git Push 성공" if status == "success" else "❌ Git Push 실패"
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     msg = f"{prefix}\n🕒 {timestamp}\n\n📝 Commit Message:\n{commit_msg}"
 
-    if send_kakao_message(token, msg):
+    result = _post_message(token, msg, session, timeout)
+    if result == "ok":
         return "[KAKAO] ✅ 메시지 전송 성공"
+    if result != "unauthorized":
+        return "[KAKAO] ❌ 메시지 전송 실패"
 
-    # access_token 만료 → refresh 재시도
-    refresh_token = refresh_access_token()
-    if not refresh_token:
+    # 만료 시각 전에 서버에서 토큰이 폐기된 경우만 여기로 옴 → 1회 갱신 후 재전송
+    manager.invalidate(token)
+    token = manager.get(session, timeout)
+    if not token:
         return "[KAKAO] ❌ 토큰 갱신 실패"
 
-    if send_kakao_message(refresh_token, msg):
+    if send_kakao_message(token, msg, session, timeout):
         return "[KAKAO] ✅ 메시지 전송 성공 (토큰 갱신 후)"
     return "[KAKAO] ❌ 최종 전송 실패"
 
 # ✅ Ping 테스트
 def ping() -> bool:
-    token = load_access_token()
+    manager = get_token_manager()
+    token = manager.get()
     if not token:
         print("[KAKAO] ❌ ping 실패: access_token 없음")
-        token = refresh_access_token()
-        if not token:
-            return False
+        return False
 
-    success = send_kakao_message(token, "✅ [Ping 테스트] 카카오 알림 연결 성공")
-    if success:
-        return True
+    result = _post_message(token, "✅ [Ping 테스트] 카카오 알림 연결 성공")
+    if result != "unauthorized":
+        return result == "ok"
 
-    print("[KAKAO] 🔄 Ping 중 토큰 만료 추정 → 갱신 시도")
-    token = refresh_access_token()
+    print("[KAKAO] 🔄 Ping 중 토큰 폐기 추정 → 갱신 시도")
+    manager.invalidate(token)
+    token = manager.get()
     if not token:
         return False
     return send_kakao_message(token, "✅ [Ping 테스트] 카카오 알림 연결 성공")
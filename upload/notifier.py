@@ -0,0 +1,205 @@
+"""
+알림 비동기 발송 (kakao / slack / discord / gmail)
+- submit(): 플랫폼별 전송을 백그라운드 스레드에 넘기고 즉시 반환 → 업로드 단계 지연에 채팅 API 왕복 미포함
+- 플랫폼끼리 동시 전송, 플랫폼마다 공유 requests.Session (연결 재사용) + 개별 timeout
+- 프로세스 종료 전(atexit) 남은 전송을 drain_timeout 까지 기다림
+  (ThreadPoolExecutor 워커는 atexit 이전에 join 되어 timeout 이 무의미 → 자체 큐 + daemon 스레드 사용)
+"""
+import atexit
+import importlib
+import inspect
+import queue
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Callable
+
+from config.setting import cfg
+from config.tracing import span
+
+# 플랫폼 → 모듈 후보 (send(msg, ...) 제공)
+PLATFORM_MODULES = {
+    "kakao": ("notify.kakao", "upload.kakao"),
+    "slack": ("notify.slack",),
+    "discord": ("notify.discord",),
+    "gmail": ("notify.gmail",),
+}
+
+
+def _load_sender(platform: str) -> Callable | None:
+    for name in PLATFORM_MODULES.get(platform, (f"notify.{platform}",)):
+        try:
+            return importlib.import_module(name).send
+        except (ImportError, AttributeError):
+            continue
+    return None
+
+
+def _is_failure(result) -> bool:
+    # 모듈마다 반환 형식이 달라 통일: False / "❌ ..." 문자열은 실패
+    return result is False or (isinstance(result, str) and "❌" in result)
+
+
+class NotificationDispatcher:
+    def __init__(self, timeouts: dict[str, float], default_timeout: float = 5.0, max_workers: int = 8):
+        self.timeouts = timeouts
+        self.default_timeout = default_timeout
+        self.max_workers = max_workers
+        self._queue: queue.Queue = queue.Queue()
+        self._workers: list[threading.Thread] = []
+        self._senders: dict[str, Callable | None] = {}
+        self._sessions: dict = {}
+        self._lock = threading.Lock()
+        self._pending: set[Future] = set()
+
+    def session(self, platform: str):
+        with self._lock:
+            sess = self._sessions.get(platform)
+            if sess is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                sess = requests.Session()
+                sess.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+                self._sessions[platform] = sess
+            return sess
+
+    def _sender(self, platform: str) -> Callable | None:
+        with self._lock:
+            if platform not in self._senders:
+                self._senders[platform] = _load_sender(platform)
+            return self._senders[platform]
+
+    # ✅ daemon 워커: 종료 시 남은 전송이 있어도 프로세스 종료를 막지 않음 (대기는 drain_timeout 까지만)
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, platform, msg, log_func = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._send(platform, msg, log_func))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _enqueue(self, platform: str, msg: str, log_func: Callable) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if not self._workers:
+                for i in range(self.max_workers):
+                    worker = threading.Thread(target=self._worker, name=f"notify-{i}", daemon=True)
+                    worker.start()
+                    self._workers.append(worker)
+        self._queue.put((future, platform, msg, log_func))
+        return future
+
+    def _send(self, platform: str, msg: str, log_func: Callable) -> bool:
+        sender = self._sender(platform)
+        if sender is None:
+            log_func(f"[알림 실패] 알 수 없는 플랫폼: {platform}")
+            return False
+        timeout = self.timeouts.get(platform, self.default_timeout)
+        params = inspect.signature(sender).parameters
+        kwargs = {}
+        if "session" in params:
+            kwargs["session"] = self.session(platform)
+        if "timeout" in params:
+            kwargs["timeout"] = timeout
+        t0 = time.perf_counter()
+        try:
+            with span(f"notify.{platform}", cat="network"):
+                result = sender(msg, **kwargs)
+        except Exception as e:
+            log_func(f"[알림 실패] {platform}: {e}")
+            return False
+        duration = round(time.perf_counter() - t0, 3)
+        if _is_failure(result):
+            log_func(f"[알림 실패] {platform}: {result} ({duration}s)")
+            return False
+        log_func(f"[알림] {platform} 전송 완료 ({duration}s)")
+        return True
+
+    def submit(self, platforms: list[str], msg: str, log_func: Callable) -> Future:
+        # 결과 Future → 실패한 플랫폼 목록 (호출 측은 기다리지 않아도 됨)
+        done: Future = Future()
+        results: dict[str, bool] = {}
+        lock = threading.Lock()
+        if not platforms:
+            done.set_result([])
+            return done
+
+        def finish(platform: str, future: Future):
+            ok = not future.cancelled() and future.exception() is None and future.result()
+            with lock:
+                results[platform] = ok
+                last = len(results) == len(platforms)
+            if last:
+                done.set_result([p for p in platforms if not results[p]])
+
+        with self._lock:
+            self._pending.add(done)
+        done.add_done_callback(self._discard)
+        for platform in platforms:
+            future = self._enqueue(platform, msg, log_func)
+            future.add_done_callback(lambda f, p=platform: finish(p, f))
+        return done
+
+    def _discard(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def drain(self, timeout: float | None = None) -> int:
+        # 남은 전송 완료까지 대기 → 끝나지 않은 묶음 수 반환
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return 0
+        _, not_done = wait(pending, timeout=timeout)
+        return len(not_done)
+
+    def close(self, timeout: float | None = None) -> int:
+        left = self.drain(timeout)
+        # 아직 시작 못 한 전송은 취소, 진행 중인 전송은 daemon 스레드째 버림
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for _ in workers:
+            self._queue.put(None)
+        if not left:
+            for sess in self._sessions.values():
+                sess.close()
+        return left
+
+
+_dispatcher: NotificationDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            conf = cfg.get_notify_config()
+            _dispatcher = NotificationDispatcher(conf["timeout"], conf["default_timeout"])
+        return _dispatcher
+
+
+@atexit.register
+def drain_all():
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is None:
+        return
+    drain_timeout = cfg.get_notify_config()["drain_timeout"]
+    left = dispatcher.close(drain_timeout)
+    if left:
+        print(f"⚠️ 알림 {left}건 미완료 상태로 종료 (drain_timeout {drain_timeout}s 초과)")
@@ -1,6 +1,9 @@
 import os
+import json
+import functools
 import requests
 import random
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
@@ -29,19 +32,121 @@ COLORS = [
     "purple_background", "pink_background"
 ]
 
+MAX_CHILDREN = 100       # Notion: children 추가 요청 1건당 최대 블록 수
+MAX_TEXT = 2000          # Notion: rich_text 항목 1개당 최대 글자 수
+TOGGLE_CACHE_PATH = Path("config/notion_toggles.json").resolve()
+TOGGLE_CACHE_LIMIT = 500  # 오래된 시간 토글부터 정리
+
+_session = None
+
+
+def _http() -> requests.Session:
+    # 같은 호스트로 연속 요청 → 연결 재사용
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.headers.update(HEADERS)
+    return _session
+
+
+@functools.lru_cache(maxsize=1)
 def get_repo_name() -> str:
     import subprocess
     try:
         url = subprocess.run(
             ["git", "config", "--get", "remote.origin.url"],
-            capture_output=True, text=True, shell=True
+            capture_output=True, text=True
         ).stdout.strip()
-        repo = url.rstrip(".git").split("/")[-1] if url else "Unknown"
+        repo = url.removesuffix(".git").split("/")[-1] if url else "Unknown"
         return repo.replace("-", " ").title()
     except Exception:
         return "Unknown Repo"
 
+
+# ✅ 기존 children 조회 (페이지네이션: 100개 초과 시 next_cursor 로 계속)
+def get_notion_blocks(parent_id: str) -> list[dict]:
+    blocks, cursor = [], None
+    while True:
+        params = {"page_size": 100}
+        if cursor:
+            params["start_cursor"] = cursor
+        resp = _http().get(f"{NOTION_URL_BASE}/blocks/{parent_id}/children", params=params, timeout=10)
+        resp.raise_for_status()
+        body = resp.json()
+        blocks.extend(body.get("results", []))
+        if not body.get("has_more"):
+            return blocks
+        cursor = body.get("next_cursor")
+
+
+class ToggleCache:
+    """
+    토글 블록 ID 영구 캐시: (부모 ID, 토글 제목) → 블록 ID
+    - 📁 repo / 📅 월 / 🕒 시간 토글을 한 번 찾거나 만들면 이후 실행은 조회 요청 없이 바로 사용
+    - 삭제된 블록이면 append 가 실패 → invalidate 후 다시 조회/생성
+    - TOGGLE_CACHE_LIMIT 초과 시 오래된 시간 토글부터 정리
+    """
+
+    def __init__(self, path: Path = TOGGLE_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self._ids: dict[str, str] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._ids = {}
+
+    @staticmethod
+    def _key(parent_id: str, title: str) -> str:
+        return f"{parent_id}\t{title}"
+
+    def get(self, parent_id: str, title: str) -> str | None:
+        return self._ids.get(self._key(parent_id, title))
+
+    def put(self, parent_id: str, title: str, block_id: str):
+        with self._lock:
+            self._ids[self._key(parent_id, title)] = block_id
+            self._evict()
+            self._save()
+
+    # ✅ 한도 초과 시 🕒 시간 토글(실행마다 새로 생김)부터 오래된 순으로 정리 → repo / 월 토글은 최대한 유지
+    def _evict(self):
+        over = len(self._ids) - TOGGLE_CACHE_LIMIT
+        if over <= 0:
+            return
+        times, rest = [], []
+        for k in self._ids:
+            (times if k.split("\t", 1)[-1].startswith("🕒") else rest).append(k)
+        for key in (times + rest)[:over]:
+            del self._ids[key]
+
+    def invalidate(self, block_ids: set[str]):
+        with self._lock:
+            self._ids = {k: v for k, v in self._ids.items() if v not in block_ids}
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(json.dumps(self._ids, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+_toggle_cache: ToggleCache | None = None
+
+
+def get_toggle_cache() -> ToggleCache:
+    global _toggle_cache
+    if _toggle_cache is None:
+        _toggle_cache = ToggleCache()
+    return _toggle_cache
+
+
 def find_or_create_toggle_block(parent_id: str, title_text: str) -> str:
+    cache = get_toggle_cache()
+    cached = cache.get(parent_id, title_text)
+    if cached:
+        return cached
+
     try:
         children = get_notion_blocks(parent_id)
         for block in children:
@@ -49,6 +154,7 @@ def find_or_create_toggle_block(parent_id: str, title_text: str) -> str:
                 continue
             rich_texts = block.get("toggle", {}).get("rich_text", [])
             if rich_texts and rich_texts[0]["text"]["content"] == title_text:
+                cache.put(parent_id, title_text, block["id"])
                 return block["id"]
     except Exception:
         pass  # fallback to creation
@@ -64,13 +170,15 @@ def find_or_create_toggle_block(parent_id: str, title_text: str) -> str:
         }]
     }
 
-    resp = requests.patch(
+    resp = _http().patch(
         f"{NOTION_URL_BASE}/blocks/{parent_id}/children",
-        headers=HEADERS,
-        json=payload
+        json=payload,
+        timeout=10
     )
     resp.raise_for_status()
-    return resp.json()["results"][0]["id"]
+    block_id = resp.json()["results"][0]["id"]
+    cache.put(parent_id, title_text, block_id)
+    return block_id
 
 def create_paragraph_block(title: str, text: str) -> dict:
     full_text = f"{title}\n\n{text}" if title else text
@@ -80,64 +188,95 @@ def create_paragraph_block(title: str, text: str) -> dict:
         "paragraph": {
             "rich_text": [{
                 "type": "text",
-                "text": { "content": full_text }
-            }],
+                "text": { "content": full_text[i:i + MAX_TEXT] }
+            } for i in range(0, max(len(full_text), 1), MAX_TEXT)],
             "color": random.choice(COLORS)
         }
     }
 
-def upload_fx_record(filename: str, fx_text: str):
-    now = datetime.now()
-    repo_name = get_repo_name()
-    top_toggle = f"📁 {repo_name}"
-    mid_toggle = f"📅 {now.strftime('%y년 %m월')}"
-    time_toggle = f"🕒 {now.strftime('%d일 %p %I시 %M분').replace('AM', '오전').replace('PM', '오후')}"
+def _toggle_titles(now: datetime) -> list[str]:
+    return [
+        f"📁 {get_repo_name()}",
+        f"📅 {now.strftime('%y년 %m월')}",
+        f"🕒 {now.strftime('%d일 %p %I시 %M분').replace('AM', '오전').replace('PM', '오후')}",
+    ]
 
+def _toggle_gone(resp) -> bool:
+    # 캐시된 토글이 삭제/보관된 경우만 True: 404, 또는 400 중 object_not_found / archived 오류
+    # (그 밖의 400 은 요청 자체 문제 → 캐시를 비우지 않고 그대로 실패 처리)
+    if resp is None:
+        return False
+    if resp.status_code == 404:
+        return True
+    if resp.status_code != 400:
+        return False
     try:
-        top_id = find_or_create_toggle_block(NOTION_PAGE_ID, top_toggle)
-        mid_id = find_or_create_toggle_block(top_id, mid_toggle)
-        time_id = find_or_create_toggle_block(mid_id, time_toggle)
-
-        blocks = [create_paragraph_block(f"📘 FILE: {filename}", fx_text)]
+        body = resp.json()
+    except ValueError:
+        return False
+    return body.get("code") == "object_not_found" or "archived" in str(body.get("message", "")).lower()
 
-        requests.patch(
-            f"{NOTION_URL_BASE}/blocks/{time_id}/children",
-            headers=HEADERS,
-            json={"children": blocks}
-        )
+def _resolve_toggle_path(titles: list[str], retry: bool = True) -> list[str]:
+    ids, parent = [], NOTION_PAGE_ID
+    try:
+        for title in titles:
+            parent = find_or_create_toggle_block(parent, title)
+            ids.append(parent)
     except Exception as e:
-        msg = f"[NOTION] ❌ {filename} 업로드 실패: {e}"
-        if cfg and hasattr(cfg, "log"):
-            cfg.log(msg, Path("logs/notion_fallback.log"))
-        else:
-            print(msg)
-
-# ✅ 향후 확장용: 여러 파일 한 번에 업로드
-def upload_fx_batch(file_text_pairs: list[tuple[str, str]]):
-    now = datetime.now()
-    repo_name = get_repo_name()
-    top_toggle = f"📁 {repo_name}"
-    mid_toggle = f"📅 {now.strftime('%y년 %m월')}"
-    time_toggle = f"🕒 {now.strftime('%d일 %p %I시 %M분').replace('AM', '오전').replace('PM', '오후')}"
+        if not retry or not ids or not _toggle_gone(getattr(e, "response", None)):
+            raise
+        # 캐시된 상위 토글이 삭제됨 → 해당 ID 비우고 처음부터 다시
+        get_toggle_cache().invalidate(set(ids))
+        return _resolve_toggle_path(titles, retry=False)
+    return ids
+
+def _log_failure(msg: str):
+    if cfg and hasattr(cfg, "log"):
+        cfg.log(msg, Path("logs/notion_fallback.log"))
+    else:
+        print(msg)
 
+def upload_fx_record(filename: str, fx_text: str):
+    failed = upload_fx_batch([(filename, fx_text)])
+    if failed:
+        _log_failure(f"[NOTION] ❌ {filename} 업로드 실패")
+
+# ✅ 여러 파일 한 번에 업로드
+# - 토글 경로는 한 번만 확인 (캐시 적중 시 조회 요청 0건)
+# - 블록은 MAX_CHILDREN 개씩 나눠 append → 요청 수 = ceil(파일 수 / 100)
+# - 실패한 묶음의 파일명 리스트 반환
+def upload_fx_batch(file_text_pairs: list[tuple[str, str]]) -> list[str]:
+    if not file_text_pairs:
+        return []
+    titles = _toggle_titles(datetime.now())
     try:
-        top_id = find_or_create_toggle_block(NOTION_PAGE_ID, top_toggle)
-        mid_id = find_or_create_toggle_block(top_id, mid_toggle)
-        time_id = find_or_create_toggle_block(mid_id, time_toggle)
-
-        blocks = [
-            create_paragraph_block(f"📘 FILE: {fn}", txt)
-            for fn, txt in file_text_pairs
-        ]
-
-        requests.patch(
-            f"{NOTION_URL_BASE}/blocks/{time_id}/children",
-            headers=HEADERS,
-            json={"children": blocks}
-        )
+        path_ids = _resolve_toggle_path(titles)
     except Exception as e:
-        msg = f"[NOTION] ❌ batch 업로드 실패: {e}"
-        if cfg and hasattr(cfg, "log"):
-            cfg.log(msg, Path("logs/notion_fallback.log"))
-        else:
-            print(msg)
+        _log_failure(f"[NOTION] ❌ 토글 경로 준비 실패: {e}")
+        return [fn for fn, _ in file_text_pairs]
+
+    failed = []
+    for start in range(0, len(file_text_pairs), MAX_CHILDREN):
+        chunk = file_text_pairs[start:start + MAX_CHILDREN]
+        blocks = [create_paragraph_block(f"📘 FILE: {fn}", txt) for fn, txt in chunk]
+        try:
+            resp = _http().patch(
+                f"{NOTION_URL_BASE}/blocks/{path_ids[-1]}/children",
+                json={"children": blocks},
+                timeout=30
+            )
+            if start == 0 and _toggle_gone(resp):
+                # 캐시된 토글이 삭제/보관됨 → 캐시 비우고 경로 다시 확인 후 1회 재시도
+                get_toggle_cache().invalidate(set(path_ids))
+                path_ids = _resolve_toggle_path(titles)
+                resp = _http().patch(
+                    f"{NOTION_URL_BASE}/blocks/{path_ids[-1]}/children",
+                    json={"children": blocks},
+                    timeout=30
+                )
+            resp.raise_for_status()
+        except Exception as e:
+            names = [fn for fn, _ in chunk]
+            failed.extend(names)
+            _log_failure(f"[NOTION] ❌ batch 업로드 실패 ({len(names)}개): {e}")
+    return failed
@@ -1,31 +1,37 @@
 from pathlib import Path
 import json
 from config.setting import cfg
-from scripts.dataframe import load_df
+from config.tracing import span, traced
+from pipeline.artifacts import get_store
 from scripts.classify import classify_main
-from scripts.upload_utils import get_file_path, do_git_commit, send_notification
+from scripts.upload_utils import get_file_path, GitCommitPlanner, COMMITTED, UNCHANGED, send_notification
 from scripts.ext_info import to_safe_filename
 import record.notion as notion
 
+@traced("upload.main", cat="upload")
 def upload_main():
     timestamp = cfg.get_timestamp()  # ✅ 고정값 사용
     log_file = cfg.init_log_file(timestamp)
-    paths = cfg.get_results_path(timestamp)
 
-    strategy_df = load_df(paths["strategy"])
+    strategy_df = get_store(timestamp).get("strategy")
     if strategy_df is None or strategy_df.empty:
         cfg.log("❌ strategy_df 없음 → 업로드 중단", log_file)
         return
 
-    result = classify_main()
+    with span("upload.classify", cat="upload"):
+        result = classify_main()
     commit_msgs = result["commit"]
     fx_summary = result["fx_summary"]
     notify = result["notify"]
 
     strategy_map = strategy_df.set_index("File").to_dict(orient="index")
+    commit_cfg = cfg.get_commit_config()
+    group_by = commit_cfg["group_by"]
     commit_result = {}
-    commit_groups = {"success": [], "fallback": [], "fail": []}
+    commit_groups = {"success": [], "fallback": [], "fail": [], "unchanged": []}
 
+    # 🔹 커밋 예약: 파일별 메시지 (group_by 지정 시 같은 값끼리 1커밋)
+    planned: dict = {}  # 그룹 키 → [(file, filepath, msg, fallback)]
     for file in strategy_df["File"]:
         row = strategy_map.get(file)
         if not row:
@@ -35,17 +41,36 @@ def upload_main():
             continue
 
         filepath = Path(row["path"]) / to_safe_filename(file)
+        fallback = file not in commit_msgs
+        msg = commit_msgs[file] if not fallback else f"chore(auto): {file} 변경사항 (no LLM commit message)"
+        key = row.get(group_by) if group_by else file
+        planned.setdefault(key, []).append((file, filepath, msg, fallback))
 
-        if file in commit_msgs:
-            msg = commit_msgs[file]
-            success = do_git_commit(filepath, msg, lambda m: cfg.log(m, log_file))
-            commit_result[file] = "✅" if success else "❌"
-            commit_groups["success" if success else "fail"].append(file)
+    planner = GitCommitPlanner(lambda m: cfg.log(m, log_file))
+    for key, entries in planned.items():
+        if len(entries) == 1:
+            msg = entries[0][2]
         else:
-            dummy_msg = f"chore(auto): {file} 변경사항 (no LLM commit message)"
-            success = do_git_commit(filepath, dummy_msg, lambda m: cfg.log(m, log_file))
-            commit_result[file] = "⚠️ fallback" if success else "❌"
-            commit_groups["fallback" if success else "fail"].append(file)
+            msg = f"chore(auto): {group_by}={key} 변경 {len(entries)}개 파일\n\n" + "\n\n".join(e[2] for e in entries)
+        planner.add([e[1] for e in entries], msg)
+
+    with span("upload.git", cat="git", commits=len(planned)):
+        statuses = planner.commit()
+        pushed = None
+        if commit_cfg["push"] and COMMITTED in statuses:
+            pushed = planner.push(commit_cfg["push_retries"], commit_cfg["push_backoff"])
+
+    for entries, state in zip(planned.values(), statuses):
+        for file, _, _, fallback in entries:
+            if state == COMMITTED:
+                commit_result[file] = "⚠️ fallback" if fallback else "✅"
+                commit_groups["fallback" if fallback else "success"].append(file)
+            elif state == UNCHANGED:
+                commit_result[file] = "⏭️ 변경 없음"
+                commit_groups["unchanged"].append(file)
+            else:
+                commit_result[file] = "❌"
+                commit_groups["fail"].append(file)
 
     cfg.log(f"✅ Git 커밋 결과 요약:\n{json.dumps(commit_result, ensure_ascii=False, indent=2)}", log_file)
 
@@ -57,18 +82,16 @@ def upload_main():
         notify_text += f"\n🚫 커밋 실패 파일: {', '.join(commit_groups['fail'])}"
     if commit_groups["fallback"]:
         notify_text += f"\n⚠️ 메시지 없이 커밋된 파일: {', '.join(commit_groups['fallback'])}"
+    if pushed is False:
+        notify_text += "\n📡 push 실패 → 커밋은 로컬에만 있음 (git push 재실행 필요)"
     if notify.get("review_files"):
         notify_text += f"\n🧐 수동 검토 대상: {', '.join(notify['review_files'])}"
 
-    send_notification(["kakao", "slack", "discord", "gmail"], notify_text, lambda m: cfg.log(m, log_file))
+    platforms = cfg.get_notify_config()["platform"] or ["kakao", "slack", "discord", "gmail"]
+    send_notification(platforms, notify_text, lambda m: cfg.log(m, log_file))
 
-    notion_failures = []
-    for file, text in fx_summary.items():
-        try:
-            notion.upload_fx_record(file, text)
-        except Exception as e:
-            notion_failures.append(file)
-            cfg.log(f"[NOTION] {file} 업로드 실패: {e}", log_file)
+    with span("upload.notion", cat="network", files=len(fx_summary)):
+        notion_failures = notion.upload_fx_batch(list(fx_summary.items()))
 
     if notion_failures:
         cfg.log(f"[NOTION] 업로드 실패 파일 목록: {notion_failures}", log_file)
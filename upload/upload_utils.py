@@ -1,7 +1,13 @@
 from pathlib import Path
+import os
 import subprocess
+import time
+from concurrent.futures import Future
 from typing import Callable
 
+from config.setting import cfg
+from config.tracing import counter, span, traced
+
 def get_file_path(file: str, strategy_df, log_func: Callable | None = None) -> Path | None:
     """
     파일 이름과 전략 DataFrame을 기반으로 안전한 경로 반환
@@ -16,6 +22,7 @@ def get_file_path(file: str, strategy_df, log_func: Callable | None = None) -> P
         return None
     return Path(row["path"].iloc[0]) / to_safe_filename(file)
 
+@traced("upload.git_commit", cat="git")
 def do_git_commit(filepath: Path, msg: str, log_func: Callable) -> bool:
     """
     파일 단위 Git 커밋 및 푸시 수행
@@ -33,30 +40,145 @@ def do_git_commit(filepath: Path, msg: str, log_func: Callable) -> bool:
         log_func(f"❌ Git 예외 발생: {filepath} → {e}")
         return False
 
-def send_notification(platforms: list[str], msg: str, log_func: Callable) -> list[str]:
+COMMITTED, UNCHANGED, FAILED = "committed", "unchanged", "failed"
+
+
+class GitCommitPlanner:
     """
-    지정된 플랫폼 리스트에 알림 메시지 전송
-    - 실패 시 로그 기록
-    - 유효하지 않은 플랫폼 필터링 처리
-    - 실패한 플랫폼 리스트 반환
+    업로드 커밋을 모아서 로컬에서 한 번에 생성 → push 는 마지막에 1회
+    - add(paths, msg): 커밋 1건 예약 (파일별 또는 그룹별), 예약 순서 = 커밋 순서
+    - commit(): git fast-import 프로세스 1개로 예약된 커밋을 순서대로 생성
+      → HEAD 를 compare-and-swap 으로 갱신 (그 사이 HEAD 가 바뀌면 전체 실패, 기존 이력 보존)
+      → 커밋한 경로만 index 를 새 HEAD 에 맞춤 (작업 트리 / 다른 staged 변경은 그대로)
+    - push(): 네트워크 실패만 재시도, rejected(non-fast-forward 등)는 즉시 실패
+    - git 프로세스 수는 파일 수와 무관하게 약 7개 (+ push 재시도)
     """
-    from notify import discord, gmail, kakao, slack
+    TEMP_REF = "refs/4cowork/upload"
 
+    def __init__(self, log_func: Callable, cwd: Path | None = None):
+        self.log_func = log_func
+        self.cwd = cwd
+        self.planned: list[tuple[list[Path], str]] = []
 
-    failed = []
+    def add(self, paths: list[Path], msg: str) -> int:
+        self.planned.append((list(paths), msg))
+        return len(self.planned) - 1
 
-    for pf in platforms:
-        sender = platform_map.get(pf)
-        if not sender:
-            log_func(f"[알림 실패] 알 수 없는 플랫폼: {pf}")
-            failed.append(pf)
-            continue
+    def _git(self, *args: str, stdin: bytes | None = None, check: bool = True) -> subprocess.CompletedProcess:
+        return subprocess.run(["git", *args], cwd=self.cwd, input=stdin, capture_output=True, check=check)
 
+    def _changed(self, rel_paths: list[str]) -> set[str]:
+        # HEAD 대비 변경(수정/추가/삭제/untracked)된 경로만
+        out = self._git("status", "--porcelain=v1", "-z", "--untracked-files=all", "--", *rel_paths).stdout
+        changed, entries = set(), out.decode("utf-8", "surrogateescape").split("\0")
+        i = 0
+        while i < len(entries):
+            entry = entries[i]
+            if len(entry) > 3:
+                changed.add(entry[3:])
+                if entry[0] in "RC":
+                    i += 1  # rename/copy 는 원래 경로가 다음 항목
+            i += 1
+        return changed
+
+    @staticmethod
+    def _file_command(root: Path, rel: str) -> bytes:
+        full = root / rel
+        if not os.path.lexists(full):
+            return f"D {rel}\n".encode("utf-8")
+        if full.is_symlink():
+            mode, data = "120000", os.readlink(full).encode("utf-8")
+        else:
+            mode = "100755" if os.access(full, os.X_OK) else "100644"
+            data = full.read_bytes()
+        return f"M {mode} inline {rel}\ndata {len(data)}\n".encode("utf-8") + data + b"\n"
+
+    @traced("upload.git_commit_batch", cat="git")
+    def commit(self) -> list[str]:
+        # 예약 순서대로 상태 반환: committed / unchanged / failed
+        status = [FAILED] * len(self.planned)
+        if not self.planned:
+            return status
         try:
-            sender(msg)
+            root = Path(self._git("rev-parse", "--show-toplevel").stdout.decode().strip())
+            head_proc = self._git("rev-parse", "-q", "--verify", "HEAD", check=False)
+            head = head_proc.stdout.decode().strip() if head_proc.returncode == 0 else None
+            ident = self._git("var", "GIT_COMMITTER_IDENT").stdout.decode().strip()
+
+            rel_planned: list[list[str] | None] = []
+            for paths, _ in self.planned:
+                try:
+                    rel_planned.append([Path(os.path.abspath(p)).relative_to(root).as_posix() for p in paths])
+                except ValueError:
+                    self.log_func(f"❌ Git 커밋 실패: 레포 밖 경로 → {[str(p) for p in paths]}")
+                    rel_planned.append(None)
+            changed = self._changed(sorted({r for rels in rel_planned if rels for r in rels}))
+
+            stream = [f"reset {self.TEMP_REF}\n".encode("utf-8")]
+            if head:
+                stream.append(f"from {head}\n\n".encode("utf-8"))
+            touched: list[str] = []
+            for i, ((_, msg), rels) in enumerate(zip(self.planned, rel_planned)):
+                if rels is None:
+                    continue
+                rels = [r for r in rels if r in changed]
+                if not rels:
+                    status[i] = UNCHANGED
+                    self.log_func(f"⏭️ 변경 없음 → 커밋 생략: {self.planned[i][0]}")
+                    continue
+                body = msg.encode("utf-8")
+                stream.append(f"commit {self.TEMP_REF}\ncommitter {ident}\ndata {len(body)}\n".encode("utf-8") + body + b"\n")
+                stream.extend(self._file_command(root, r) for r in rels)
+                stream.append(b"\n")
+                changed -= set(rels)  # 같은 파일이 여러 커밋에 예약된 경우 첫 커밋에만 포함
+                touched.extend(rels)
+                status[i] = COMMITTED
+            if not touched:
+                return status
+
+            with span("git.fast_import", cat="git", commits=status.count(COMMITTED)):
+                self._git("fast-import", "--quiet", "--force", stdin=b"".join(stream))
+            new_head = self._git("rev-parse", self.TEMP_REF).stdout.decode().strip()
+            old = head or "0" * 40
+            self._git("update-ref", "--stdin",
+                      stdin=f"update HEAD {new_head} {old}\ndelete {self.TEMP_REF}\n".encode("utf-8"))
+            self._git("reset", "-q", "--", *touched)
+            counter("upload.git_commits", commits=status.count(COMMITTED))
+            return status
+        except subprocess.CalledProcessError as e:
+            err = (e.stderr or b"").decode("utf-8", "replace").strip()
+            self.log_func(f"❌ Git 일괄 커밋 실패 → {e} {err}")
         except Exception as e:
-            log_func(f"[알림 실패] {pf}: {e}")
-            failed.append(pf)
+            self.log_func(f"❌ Git 예외 발생: {e}")
+        self._git("update-ref", "-d", self.TEMP_REF, check=False)
+        return [FAILED if s == COMMITTED else s for s in status]
+
+    @traced("upload.git_push", cat="network")
+    def push(self, retries: int = 3, backoff: float = 2.0) -> bool:
+        for attempt in range(1, retries + 1):
+            proc = self._git("push", check=False)
+            if proc.returncode == 0:
+                return True
+            err = proc.stderr.decode("utf-8", "replace").strip()
+            if "rejected" in err or attempt == retries:
+                self.log_func(f"❌ Git push 실패 ({attempt}/{retries}): {err}")
+                return False
+            self.log_func(f"⚠️ Git push 재시도 ({attempt}/{retries}): {err}")
+            time.sleep(backoff * 2 ** (attempt - 1))
+        return False
 
-    return failed
+@traced("upload.send_notification", cat="network")
+def send_notification(platforms: list[str], msg: str, log_func: Callable, wait: bool | None = None) -> Future:
+    """
+    지정된 플랫폼 리스트에 알림 메시지 전송
+    - 플랫폼끼리 동시 전송, 백그라운드 실행 → 바로 반환 (종료 전 자동 drain)
+    - 실패 시 로그 기록, 유효하지 않은 플랫폼은 실패 처리
+    - 반환 Future → 실패한 플랫폼 리스트
+    - wait=True (또는 notify.async: false) 이면 전송 완료까지 대기
+    """
+    from upload.notifier import get_dispatcher
 
+    future = get_dispatcher().submit(platforms, msg, log_func)
+    if wait if wait is not None else not cfg.get_notify_config()["async"]:
+        future.result()
+    return future